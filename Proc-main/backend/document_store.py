@@ -0,0 +1,159 @@
+import hashlib
+import io
+import logging
+import os
+import re
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from gridfs.errors import NoFile
+from motor.motor_asyncio import AsyncIOMotorGridFSBucket
+
+logger = logging.getLogger(__name__)
+
+# Bytes read from an upload, and from GridFS, per step; no whole file is ever held in memory
+TRANSFER_CHUNK_BYTES = 1024 * 1024
+
+# Uploads larger than this are rejected while streaming
+MAX_DOCUMENT_BYTES = int(os.environ.get('MAX_DOCUMENT_BYTES', str(50 * 1024 * 1024)))
+
+RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class DocumentTooLarge(Exception):
+    """An upload went over MAX_DOCUMENT_BYTES"""
+
+
+class DocumentNotFound(Exception):
+    """No stored document has the requested id"""
+
+
+class RangeNotSatisfiable(Exception):
+    """A Range header that selects no bytes of the document"""
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """Inclusive (start, end) byte span of a single-range Range header, or None for the whole document.
+
+    Multi-range and syntactically invalid headers (e.g. bytes=5-3) are
+    ignored, so the whole document is sent, as RFC 9110 requires. Only a
+    valid range that selects no byte of the document raises
+    RangeNotSatisfiable.
+    """
+    match = RANGE_PATTERN.match(header.strip()) if header else None
+    if not match or match.groups() == ("", ""):
+        return None
+    first, last = match.groups()
+    if first and last and int(last) < int(first):
+        return None
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    else:
+        # Suffix range: the last N bytes
+        start = max(size - int(last), 0)
+        end = size - 1
+    if start >= size or start > end:
+        raise RangeNotSatisfiable(f"bytes */{size}")
+    return start, end
+
+
+class _BytesUpload:
+    """In-memory document with the read() interface of an UploadFile"""
+
+    def __init__(self, data: bytes, filename: str, content_type: str):
+        self._data = io.BytesIO(data)
+        self.filename = filename
+        self.content_type = content_type
+
+    async def read(self, size: int = -1) -> bytes:
+        return self._data.read(size)
+
+
+class DocumentStore:
+    """Binary documents in GridFS, written and read in chunks.
+
+    Records hold the reference returned by save() (id, filename, content
+    type, size and SHA-256) instead of the file contents. Metadata passed to
+    save() is stored with the file and can be looked up with find().
+    """
+
+    def __init__(self, database, bucket_name: str = "documents"):
+        self.bucket = AsyncIOMotorGridFSBucket(database, bucket_name=bucket_name)
+        self.files = database[f"{bucket_name}.files"]
+
+    async def save(self, upload, metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Stream an UploadFile into GridFS and return its reference"""
+        content_type = upload.content_type or "application/octet-stream"
+        filename = upload.filename or "document"
+        document_id = ObjectId()
+        grid_in = self.bucket.open_upload_stream_with_id(
+            document_id, filename, metadata={**(metadata or {}), "content_type": content_type}
+        )
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            while True:
+                chunk = await upload.read(TRANSFER_CHUNK_BYTES)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > MAX_DOCUMENT_BYTES:
+                    raise DocumentTooLarge(f"{filename} is larger than {MAX_DOCUMENT_BYTES} bytes")
+                digest.update(chunk)
+                await grid_in.write(chunk)
+            await grid_in.set("sha256", digest.hexdigest())
+        except BaseException:
+            await grid_in.abort()
+            raise
+        await grid_in.close()
+        return {
+            "document_id": str(document_id),
+            "filename": filename,
+            "content_type": content_type,
+            "size": size,
+            "sha256": digest.hexdigest()
+        }
+
+    async def save_bytes(self, data: bytes, filename: str, content_type: str = "application/octet-stream",
+                         metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Store an in-memory document (legacy inline documents and demo data)"""
+        return await self.save(_BytesUpload(data, filename, content_type), metadata)
+
+    async def find(self, query: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Reference of the document whose stored file matches query, e.g. on metadata fields"""
+        stored = await self.files.find_one(query)
+        if not stored:
+            return None
+        return {
+            "document_id": str(stored["_id"]),
+            "filename": stored["filename"],
+            "content_type": (stored.get("metadata") or {}).get("content_type", "application/octet-stream"),
+            "size": stored["length"],
+            "sha256": stored.get("sha256")
+        }
+
+    async def open(self, document_id: str):
+        """GridOut for a stored document; raises DocumentNotFound"""
+        try:
+            return await self.bucket.open_download_stream(ObjectId(document_id))
+        except (InvalidId, TypeError, NoFile) as e:
+            raise DocumentNotFound(document_id) from e
+
+    async def iter_range(self, grid_out, start: int, end: int) -> AsyncIterator[bytes]:
+        """Bytes start..end (inclusive) of an opened document, one chunk at a time"""
+        grid_out.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = await grid_out.read(min(TRANSFER_CHUNK_BYTES, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+    async def delete(self, document_id: str):
+        try:
+            await self.bucket.delete(ObjectId(document_id))
+        except (InvalidId, NoFile):
+            logger.warning(f"Document {document_id} was already gone")
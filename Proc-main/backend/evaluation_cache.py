@@ -0,0 +1,78 @@
+import hashlib
+import json
+import os
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from pymongo import ASCENDING
+from pymongo.errors import DuplicateKeyError
+
+from metrics import register_collector
+
+# Cached evaluations are dropped this long after they were made
+EVALUATION_CACHE_TTL_DAYS = int(os.environ.get('EVALUATION_CACHE_TTL_DAYS', '90'))
+
+
+def document_hash(document: Any) -> Optional[str]:
+    """SHA-256 of a proposal document: from its store reference, or of the legacy inline base64"""
+    if not document:
+        return None
+    if isinstance(document, dict):
+        return document.get("sha256") or document.get("document_id")
+    return hashlib.sha256(str(document).encode('utf-8')).hexdigest()
+
+
+def evaluation_key(inputs: Dict[str, Any], model: str, prompt_version: str) -> str:
+    """Deterministic key of everything an evaluation depends on"""
+    canonical = json.dumps(
+        {"inputs": inputs, "model": model, "prompt_version": prompt_version},
+        sort_keys=True, ensure_ascii=False, default=str
+    )
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class EvaluationCache:
+    """AI evaluation results in MongoDB, keyed by evaluation_key()"""
+
+    def __init__(self, collection, ttl_days: int = EVALUATION_CACHE_TTL_DAYS):
+        self.collection = collection
+        self.ttl_days = ttl_days
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "bypassed": 0}
+        register_collector(self.collect_metrics)
+
+    async def ensure_indexes(self):
+        await self.collection.create_index([("key", ASCENDING)], name="evaluation_cache_key", unique=True)
+        await self.collection.create_index(
+            [("created_at", ASCENDING)], name="evaluation_cache_ttl",
+            expireAfterSeconds=self.ttl_days * 24 * 3600
+        )
+
+    async def get(self, key: str, force: bool = False) -> Optional[Dict[str, Any]]:
+        """The cached evaluation, or None on a miss or when force asks for a fresh one"""
+        if force:
+            self.stats["bypassed"] += 1
+            return None
+        cached = await self.collection.find_one({"key": key}, {"_id": 0, "evaluation": 1})
+        self.stats["hits" if cached else "misses"] += 1
+        return cached["evaluation"] if cached else None
+
+    async def put(self, key: str, evaluation: Dict[str, Any], model: str, prompt_version: str):
+        try:
+            await self.collection.insert_one({
+                "key": key,
+                "evaluation": evaluation,
+                "model": model,
+                "prompt_version": prompt_version,
+                "created_at": datetime.utcnow()
+            })
+        except DuplicateKeyError:
+            # A forced re-evaluation replaces the earlier result
+            await self.collection.update_one(
+                {"key": key}, {"$set": {"evaluation": evaluation, "created_at": datetime.utcnow()}}
+            )
+        self.stats["stores"] += 1
+
+    def collect_metrics(self):
+        yield "evaluation_cache_total", "counter", "AI evaluation cache lookups and stores", [
+            ({"result": result}, count) for result, count in self.stats.items()
+        ]
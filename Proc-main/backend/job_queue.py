@@ -0,0 +1,223 @@
+import asyncio
+import logging
+import os
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from pymongo import ASCENDING, DESCENDING, ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from metrics import register_collector
+
+logger = logging.getLogger(__name__)
+
+# Jobs run at once by this process
+JOB_WORKERS = int(os.environ.get('JOB_WORKERS', '2'))
+
+# Runs of a job before it is marked failed
+JOB_MAX_ATTEMPTS = int(os.environ.get('JOB_MAX_ATTEMPTS', '3'))
+
+# Delay before the first retry; doubles for each further one
+JOB_RETRY_BASE_SECONDS = float(os.environ.get('JOB_RETRY_BASE_SECONDS', '10'))
+
+# A running job whose worker died is picked up again after this long
+JOB_LEASE_SECONDS = float(os.environ.get('JOB_LEASE_SECONDS', '300'))
+
+# Idle workers look for due jobs this often (enqueueing wakes them at once)
+JOB_POLL_SECONDS = 2.0
+
+QUEUED, RUNNING, COMPLETED, FAILED = "queued", "running", "completed", "failed"
+
+ProgressReporter = Callable[[str, float], Awaitable[None]]
+JobHandler = Callable[[Dict[str, Any], ProgressReporter], Awaitable[Dict[str, Any]]]
+
+
+class PermanentJobError(Exception):
+    """A job failure that retrying cannot fix, e.g. the proposal was deleted"""
+
+
+class JobQueue:
+    """Jobs stored in a MongoDB collection and run by a pool of local worker tasks.
+
+    Workers claim due jobs with an atomic find_one_and_update, so several
+    processes can share one collection. A claimed job holds a lease; if its
+    worker dies, the job is claimed again once the lease runs out. Failed
+    runs are retried with exponential backoff until max_attempts. At most one
+    queued or running job exists per key, so enqueueing twice returns the
+    job already in progress.
+    """
+
+    def __init__(self, collection, kind: str, workers: int = JOB_WORKERS, max_attempts: int = JOB_MAX_ATTEMPTS,
+                 lease_seconds: float = JOB_LEASE_SECONDS):
+        self.collection = collection
+        self.kind = kind
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.lease_seconds = lease_seconds
+        self._handler: Optional[JobHandler] = None
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup = asyncio.Event()
+        self.stats = {"completed": 0, "failed": 0, "retried": 0}
+        register_collector(self.collect_metrics)
+
+    async def ensure_indexes(self):
+        await self.collection.create_index([("id", ASCENDING)], name="jobs_id", unique=True)
+        await self.collection.create_index([("status", ASCENDING), ("available_at", ASCENDING)], name="jobs_due")
+        await self.collection.create_index([("status", ASCENDING), ("lease_expires_at", ASCENDING)], name="jobs_lease")
+        await self.collection.create_index([("created_at", DESCENDING)], name="jobs_recent")
+        # One queued or running job per key
+        await self.collection.create_index(
+            [("key", ASCENDING)], name="jobs_active_key", unique=True,
+            partialFilterExpression={"active": True}
+        )
+
+    async def enqueue(self, key: str, payload: Dict[str, Any], created_by: Optional[str] = None) -> Dict[str, Any]:
+        """Queue a job, or return the queued or running job with the same key"""
+        now = datetime.utcnow()
+        job = {
+            "id": str(uuid.uuid4()),
+            "kind": self.kind,
+            "key": key,
+            "payload": payload,
+            "status": QUEUED,
+            "active": True,
+            "stage": QUEUED,
+            "progress": 0.0,
+            "attempts": 0,
+            "max_attempts": self.max_attempts,
+            "error": None,
+            "result": None,
+            "created_by": created_by,
+            "created_at": now,
+            "available_at": now,
+            "started_at": None,
+            "finished_at": None
+        }
+        try:
+            await self.collection.insert_one(job)
+        except DuplicateKeyError:
+            existing = await self.collection.find_one({"key": key, "active": True}, {"_id": 0})
+            if existing:
+                return existing
+            # The active job finished between the insert and the lookup
+            return await self.enqueue(key, payload, created_by)
+        job.pop("_id", None)
+        self._wakeup.set()
+        return job
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return await self.collection.find_one({"id": job_id}, {"_id": 0})
+
+    async def recent(self, query: Dict[str, Any], limit: int = 100) -> List[Dict[str, Any]]:
+        return await self.collection.find(query, {"_id": 0}).sort("created_at", DESCENDING).to_list(limit)
+
+    def start(self, handler: JobHandler):
+        """Start the worker tasks; handler(job, report) runs one job and returns its result"""
+        self._handler = handler
+        self._tasks = [asyncio.create_task(self._worker(n)) for n in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _claim(self) -> Optional[Dict[str, Any]]:
+        now = datetime.utcnow()
+        return await self.collection.find_one_and_update(
+            {"$or": [
+                {"status": QUEUED, "available_at": {"$lte": now}},
+                # The worker running this job died without finishing it
+                {"status": RUNNING, "lease_expires_at": {"$lte": now}}
+            ]},
+            {
+                "$set": {
+                    "status": RUNNING,
+                    "stage": RUNNING,
+                    "started_at": now,
+                    "lease_expires_at": now + timedelta(seconds=self.lease_seconds)
+                },
+                "$inc": {"attempts": 1}
+            },
+            projection={"_id": 0},
+            sort=[("available_at", ASCENDING)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def _worker(self, number: int):
+        while True:
+            try:
+                job = await self._claim()
+            except Exception as e:
+                logger.error(f"{self.kind} worker {number} could not claim a job: {e}")
+                job = None
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=JOB_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._run(job)
+
+    async def _update(self, job: Dict[str, Any], update: Dict[str, Any]):
+        # Guarded by attempts so a run whose lease was taken over cannot overwrite the newer run
+        await self.collection.update_one({"id": job["id"], "attempts": job["attempts"]}, update)
+
+    async def _run(self, job: Dict[str, Any]):
+        async def report(stage: str, progress: float):
+            await self._update(job, {"$set": {"stage": stage, "progress": progress}})
+
+        try:
+            if job["attempts"] > job["max_attempts"]:
+                raise PermanentJobError("Worker stopped during the last attempt")
+            result = await self._handler(job, report)
+        except asyncio.CancelledError:
+            # Shutting down: hand the job back instead of waiting for its lease to run out
+            await asyncio.shield(self._update(job, {
+                "$set": {"status": QUEUED, "stage": QUEUED, "available_at": datetime.utcnow()},
+                "$inc": {"attempts": -1}
+            }))
+            raise
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            if isinstance(e, PermanentJobError) or job["attempts"] >= job["max_attempts"]:
+                self.stats["failed"] += 1
+                logger.error(f"{self.kind} job {job['id']} failed after {job['attempts']} attempts: {error}")
+                await self._update(job, {
+                    "$set": {"status": FAILED, "stage": FAILED, "error": error, "finished_at": datetime.utcnow()},
+                    "$unset": {"active": "", "lease_expires_at": ""}
+                })
+            else:
+                self.stats["retried"] += 1
+                delay = JOB_RETRY_BASE_SECONDS * (2 ** (job["attempts"] - 1))
+                logger.warning(f"{self.kind} job {job['id']} attempt {job['attempts']} failed, retrying in {delay:.0f}s: {error}")
+                await self._update(job, {"$set": {
+                    "status": QUEUED,
+                    "stage": "retrying",
+                    "error": error,
+                    "available_at": datetime.utcnow() + timedelta(seconds=delay)
+                }})
+            return
+
+        self.stats["completed"] += 1
+        await self._update(job, {
+            "$set": {
+                "status": COMPLETED,
+                "stage": COMPLETED,
+                "progress": 100.0,
+                "result": result,
+                "error": None,
+                "finished_at": datetime.utcnow()
+            },
+            "$unset": {"active": "", "lease_expires_at": ""}
+        })
+
+    def collect_metrics(self):
+        yield "jobs_total", "counter", "Finished job runs by outcome", [
+            ({"kind": self.kind, "outcome": outcome}, count) for outcome, count in self.stats.items()
+        ]
+        yield "job_workers", "gauge", "Worker tasks running jobs in this process", [
+            ({"kind": self.kind}, len(self._tasks))
+        ]
@@ -0,0 +1,253 @@
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from typing import Dict, Any, Awaitable, Callable, Deque, Optional, Tuple
+
+from metrics import register_collector
+
+logger = logging.getLogger(__name__)
+
+# Maximum LLM calls in flight per worker; further calls wait for a slot
+LLM_MAX_CONCURRENCY = int(os.environ.get('LLM_MAX_CONCURRENCY', '4'))
+
+# Upper bound for one call including retries
+LLM_TIMEOUT_SECONDS = float(os.environ.get('LLM_TIMEOUT_SECONDS', '90'))
+
+# Attempts after the first when the provider call fails with a transient error
+LLM_MAX_RETRIES = int(os.environ.get('LLM_MAX_RETRIES', '2'))
+LLM_RETRY_BASE_SECONDS = 1.0
+
+# Provider HTTP statuses worth another attempt: request timeout, rate limiting and server errors
+TRANSIENT_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+# Transient error classes of the OpenAI and LiteLLM clients behind LlmChat, matched by
+# name because the wrapper does not expose them
+TRANSIENT_ERROR_NAMES = {
+    "APIConnectionError", "APITimeoutError", "RateLimitError", "InternalServerError",
+    "ServiceUnavailableError", "Timeout"
+}
+
+# Per-call records kept for the admin endpoint
+RECENT_CALLS = 200
+
+# USD per 1K (prompt, completion) tokens, for cost estimates
+MODEL_PRICES_PER_1K = {
+    "gpt-4": (0.03, 0.06),
+    "gpt-4o": (0.0025, 0.01),
+    "gpt-4o-mini": (0.00015, 0.0006),
+    "gpt-4.1": (0.002, 0.008),
+    "gpt-4.1-mini": (0.0004, 0.0016),
+}
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("cl100k_base")
+except Exception:  # tiktoken is optional; fall back to a character heuristic
+    _encoding = None
+
+
+def estimate_tokens(text: str) -> int:
+    """Token count of text the provider reports no usage for"""
+    if _encoding is not None:
+        return len(_encoding.encode(text))
+    return len(text) // 4
+
+
+def is_transient_error(error: BaseException) -> bool:
+    """Whether a failed provider call may succeed if sent again (auth, bad requests and bugs may not)"""
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    status = getattr(error, "status_code", None)
+    if isinstance(status, int):
+        return status in TRANSIENT_STATUS_CODES
+    return type(error).__name__ in TRANSIENT_ERROR_NAMES
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    matches = [name for name in MODEL_PRICES_PER_1K if model.startswith(name)]
+    if not matches:
+        return 0.0
+    prompt_price, completion_price = MODEL_PRICES_PER_1K[max(matches, key=len)]
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1000
+
+
+class LLMCall:
+    """Accounting record of one call made through the gateway"""
+
+    def __init__(self, call_site: str, model: str, fallback_reason: Optional[str] = None):
+        self.call_site = call_site
+        self.model = model
+        self.fallback_reason = fallback_reason
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.tokens_estimated = False
+        self.retries = 0
+        self.queue_seconds = 0.0
+        self.wall_seconds = 0.0
+        self.outcome = "ok"
+        self.error: Optional[str] = None
+        self.started_at = time.time()
+        self._started = time.monotonic()
+
+    @property
+    def cost(self) -> float:
+        return estimate_cost(self.model, self.prompt_tokens, self.completion_tokens)
+
+    def finish(self):
+        self.wall_seconds = time.monotonic() - self._started
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "call_site": self.call_site,
+            "model": self.model,
+            "outcome": self.outcome,
+            "error": self.error,
+            "fallback_reason": self.fallback_reason,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "tokens_estimated": self.tokens_estimated,
+            "estimated_cost_usd": round(self.cost, 6),
+            "retries": self.retries,
+            "queue_ms": round(self.queue_seconds * 1000, 1),
+            "wall_ms": round(self.wall_seconds * 1000, 1),
+            "started_at": self.started_at
+        }
+
+
+class LLMUsage:
+    """Per call site and model totals of every gateway call, plus the most recent calls"""
+
+    def __init__(self, recent: int = RECENT_CALLS):
+        self._totals: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._fallbacks: Dict[Tuple[str, str], int] = {}
+        self.recent: Deque[Dict[str, Any]] = deque(maxlen=recent)
+
+    def record(self, call: LLMCall):
+        totals = self._totals.setdefault((call.call_site, call.model), {
+            "calls": 0, "outcomes": {}, "prompt_tokens": 0, "completion_tokens": 0,
+            "estimated_cost_usd": 0.0, "retries": 0, "wall_seconds": 0.0, "queue_seconds": 0.0
+        })
+        totals["calls"] += 1
+        totals["outcomes"][call.outcome] = totals["outcomes"].get(call.outcome, 0) + 1
+        totals["prompt_tokens"] += call.prompt_tokens
+        totals["completion_tokens"] += call.completion_tokens
+        totals["estimated_cost_usd"] += call.cost
+        totals["retries"] += call.retries
+        totals["wall_seconds"] += call.wall_seconds
+        totals["queue_seconds"] += call.queue_seconds
+        if call.fallback_reason:
+            key = (call.call_site, call.fallback_reason)
+            self._fallbacks[key] = self._fallbacks.get(key, 0) + 1
+        self.recent.append(call.as_dict())
+
+    def record_fallback(self, call_site: str, reason: str):
+        """Record a locally produced result that stands in for a failed LLM call"""
+        call = LLMCall(call_site, "local", reason)
+        call.outcome = "fallback"
+        call.finish()
+        self.record(call)
+
+    def summary(self, recent: int = 20) -> Dict[str, Any]:
+        return {
+            "call_sites": [
+                {
+                    "call_site": call_site,
+                    "model": model,
+                    **totals,
+                    "estimated_cost_usd": round(totals["estimated_cost_usd"], 6),
+                    "avg_wall_ms": round(totals["wall_seconds"] * 1000 / totals["calls"], 1),
+                    "avg_queue_ms": round(totals["queue_seconds"] * 1000 / totals["calls"], 1)
+                }
+                for (call_site, model), totals in sorted(self._totals.items())
+            ],
+            "fallbacks": [
+                {"call_site": call_site, "reason": reason, "count": count}
+                for (call_site, reason), count in sorted(self._fallbacks.items())
+            ],
+            "recent": list(self.recent)[-recent:]
+        }
+
+    def collect_metrics(self):
+        totals = sorted(self._totals.items())
+        yield "llm_calls_total", "counter", "LLM gateway calls by outcome", [
+            ({"call_site": site, "model": model, "outcome": outcome}, count)
+            for (site, model), total in totals for outcome, count in total["outcomes"].items()
+        ]
+        yield "llm_tokens_total", "counter", "Tokens used by LLM calls (estimated when the provider reports none)", [
+            ({"call_site": site, "model": model, "kind": kind}, total[f"{kind}_tokens"])
+            for (site, model), total in totals for kind in ("prompt", "completion")
+        ]
+        yield "llm_estimated_cost_usd_total", "counter", "Estimated LLM spend in USD", [
+            ({"call_site": site, "model": model}, total["estimated_cost_usd"]) for (site, model), total in totals
+        ]
+        yield "llm_retries_total", "counter", "Retried LLM requests", [
+            ({"call_site": site, "model": model}, total["retries"]) for (site, model), total in totals
+        ]
+        yield "llm_wall_seconds_total", "counter", "Wall time of LLM calls, queueing included", [
+            ({"call_site": site, "model": model}, total["wall_seconds"]) for (site, model), total in totals
+        ]
+        yield "llm_queue_seconds_total", "counter", "Time LLM calls waited for a concurrency slot", [
+            ({"call_site": site, "model": model}, total["queue_seconds"]) for (site, model), total in totals
+        ]
+        yield "llm_fallbacks_total", "counter", "Results produced by a fallback, by reason", [
+            ({"call_site": site, "reason": reason}, count) for (site, reason), count in sorted(self._fallbacks.items())
+        ]
+
+
+llm_usage = LLMUsage()
+register_collector(llm_usage.collect_metrics)
+
+
+class LLMGateway:
+    """Single path for every LLM call: concurrency limit, timeout, retries of transient errors and accounting"""
+
+    def __init__(self, max_concurrency: int = LLM_MAX_CONCURRENCY):
+        self.limiter = asyncio.Semaphore(max_concurrency)
+
+    async def complete(self, call_site: str, model: str, prompt: str, send: Callable[[], Awaitable[str]],
+                       system_prompt: str = "", timeout: float = LLM_TIMEOUT_SECONDS) -> str:
+        """Run send() (one provider request returning the reply text) and account for it"""
+        record = LLMCall(call_site, model)
+        try:
+            queued = time.monotonic()
+            async with self.limiter:
+                record.queue_seconds = time.monotonic() - queued
+                loop = asyncio.get_running_loop()
+                deadline = loop.time() + timeout
+                attempt = 0
+                while True:
+                    try:
+                        response = await asyncio.wait_for(send(), timeout=deadline - loop.time())
+                        break
+                    except asyncio.TimeoutError:
+                        # The call's own deadline is spent
+                        raise
+                    except Exception as e:
+                        delay = LLM_RETRY_BASE_SECONDS * (2 ** attempt)
+                        if not is_transient_error(e) or attempt >= LLM_MAX_RETRIES or loop.time() + delay >= deadline:
+                            raise
+                        attempt += 1
+                        record.retries += 1
+                        logger.warning(f"LLM call {call_site} failed ({type(e).__name__}), retry {attempt}")
+                        await asyncio.sleep(delay)
+
+            # The provider wrapper returns text only, so token counts are estimated
+            record.prompt_tokens = estimate_tokens(system_prompt) + estimate_tokens(prompt)
+            record.completion_tokens = estimate_tokens(response or "")
+            record.tokens_estimated = True
+            return response
+        except Exception as e:
+            record.outcome = "timeout" if isinstance(e, asyncio.TimeoutError) else "error"
+            record.error = type(e).__name__
+            raise
+        except BaseException:
+            record.outcome = "cancelled"
+            raise
+        finally:
+            record.finish()
+            llm_usage.record(record)
+
+
+llm_gateway = LLMGateway()
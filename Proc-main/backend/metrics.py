@@ -0,0 +1,36 @@
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+# A collector yields (metric name, type, help text, [(labels, value), ...]) tuples
+Sample = Tuple[Dict[str, str], float]
+Collector = Callable[[], Iterable[Tuple[str, str, str, List[Sample]]]]
+
+_collectors: List[Collector] = []
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def register_collector(collector: Collector):
+    """Add a callable whose metrics are included in every scrape"""
+    _collectors.append(collector)
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_sample(name: str, labels: Dict[str, str], value: float) -> str:
+    if labels:
+        rendered = ",".join(f'{key}="{_escape(label)}"' for key, label in labels.items())
+        return f"{name}{{{rendered}}} {float(value)}"
+    return f"{name} {float(value)}"
+
+
+def render_prometheus() -> str:
+    """All registered metrics in the Prometheus text exposition format"""
+    lines = []
+    for collector in _collectors:
+        for name, metric_type, help_text, samples in collector():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            lines.extend(_format_sample(name, labels, value) for labels, value in samples)
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,124 @@
+import asyncio
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, Tuple, TypeVar
+
+import bcrypt
+
+from metrics import register_collector
+
+# Threads running bcrypt; bcrypt releases the GIL, so throughput scales with cores
+PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', str(os.cpu_count() or 2)))
+
+# Hashes allowed to wait for a worker; beyond that requests are turned away with 429
+PASSWORD_HASH_QUEUE = int(os.environ.get('PASSWORD_HASH_QUEUE', str(PASSWORD_HASH_WORKERS * 8)))
+
+# Seconds clients are told to wait before retrying a rejected request
+PASSWORD_HASH_RETRY_AFTER = 1
+
+# Timings kept for the latency percentiles
+RECENT_TIMINGS = 1000
+
+T = TypeVar("T")
+
+
+class PasswordHasherBusy(Exception):
+    """Every worker is busy and the wait queue is full"""
+
+
+class HashTiming:
+    """Queue wait and bcrypt time of one hash or check"""
+
+    def __init__(self, queue_seconds: float, hash_seconds: float):
+        self.queue_seconds = queue_seconds
+        self.hash_seconds = hash_seconds
+
+    def server_timing(self) -> str:
+        """Server-Timing header value"""
+        return f"hash_queue;dur={self.queue_seconds * 1000:.1f}, hash;dur={self.hash_seconds * 1000:.1f}"
+
+
+def _percentile(values: list, share: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * share), len(ordered) - 1)]
+
+
+class PasswordHasher:
+    """bcrypt on a bounded thread pool, off the event loop.
+
+    At most workers hashes run at once and at most queue_size more wait;
+    further requests raise PasswordHasherBusy at once instead of piling up.
+    """
+
+    def __init__(self, workers: int = PASSWORD_HASH_WORKERS, queue_size: int = PASSWORD_HASH_QUEUE):
+        self.workers = workers
+        self.capacity = workers + queue_size
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+        self._pending = 0
+        self.counters = {"hash": 0, "verify": 0, "rejected": 0}
+        self._hash_seconds_total = 0.0
+        self._queue_seconds_total = 0.0
+        self._recent: Deque[Tuple[float, float]] = deque(maxlen=RECENT_TIMINGS)
+
+    async def _run(self, operation: str, work: Callable[[], T]) -> Tuple[T, HashTiming]:
+        if self._pending >= self.capacity:
+            self.counters["rejected"] += 1
+            raise PasswordHasherBusy(f"{self._pending} password hashes pending")
+
+        self._pending += 1
+        submitted = time.perf_counter()
+
+        def timed() -> Tuple[T, float, float]:
+            started = time.perf_counter()
+            return work(), started - submitted, time.perf_counter() - started
+
+        try:
+            result, queue_seconds, hash_seconds = await asyncio.get_running_loop().run_in_executor(self._executor, timed)
+        finally:
+            self._pending -= 1
+
+        self.counters[operation] += 1
+        self._queue_seconds_total += queue_seconds
+        self._hash_seconds_total += hash_seconds
+        self._recent.append((queue_seconds, hash_seconds))
+        return result, HashTiming(queue_seconds, hash_seconds)
+
+    async def hash(self, password: str) -> Tuple[str, HashTiming]:
+        return await self._run(
+            "hash", lambda: bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+        )
+
+    async def verify(self, password: str, hashed: str) -> Tuple[bool, HashTiming]:
+        return await self._run("verify", lambda: bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8')))
+
+    def summary(self) -> Dict[str, Any]:
+        queue_times = [queue for queue, _ in self._recent]
+        hash_times = [hashed for _, hashed in self._recent]
+        return {
+            "workers": self.workers,
+            "capacity": self.capacity,
+            "pending": self._pending,
+            **self.counters,
+            "hash_ms_p50": round(_percentile(hash_times, 0.5) * 1000, 1),
+            "hash_ms_p95": round(_percentile(hash_times, 0.95) * 1000, 1),
+            "queue_ms_p50": round(_percentile(queue_times, 0.5) * 1000, 1),
+            "queue_ms_p95": round(_percentile(queue_times, 0.95) * 1000, 1)
+        }
+
+    def collect_metrics(self):
+        yield "password_hash_operations_total", "counter", "Password hashes and checks by outcome", [
+            ({"operation": operation}, count) for operation, count in self.counters.items()
+        ]
+        yield "password_hash_seconds_total", "counter", "Time spent in bcrypt", [({}, self._hash_seconds_total)]
+        yield "password_hash_queue_seconds_total", "counter", "Time hashes waited for a worker", [
+            ({}, self._queue_seconds_total)
+        ]
+        yield "password_hash_pending", "gauge", "Hashes running or waiting for a worker", [({}, self._pending)]
+
+
+password_hasher = PasswordHasher()
+register_collector(password_hasher.collect_metrics)
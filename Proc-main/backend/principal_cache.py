@@ -0,0 +1,85 @@
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Set, Tuple
+
+from metrics import register_collector
+
+# Tokens whose verified principal is kept; least recently used entries are dropped first
+PRINCIPAL_CACHE_SIZE = int(os.environ.get('PRINCIPAL_CACHE_SIZE', '10000'))
+
+# Longest an entry is trusted, however late its token expires. Invalidation is
+# per process, so this bounds how long other workers see a stale approval state.
+PRINCIPAL_CACHE_TTL_SECONDS = float(os.environ.get('PRINCIPAL_CACHE_TTL_SECONDS', '60'))
+
+
+def token_key(token: str) -> str:
+    """Cache key of a bearer token; raw tokens are never kept in memory longer than the request"""
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+
+class PrincipalCache:
+    """Verified token claims plus the user's current type and approval state, keyed by token hash.
+
+    An entry lives until its token expires or PRINCIPAL_CACHE_TTL_SECONDS pass,
+    whichever is first, and is dropped as soon as invalidate_user() is called
+    for its user.
+    """
+
+    def __init__(self, max_entries: int = PRINCIPAL_CACHE_SIZE, ttl_seconds: float = PRINCIPAL_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._keys_by_user: Dict[str, Set[str]] = {}
+        self.stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        key = token_key(token)
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.time():
+            if entry is not None:
+                self._remove(key)
+            self.stats["misses"] += 1
+            return None
+        self._entries.move_to_end(key)
+        self.stats["hits"] += 1
+        return entry[1]
+
+    def put(self, token: str, principal: Dict[str, Any], token_expires_at: float):
+        key = token_key(token)
+        self._remove(key)
+        self._entries[key] = (min(token_expires_at, time.time() + self.ttl_seconds), principal)
+        self._keys_by_user.setdefault(principal["user_id"], set()).add(key)
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        keys = self._keys_by_user.get(entry[1]["user_id"])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_user[entry[1]["user_id"]]
+
+    def invalidate_user(self, user_id: str):
+        """Forget every cached principal of a user whose type or approval state changed"""
+        keys = self._keys_by_user.pop(user_id, set())
+        for key in keys:
+            self._entries.pop(key, None)
+        self.stats["invalidations"] += 1
+
+    def collect_metrics(self):
+        yield "principal_cache_lookups_total", "counter", "Principal cache lookups by result", [
+            ({"result": "hit"}, self.stats["hits"]), ({"result": "miss"}, self.stats["misses"])
+        ]
+        yield "principal_cache_invalidations_total", "counter", "Users whose cached principals were dropped", [
+            ({}, self.stats["invalidations"])
+        ]
+        yield "principal_cache_entries", "gauge", "Cached principals", [({}, len(self._entries))]
+
+
+principal_cache = PrincipalCache()
+register_collector(principal_cache.collect_metrics)
@@ -1,4 +1,4 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, File, UploadFile, Form
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, File, UploadFile, Form, Query, Header
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
@@ -6,18 +6,29 @@ import os
 import logging
 from pathlib import Path
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Union
 import uuid
 from datetime import datetime, timedelta
-import bcrypt
 import jwt
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 import base64
 import io
 from emergentintegrations.llm.chat import LlmChat, UserMessage
+from fastapi.responses import Response, StreamingResponse
+from pymongo import ASCENDING, DESCENDING, UpdateOne
 import asyncio
 import re
 import json
+from urllib.parse import quote
+
+from document_store import DocumentStore, DocumentNotFound, DocumentTooLarge, RangeNotSatisfiable, parse_range
+from evaluation_cache import EvaluationCache, document_hash, evaluation_key
+from job_queue import JobQueue, PermanentJobError
+from llm_gateway import llm_gateway, llm_usage
+from metrics import render_prometheus, CONTENT_TYPE as METRICS_CONTENT_TYPE
+from principal_cache import principal_cache
+from password_hasher import password_hasher, PasswordHasherBusy, PASSWORD_HASH_RETRY_AFTER
+from pagination import InvalidCursor, fetch_page, stream_ndjson
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -34,6 +45,16 @@ mongo_url = os.environ['MONGO_URL']
 client = AsyncIOMotorClient(mongo_url)
 db = client[os.environ['DB_NAME']]
 
+# Uploaded files live in GridFS; records keep only references to them
+document_store = DocumentStore(db)
+contract_document_store = DocumentStore(db, "contract_documents")
+
+# AI proposal evaluations run in the background, one job per proposal at a time
+evaluation_jobs = JobQueue(db.evaluation_jobs, "evaluate_proposal")
+
+# Evaluations of unchanged RFP and proposal content are reused instead of asking the LLM again
+evaluation_cache = EvaluationCache(db.evaluation_cache)
+
 # OpenAI integration
 openai_api_key = os.environ.get('OPENAI_API_KEY')
 
@@ -100,13 +121,40 @@ class Proposal(BaseModel):
     rfp_id: str
     vendor_id: str
     vendor_company: str
-    technical_document: Optional[str] = None  # base64 encoded
-    commercial_document: Optional[str] = None  # base64 encoded
+    technical_document: Optional[Union[Dict, str]] = None  # document store reference (base64 on old rows)
+    commercial_document: Optional[Union[Dict, str]] = None  # document store reference (base64 on old rows)
     submitted_at: datetime = Field(default_factory=datetime.utcnow)
     status: str = "submitted"  # submitted, under_review, evaluated, awarded, rejected
     ai_score: Optional[float] = None
     ai_evaluation: Optional[Dict] = None
 
+class RFPSummary(BaseModel):
+    """List view of an RFP; attachments are only returned by /rfps/{rfp_id}"""
+    id: str
+    title: str
+    description: str
+    budget: float
+    deadline: datetime
+    categories: List[str]
+    scope_of_work: str
+    created_by: str
+    created_at: datetime
+    status: str
+    approval_level: str
+
+class ProposalSummary(BaseModel):
+    """List view of a proposal: whether each document was uploaded, not the base64 documents"""
+    id: str
+    rfp_id: str
+    vendor_id: str
+    vendor_company: str
+    has_technical_document: bool = False
+    has_commercial_document: bool = False
+    submitted_at: datetime
+    status: str
+    ai_score: Optional[float] = None
+    ai_evaluation: Optional[Dict] = None
+
 class AIEvaluation(BaseModel):
     commercial_score: float
     technical_score: float
@@ -137,11 +185,32 @@ class Contract(BaseModel):
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
 # Helper functions
-def hash_password(password: str) -> str:
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+def _hasher_busy() -> HTTPException:
+    return HTTPException(
+        status_code=429,
+        detail="Too many sign-ins in progress, please retry shortly",
+        headers={"Retry-After": str(PASSWORD_HASH_RETRY_AFTER)}
+    )
 
-def verify_password(password: str, hashed: str) -> bool:
-    return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+async def hash_password(password: str, response: Optional[Response] = None) -> str:
+    """bcrypt hash computed on the password hasher pool; 429 when the pool is saturated"""
+    try:
+        hashed, timing = await password_hasher.hash(password)
+    except PasswordHasherBusy:
+        raise _hasher_busy()
+    if response is not None:
+        response.headers["Server-Timing"] = timing.server_timing()
+    return hashed
+
+async def verify_password(password: str, hashed: str, response: Optional[Response] = None) -> bool:
+    """bcrypt check computed on the password hasher pool; 429 when the pool is saturated"""
+    try:
+        matches, timing = await password_hasher.verify(password, hashed)
+    except PasswordHasherBusy:
+        raise _hasher_busy()
+    if response is not None:
+        response.headers["Server-Timing"] = timing.server_timing()
+    return matches
 
 def create_jwt_token(user_id: str, user_type: str) -> str:
     payload = {
@@ -161,34 +230,91 @@ def get_approval_level(budget: float) -> str:
     else:
         return "ceo"
 
+PRINCIPAL_FIELDS = {"_id": 0, "id": 1, "email": 1, "user_type": 1, "is_approved": 1, "company_name": 1}
+
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    """The caller's principal: user id and type plus current approval state and profile basics.
+    
+    Verified tokens are cached by hash, so repeat requests skip both the
+    signature check and the user lookup.
+    """
+    token = credentials.credentials
+    principal = principal_cache.get(token)
+    if principal is not None:
+        return principal
+    
     try:
-        payload = jwt.decode(credentials.credentials, JWT_SECRET, algorithms=[JWT_ALGORITHM])
-        user_id = payload.get('user_id')
-        user_type = payload.get('user_type')
-        if user_id is None:
-            raise HTTPException(status_code=401, detail="Invalid token")
-        return {"user_id": user_id, "user_type": user_type}
+        payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Token expired")
-    except jwt.JWTError:
+    except jwt.InvalidTokenError:
         raise HTTPException(status_code=401, detail="Invalid token")
+    
+    user_id = payload.get('user_id')
+    if user_id is None:
+        raise HTTPException(status_code=401, detail="Invalid token")
+    
+    user = await db.users.find_one({"id": user_id}, PRINCIPAL_FIELDS)
+    if not user:
+        raise HTTPException(status_code=401, detail="User not found")
+    
+    principal = {
+        "user_id": user_id,
+        "user_type": user["user_type"],
+        "email": user["email"],
+        "is_approved": user.get("is_approved", False),
+        "company_name": user.get("company_name")
+    }
+    principal_cache.put(token, principal, payload.get("exp", 0))
+    return principal
+
+EVALUATION_MODEL = "gpt-4.1"
+
+# Bump whenever the evaluation prompts change so results of the old prompts are not reused
+EVALUATION_PROMPT_VERSION = "1"
+
+def _evaluation_cache_key(proposal: Proposal, rfp: RFP) -> str:
+    """Hash of the RFP fields and proposal content an evaluation is made from"""
+    return evaluation_key(
+        {
+            "rfp": {
+                "title": rfp.title,
+                "budget": rfp.budget,
+                "description": rfp.description,
+                "scope_of_work": rfp.scope_of_work
+            },
+            "vendor_company": proposal.vendor_company,
+            "commercial_document": document_hash(proposal.commercial_document),
+            "technical_document": document_hash(proposal.technical_document)
+        },
+        EVALUATION_MODEL,
+        EVALUATION_PROMPT_VERSION
+    )
 
-async def evaluate_proposal_with_ai(proposal: Proposal, rfp: RFP) -> AIEvaluation:
+async def evaluate_proposal_with_ai(
+    proposal: Proposal, rfp: RFP, fallback_on_error: bool = True, force: bool = False
+) -> AIEvaluation:
+    """Evaluate a proposal, reusing the cached result for unchanged inputs unless force is set"""
+    cache_key = _evaluation_cache_key(proposal, rfp)
+    cached = await evaluation_cache.get(cache_key, force)
+    if cached:
+        return AIEvaluation(**cached)
+    
     if not openai_api_key:
         raise HTTPException(status_code=500, detail="OpenAI API key not configured")
     
     try:
         # Initialize LLM chat
-        chat = LlmChat(
-            api_key=openai_api_key,
-            session_id=f"eval_{proposal.id}",
-            system_message="""You are an expert procurement evaluator. Analyze proposals with the following criteria:
+        system_message = """You are an expert procurement evaluator. Analyze proposals with the following criteria:
             - Commercial Evaluation (70% weight): pricing competitiveness, payment terms, value for money
             - Technical Evaluation (30% weight): technical capability, approach, innovation
             
             Provide detailed scoring and recommendations."""
-        ).with_model("openai", "gpt-4.1")
+        chat = LlmChat(
+            api_key=openai_api_key,
+            session_id=f"eval_{proposal.id}",
+            system_message=system_message
+        ).with_model("openai", EVALUATION_MODEL)
 
         # Prepare evaluation prompt
         evaluation_prompt = f"""
@@ -225,8 +351,14 @@ async def evaluate_proposal_with_ai(proposal: Proposal, rfp: RFP) -> AIEvaluatio
         }}
         """
         
-        # Send to AI
-        response = await chat.send_message(UserMessage(text=evaluation_prompt))
+        # Send to AI through the gateway (concurrency limit, retries, usage accounting)
+        response = await llm_gateway.complete(
+            "evaluate_proposal",
+            EVALUATION_MODEL,
+            evaluation_prompt,
+            lambda: chat.send_message(UserMessage(text=evaluation_prompt)),
+            system_prompt=system_message
+        )
         
         # Parse JSON response
         try:
@@ -234,9 +366,20 @@ async def evaluate_proposal_with_ai(proposal: Proposal, rfp: RFP) -> AIEvaluatio
             json_match = re.search(r'\{.*\}', response, re.DOTALL)
             if json_match:
                 result = json.loads(json_match.group())
-                return AIEvaluation(**result)
+                evaluation = AIEvaluation(**result)
+                # Only real model output is cached, never the fallbacks below
+                try:
+                    await evaluation_cache.put(
+                        cache_key, evaluation.dict(), EVALUATION_MODEL, EVALUATION_PROMPT_VERSION
+                    )
+                except Exception as e:
+                    logger.warning(f"Could not cache the evaluation of proposal {proposal.id}: {e}")
+                return evaluation
             else:
+                if not fallback_on_error:
+                    raise ValueError("No JSON object in the evaluation response")
                 # Fallback evaluation
+                llm_usage.record_fallback("evaluate_proposal", "no_json_in_response")
                 return AIEvaluation(
                     commercial_score=75.0,
                     technical_score=70.0,
@@ -247,7 +390,10 @@ async def evaluate_proposal_with_ai(proposal: Proposal, rfp: RFP) -> AIEvaluatio
                     detailed_analysis="AI evaluation completed with standard scoring."
                 )
         except json.JSONDecodeError:
+            if not fallback_on_error:
+                raise
             # Fallback evaluation
+            llm_usage.record_fallback("evaluate_proposal", "invalid_json")
             return AIEvaluation(
                 commercial_score=75.0,
                 technical_score=70.0,
@@ -260,7 +406,12 @@ async def evaluate_proposal_with_ai(proposal: Proposal, rfp: RFP) -> AIEvaluatio
     
     except Exception as e:
         logging.error(f"AI evaluation error: {str(e)}")
+        if not fallback_on_error:
+            # The job queue retries instead and only its last attempt falls back;
+            # bulk evaluation reports the failure rather than storing a placeholder
+            raise
         # Fallback evaluation
+        llm_usage.record_fallback("evaluate_proposal", f"llm_error:{type(e).__name__}")
         return AIEvaluation(
             commercial_score=70.0,
             technical_score=65.0,
@@ -271,16 +422,27 @@ async def evaluate_proposal_with_ai(proposal: Proposal, rfp: RFP) -> AIEvaluatio
             detailed_analysis=f"AI evaluation encountered an error: {str(e)}. Manual review recommended."
         )
 
+async def ensure_indexes():
+    """Indexes behind the keyset-paginated list endpoints (filter key, then _id)"""
+    await db.users.create_index([("user_type", ASCENDING), ("_id", ASCENDING)], name="users_type_page")
+    await db.contracts.create_index([("vendor_id", ASCENDING), ("_id", ASCENDING)], name="contracts_vendor_page")
+    await db.contracts.create_index([("payment_status", ASCENDING), ("_id", ASCENDING)], name="contracts_payment_status_page")
+    await db.proposals.create_index([("rfp_id", ASCENDING), ("ai_score", DESCENDING)], name="proposals_rfp_score")
+    await contract_document_store.files.create_index(
+        [("metadata.contract_id", ASCENDING), ("metadata.document_id", ASCENDING)],
+        name="contract_documents_lookup", unique=True
+    )
+
 # Routes
 @api_router.post("/auth/signup")
-async def signup(user_data: UserSignup):
+async def signup(user_data: UserSignup, response: Response):
     # Check if user exists
     existing_user = await db.users.find_one({"email": user_data.email})
     if existing_user:
         raise HTTPException(status_code=400, detail="Email already registered")
     
     # Hash password
-    hashed_password = hash_password(user_data.password)
+    hashed_password = await hash_password(user_data.password, response)
     
     # Create user
     user = User(
@@ -314,9 +476,9 @@ async def signup(user_data: UserSignup):
     }
 
 @api_router.post("/auth/login")
-async def login(credentials: UserLogin):
+async def login(credentials: UserLogin, response: Response):
     user = await db.users.find_one({"email": credentials.email})
-    if not user or not verify_password(credentials.password, user['password_hash']):
+    if not user or not await verify_password(credentials.password, user['password_hash'], response):
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
     token = create_jwt_token(user['id'], user['user_type'])
@@ -334,16 +496,12 @@ async def login(credentials: UserLogin):
 
 @api_router.get("/auth/me")
 async def get_me(current_user: dict = Depends(get_current_user)):
-    user = await db.users.find_one({"id": current_user["user_id"]})
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
     return {
-        "id": user['id'],
-        "email": user['email'],
-        "user_type": user['user_type'],
-        "is_approved": user['is_approved'],
-        "company_name": user.get('company_name')
+        "id": current_user['user_id'],
+        "email": current_user['email'],
+        "user_type": current_user['user_type'],
+        "is_approved": current_user['is_approved'],
+        "company_name": current_user.get('company_name')
     }
 
 @api_router.post("/rfps", response_model=RFP)
@@ -362,16 +520,18 @@ async def create_rfp(rfp_data: RFPCreate, current_user: dict = Depends(get_curre
     await db.rfps.insert_one(rfp.dict())
     return rfp
 
-@api_router.get("/rfps", response_model=List[RFP])
+RFP_LIST_FIELDS = {"_id": 0, **{field: 1 for field in RFPSummary.model_fields}}
+
+@api_router.get("/rfps", response_model=List[RFPSummary])
 async def get_rfps(current_user: dict = Depends(get_current_user)):
     if current_user["user_type"] == "vendor":
         # Vendors see only active RFPs
-        rfps = await db.rfps.find({"status": "active"}).to_list(1000)
+        rfps = await db.rfps.find({"status": "active"}, RFP_LIST_FIELDS).to_list(1000)
     else:
         # Admins see all RFPs
-        rfps = await db.rfps.find().to_list(1000)
+        rfps = await db.rfps.find({}, RFP_LIST_FIELDS).to_list(1000)
     
-    return [RFP(**rfp) for rfp in rfps]
+    return [RFPSummary(**rfp) for rfp in rfps]
 
 @api_router.get("/rfps/{rfp_id}", response_model=RFP)
 async def get_rfp(rfp_id: str, current_user: dict = Depends(get_current_user)):
@@ -391,9 +551,7 @@ async def submit_proposal(
     if current_user["user_type"] != "vendor":
         raise HTTPException(status_code=403, detail="Only vendors can submit proposals")
     
-    # Get user info
-    user = await db.users.find_one({"id": current_user["user_id"]})
-    if not user or not user.get('is_approved'):
+    if not current_user["is_approved"]:
         raise HTTPException(status_code=403, detail="Vendor not approved")
     
     # Check if RFP exists
@@ -401,41 +559,56 @@ async def submit_proposal(
     if not rfp:
         raise HTTPException(status_code=404, detail="RFP not found")
     
-    # Process file uploads
-    technical_doc = None
-    commercial_doc = None
-    
-    if technical_file:
-        content = await technical_file.read()
-        technical_doc = base64.b64encode(content).decode('utf-8')
-    
-    if commercial_file:
-        content = await commercial_file.read()
-        commercial_doc = base64.b64encode(content).decode('utf-8')
-    
-    # Create proposal
+    # Stream file uploads into the document store; the proposal keeps references
     proposal = Proposal(
         rfp_id=rfp_id,
         vendor_id=current_user["user_id"],
-        vendor_company=user.get('company_name', 'Unknown Company'),
-        technical_document=technical_doc,
-        commercial_document=commercial_doc
+        vendor_company=current_user.get('company_name') or 'Unknown Company'
     )
-    
-    await db.proposals.insert_one(proposal.dict())
+    stored = []
+    try:
+        for kind, upload in (("technical", technical_file), ("commercial", commercial_file)):
+            if upload:
+                reference = await document_store.save(
+                    upload, {"proposal_id": proposal.id, "rfp_id": rfp_id, "kind": kind}
+                )
+                stored.append(reference)
+                setattr(proposal, f"{kind}_document", reference)
+        
+        await db.proposals.insert_one(proposal.dict())
+    except BaseException as e:
+        # Do not leave documents behind that no proposal points to
+        for reference in stored:
+            await document_store.delete(reference["document_id"])
+        if isinstance(e, DocumentTooLarge):
+            raise HTTPException(status_code=413, detail=str(e))
+        raise
     
     return {"message": "Proposal submitted successfully", "proposal_id": proposal.id}
 
-@api_router.get("/proposals")
+def _is_uploaded(field: str) -> dict:
+    """Projection expression that is true when a document field holds a non-empty value"""
+    return {"$ne": [{"$ifNull": ["$" + field, ""]}, ""]}
+
+# The base64 documents stay in the database; the list only says whether each one exists
+PROPOSAL_LIST_FIELDS = {
+    "_id": 0,
+    **{field: 1 for field in ProposalSummary.model_fields if not field.startswith("has_")},
+    "has_technical_document": _is_uploaded("technical_document"),
+    "has_commercial_document": _is_uploaded("commercial_document")
+}
+
+@api_router.get("/proposals", response_model=List[ProposalSummary])
 async def get_proposals(current_user: dict = Depends(get_current_user)):
+    """Proposals without their documents; /proposals/{proposal_id} returns a proposal in full"""
     if current_user["user_type"] == "vendor":
         # Vendors see only their proposals
-        proposals = await db.proposals.find({"vendor_id": current_user["user_id"]}).to_list(1000)
+        proposals = await db.proposals.find({"vendor_id": current_user["user_id"]}, PROPOSAL_LIST_FIELDS).to_list(1000)
     else:
         # Admins see all proposals
-        proposals = await db.proposals.find().to_list(1000)
+        proposals = await db.proposals.find({}, PROPOSAL_LIST_FIELDS).to_list(1000)
     
-    return [Proposal(**proposal) for proposal in proposals]
+    return [ProposalSummary(**proposal) for proposal in proposals]
 
 @api_router.get("/proposals/{proposal_id}")
 async def get_proposal(proposal_id: str, current_user: dict = Depends(get_current_user)):
@@ -450,26 +623,88 @@ async def get_proposal(proposal_id: str, current_user: dict = Depends(get_curren
     
     return Proposal(**proposal)
 
-@api_router.post("/proposals/{proposal_id}/evaluate")
-async def evaluate_proposal(proposal_id: str, current_user: dict = Depends(get_current_user)):
-    if current_user["user_type"] != "admin":
-        raise HTTPException(status_code=403, detail="Only admin users can evaluate proposals")
+async def _document_response(reference: Union[Dict, str], range_header: Optional[str]) -> Response:
+    """Stream a stored document, or the byte range a Range header asks for"""
+    if isinstance(reference, str):
+        # Inline base64 from before the document store, not migrated yet
+        return Response(content=base64.b64decode(reference), media_type="application/octet-stream")
     
-    proposal = await db.proposals.find_one({"id": proposal_id})
+    try:
+        grid_out = await document_store.open(reference["document_id"])
+    except DocumentNotFound:
+        raise HTTPException(status_code=404, detail="Document not found")
+    
+    size = grid_out.length
+    headers = {
+        "Accept-Ranges": "bytes",
+        "Content-Disposition": f"attachment; filename*=UTF-8''{quote(reference['filename'])}"
+    }
+    if reference.get("sha256"):
+        headers["ETag"] = f'"{reference["sha256"]}"'
+    try:
+        span = parse_range(range_header, size)
+    except RangeNotSatisfiable as e:
+        raise HTTPException(status_code=416, detail="Requested range not satisfiable", headers={"Content-Range": str(e)})
+    
+    start, end = span or (0, size - 1)
+    headers["Content-Length"] = str(end - start + 1)
+    if span:
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    return StreamingResponse(
+        document_store.iter_range(grid_out, start, end),
+        status_code=206 if span else 200,
+        media_type=reference.get("content_type", "application/octet-stream"),
+        headers=headers
+    )
+
+@api_router.get("/proposals/{proposal_id}/documents/{kind}")
+async def download_proposal_document(
+    proposal_id: str,
+    kind: str,
+    range_header: Optional[str] = Header(None, alias="Range"),
+    current_user: dict = Depends(get_current_user)
+):
+    """Download the technical or commercial document of a proposal; supports single byte ranges"""
+    if kind not in ("technical", "commercial"):
+        raise HTTPException(status_code=404, detail="Unknown document kind")
+    
+    proposal = await db.proposals.find_one(
+        {"id": proposal_id}, {"_id": 0, "vendor_id": 1, f"{kind}_document": 1}
+    )
     if not proposal:
         raise HTTPException(status_code=404, detail="Proposal not found")
     
+    # Check access rights
+    if (current_user["user_type"] == "vendor" and 
+        proposal["vendor_id"] != current_user["user_id"]):
+        raise HTTPException(status_code=403, detail="Access denied")
+    
+    reference = proposal.get(f"{kind}_document")
+    if not reference:
+        raise HTTPException(status_code=404, detail="Document not uploaded")
+    return await _document_response(reference, range_header)
+
+async def run_evaluation_job(job: dict, report) -> dict:
+    """Evaluate one proposal with AI and store the result on it"""
+    proposal_id = job["payload"]["proposal_id"]
+    force = job["payload"].get("force", False)
+    await report("loading", 10.0)
+    proposal = await db.proposals.find_one({"id": proposal_id})
+    if not proposal:
+        raise PermanentJobError("Proposal not found")
+    
     rfp = await db.rfps.find_one({"id": proposal["rfp_id"]})
     if not rfp:
-        raise HTTPException(status_code=404, detail="Associated RFP not found")
+        raise PermanentJobError("Associated RFP not found")
     
     # Perform AI evaluation
-    proposal_obj = Proposal(**proposal)
-    rfp_obj = RFP(**rfp)
-    
-    evaluation = await evaluate_proposal_with_ai(proposal_obj, rfp_obj)
+    await report("evaluating", 30.0)
+    evaluation = await evaluate_proposal_with_ai(
+        Proposal(**proposal), RFP(**rfp), fallback_on_error=job["attempts"] >= job["max_attempts"], force=force
+    )
     
     # Update proposal with evaluation
+    await report("saving", 90.0)
     await db.proposals.update_one(
         {"id": proposal_id},
         {
@@ -481,11 +716,186 @@ async def evaluate_proposal(proposal_id: str, current_user: dict = Depends(get_c
         }
     )
     
+    return {"evaluation": evaluation.dict()}
+
+@api_router.post("/proposals/{proposal_id}/evaluate", status_code=202)
+async def evaluate_proposal(proposal_id: str, force: bool = False, current_user: dict = Depends(get_current_user)):
+    """Queue an AI evaluation and return its job at once; poll /evaluation-jobs/{job_id} for the result.
+    
+    Unchanged proposals get their cached evaluation; force=true asks the LLM again.
+    """
+    if current_user["user_type"] != "admin":
+        raise HTTPException(status_code=403, detail="Only admin users can evaluate proposals")
+    
+    proposal = await db.proposals.find_one({"id": proposal_id}, {"_id": 0, "rfp_id": 1})
+    if not proposal:
+        raise HTTPException(status_code=404, detail="Proposal not found")
+    
+    job = await evaluation_jobs.enqueue(
+        proposal_id, {"proposal_id": proposal_id, "rfp_id": proposal["rfp_id"], "force": force}, current_user["user_id"]
+    )
+    
     return {
-        "message": "Proposal evaluated successfully",
-        "evaluation": evaluation.dict()
+        "message": "Proposal evaluation queued",
+        "job_id": job["id"],
+        "status": job["status"]
     }
 
+@api_router.get("/evaluation-jobs/{job_id}")
+async def get_evaluation_job(job_id: str, current_user: dict = Depends(get_current_user)):
+    """Status, stage, progress, attempts and (once completed) the evaluation of a job"""
+    if current_user["user_type"] != "admin":
+        raise HTTPException(status_code=403, detail="Only admin users can view evaluation jobs")
+    
+    job = await evaluation_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@api_router.get("/evaluation-jobs")
+async def get_evaluation_jobs(
+    status: Optional[str] = None,
+    rfp_id: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
+    current_user: dict = Depends(get_current_user)
+):
+    """Most recent evaluation jobs, optionally filtered by status or RFP"""
+    if current_user["user_type"] != "admin":
+        raise HTTPException(status_code=403, detail="Only admin users can view evaluation jobs")
+    
+    query = {}
+    if status:
+        query["status"] = status
+    if rfp_id:
+        query["payload.rfp_id"] = rfp_id
+    return await evaluation_jobs.recent(query, limit)
+
+# Proposals of one bulk run evaluated at once (the LLM gateway limits calls across all requests too)
+BULK_EVALUATION_CONCURRENCY = int(os.environ.get('BULK_EVALUATION_CONCURRENCY', '4'))
+
+RANKING_FIELDS = {"_id": 0, "id": 1, "vendor_company": 1, "status": 1, "ai_score": 1, "ai_evaluation.recommendation": 1}
+
+async def _rfp_ranking(rfp_id: str) -> List[dict]:
+    """Proposals of an RFP by descending AI score; unevaluated ones last"""
+    proposals = await db.proposals.find({"rfp_id": rfp_id}, RANKING_FIELDS).sort("ai_score", DESCENDING).to_list(None)
+    return [
+        {
+            "rank": rank,
+            "proposal_id": proposal["id"],
+            "vendor_company": proposal["vendor_company"],
+            "status": proposal["status"],
+            "ai_score": proposal.get("ai_score"),
+            "recommendation": (proposal.get("ai_evaluation") or {}).get("recommendation")
+        }
+        for rank, proposal in enumerate(proposals, start=1)
+    ]
+
+@api_router.post("/rfps/{rfp_id}/evaluate-all")
+async def evaluate_all_proposals(
+    rfp_id: str,
+    skip_evaluated: bool = False,
+    force: bool = False,
+    current_user: dict = Depends(get_current_user)
+):
+    """Evaluate every proposal of an RFP, streaming NDJSON progress and ending with the ranking.
+    
+    The RFP is loaded once and proposals are read from a cursor, up to
+    BULK_EVALUATION_CONCURRENCY at a time. Scores are written back with one
+    bulk_write at the end, or when the client goes away mid-run. Proposals
+    whose content is unchanged reuse their cached evaluation unless force is set.
+    A failed evaluation is reported as an error event and leaves the proposal as it was.
+    """
+    if current_user["user_type"] != "admin":
+        raise HTTPException(status_code=403, detail="Only admin users can evaluate proposals")
+    
+    rfp = await db.rfps.find_one({"id": rfp_id}, {"_id": 0})
+    if not rfp:
+        raise HTTPException(status_code=404, detail="RFP not found")
+    rfp_obj = RFP(**rfp)
+    
+    query = {"rfp_id": rfp_id}
+    if skip_evaluated:
+        query["ai_score"] = None
+    total = await db.proposals.count_documents(query)
+    
+    async def events():
+        limiter = asyncio.Semaphore(BULK_EVALUATION_CONCURRENCY)
+        results: asyncio.Queue = asyncio.Queue()
+        tasks: List[asyncio.Task] = []
+        updates: List[UpdateOne] = []
+        
+        async def evaluate(proposal: dict):
+            try:
+                evaluation = await evaluate_proposal_with_ai(
+                    Proposal(**proposal), rfp_obj, fallback_on_error=False, force=force
+                )
+                await results.put((proposal, evaluation, None))
+            except Exception as e:
+                await results.put((proposal, None, e))
+            finally:
+                limiter.release()
+        
+        async def feed():
+            try:
+                async for proposal in db.proposals.find(query, {"_id": 0}):
+                    await limiter.acquire()
+                    tasks.append(asyncio.create_task(evaluate(proposal)))
+                await asyncio.gather(*tasks)
+            finally:
+                # Always end the stream, even when reading the cursor fails
+                results.put_nowait(None)
+        
+        feeder = asyncio.create_task(feed())
+        try:
+            yield json.dumps({"event": "started", "rfp_id": rfp_id, "total": total}) + "\n"
+            done = 0
+            while True:
+                item = await results.get()
+                if item is None:
+                    break
+                proposal, evaluation, error = item
+                done += 1
+                event = {
+                    "event": "progress",
+                    "completed": done,
+                    "total": total,
+                    "proposal_id": proposal["id"],
+                    "vendor_company": proposal["vendor_company"]
+                }
+                if error is None:
+                    updates.append(UpdateOne({"id": proposal["id"]}, {"$set": {
+                        "status": "evaluated",
+                        "ai_score": evaluation.overall_score,
+                        "ai_evaluation": evaluation.dict()
+                    }}))
+                    event["ai_score"] = evaluation.overall_score
+                else:
+                    logger.error(f"Bulk evaluation of proposal {proposal['id']} failed: {error}")
+                    event["error"] = str(error)
+                yield json.dumps(event) + "\n"
+            await feeder
+            
+            if updates:
+                await db.proposals.bulk_write(updates, ordered=False)
+                updates = []
+            yield json.dumps({"event": "ranking", "rfp_id": rfp_id, "evaluated": done, "ranking": await _rfp_ranking(rfp_id)}) + "\n"
+        finally:
+            feeder.cancel()
+            for task in tasks:
+                task.cancel()
+            if updates:
+                # Keep the scores already paid for when the client disconnects mid-run
+                await asyncio.shield(db.proposals.bulk_write(updates, ordered=False))
+    
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+@api_router.get("/rfps/{rfp_id}/ranking")
+async def get_rfp_ranking(rfp_id: str, current_user: dict = Depends(get_current_user)):
+    """Ranked comparison of the AI scores of an RFP's proposals"""
+    if current_user["user_type"] != "admin":
+        raise HTTPException(status_code=403, detail="Only admin users can compare proposals")
+    return {"rfp_id": rfp_id, "ranking": await _rfp_ranking(rfp_id)}
+
 @api_router.get("/dashboard/stats")
 async def get_dashboard_stats(current_user: dict = Depends(get_current_user)):
     if current_user["user_type"] == "vendor":
@@ -518,25 +928,40 @@ async def get_dashboard_stats(current_user: dict = Depends(get_current_user)):
         }
 
 # Contract endpoints
+def _without_object_id(document: dict) -> dict:
+    document.pop("_id", None)
+    return document
+
 @api_router.get("/contracts")
-async def get_contracts(current_user: dict = Depends(get_current_user)):
-    """Get contracts for the current user (vendor gets their contracts, admin gets all)"""
+async def get_contracts(
+    current_user: dict = Depends(get_current_user),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    stream: bool = False
+):
+    """Get contracts for the current user (vendor gets their contracts, admin gets all).
+    
+    Returns one keyset page of limit contracts and the next_cursor of the
+    following page. With stream=true every contract after the cursor is
+    written as NDJSON without loading the collection.
+    """
     try:
         if current_user["user_type"] == "vendor":
             # Vendor sees only their contracts
-            contracts = await db.contracts.find({"vendor_id": current_user["user_id"]}).to_list(None)
+            query = {"vendor_id": current_user["user_id"]}
         else:
             # Admin sees all contracts
-            contracts = await db.contracts.find().to_list(None)
+            query = {}
+        
+        if stream:
+            lines = stream_ndjson(db.contracts, query, _without_object_id, cursor)
+            return StreamingResponse(lines, media_type="application/x-ndjson")
         
-        # Convert ObjectId to string and clean up the data
-        cleaned_contracts = []
-        for contract in contracts:
-            if "_id" in contract:
-                del contract["_id"]  # Remove MongoDB ObjectId
-            cleaned_contracts.append(contract)
+        contracts, next_cursor = await fetch_page(db.contracts, query, limit, cursor)
         
-        return {"contracts": cleaned_contracts}
+        return {"contracts": [_without_object_id(contract) for contract in contracts], "next_cursor": next_cursor}
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error fetching contracts: {e}")
         raise HTTPException(status_code=500, detail="Error fetching contracts")
@@ -617,25 +1042,49 @@ async def update_contract(contract_id: str, update_data: dict, current_user: dic
         logger.error(f"Error updating contract: {e}")
         raise HTTPException(status_code=500, detail="Error updating contract")
 
+def _format_size(size: int) -> str:
+    """Human-readable size, as shown in contract document lists"""
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+async def _contract_access(contract_id: str, current_user: dict):
+    """404 for a missing contract, 403 for another vendor's contract"""
+    contract = await db.contracts.find_one({"id": contract_id}, {"_id": 0, "vendor_id": 1})
+    if not contract:
+        raise HTTPException(status_code=404, detail="Contract not found")
+    
+    if current_user["user_type"] == "vendor" and contract["vendor_id"] != current_user["user_id"]:
+        raise HTTPException(status_code=403, detail="Access denied")
+
 @api_router.post("/contracts/{contract_id}/documents")
-async def upload_contract_document(contract_id: str, document_data: dict, current_user: dict = Depends(get_current_user)):
-    """Upload a document to a contract"""
+async def upload_contract_document(
+    contract_id: str,
+    file: UploadFile = File(...),
+    name: Optional[str] = Form(None),
+    current_user: dict = Depends(get_current_user)
+):
+    """Upload a document to a contract.
+    
+    The file is streamed into the contract document store; the contract
+    only lists its name, type and size.
+    """
     try:
-        # Check if contract exists and user has access
-        contract = await db.contracts.find_one({"id": contract_id})
-        if not contract:
-            raise HTTPException(status_code=404, detail="Contract not found")
+        await _contract_access(contract_id, current_user)
         
-        if current_user["user_type"] == "vendor" and contract["vendor_id"] != current_user["user_id"]:
-            raise HTTPException(status_code=403, detail="Access denied")
+        document_id = str(uuid.uuid4())
+        reference = await contract_document_store.save(
+            file, {"contract_id": contract_id, "document_id": document_id, "uploaded_by": current_user["user_id"]}
+        )
         
         # Add document to contract
         document = {
-            "id": str(uuid.uuid4()),
-            "name": document_data["name"],
-            "type": document_data["type"],
-            "size": document_data["size"],
-            "content": document_data.get("content", ""),
+            "id": document_id,
+            "name": name or reference["filename"],
+            "type": Path(reference["filename"]).suffix.lstrip(".").lower() or reference["content_type"],
+            "size": _format_size(reference["size"]),
             "uploaded_at": datetime.utcnow(),
             "uploaded_by": current_user["user_id"]
         }
@@ -648,33 +1097,31 @@ async def upload_contract_document(contract_id: str, document_data: dict, curren
         return {"message": "Document uploaded successfully", "document_id": document["id"]}
     except HTTPException:
         raise
+    except DocumentTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
         logger.error(f"Error uploading document: {e}")
         raise HTTPException(status_code=500, detail="Error uploading document")
 
 @api_router.get("/contracts/{contract_id}/documents/{document_id}")
-async def download_contract_document(contract_id: str, document_id: str, current_user: dict = Depends(get_current_user)):
-    """Download a contract document"""
+async def download_contract_document(
+    contract_id: str,
+    document_id: str,
+    range_header: Optional[str] = Header(None, alias="Range"),
+    current_user: dict = Depends(get_current_user)
+):
+    """Download a contract document, streamed in chunks; supports single byte ranges"""
     try:
-        # Check if contract exists and user has access
-        contract = await db.contracts.find_one({"id": contract_id})
-        if not contract:
-            raise HTTPException(status_code=404, detail="Contract not found")
-        
-        if current_user["user_type"] == "vendor" and contract["vendor_id"] != current_user["user_id"]:
-            raise HTTPException(status_code=403, detail="Access denied")
+        await _contract_access(contract_id, current_user)
         
-        # Find document
-        document = None
-        for doc in contract.get("documents", []):
-            if doc["id"] == document_id:
-                document = doc
-                break
-        
-        if not document:
+        # Indexed lookup by (contract_id, document_id)
+        reference = await contract_document_store.find(
+            {"metadata.contract_id": contract_id, "metadata.document_id": document_id}
+        )
+        if not reference:
             raise HTTPException(status_code=404, detail="Document not found")
         
-        return document
+        return await _document_response(reference, range_header)
     except HTTPException:
         raise
     except Exception as e:
@@ -696,7 +1143,7 @@ async def create_demo_data():
                 user_type="vendor",
                 company_name="TechCorp Solutions",
                 username="vendor001",
-                password_hash=hash_password("DemoVendor123!"),
+                password_hash=await hash_password("DemoVendor123!"),
                 is_approved=True  # Auto-approve for demo
             )
             await db.users.insert_one(demo_vendor.dict())
@@ -804,8 +1251,15 @@ async def create_demo_data():
             }
         ]
         
-        # Insert demo contracts
+        # Insert demo contracts, with a placeholder file behind each listed document
         await db.contracts.insert_many(demo_contracts)
+        for contract in demo_contracts:
+            for document in contract["documents"]:
+                await contract_document_store.save_bytes(
+                    f"{document['name']} - {contract['rfp_title']} (demo document)".encode("utf-8"),
+                    f"{document['name']}.{document['type']}", "text/plain",
+                    {"contract_id": contract["id"], "document_id": document["id"]}
+                )
         logger.info("Demo contracts created successfully")
         
     except Exception as e:
@@ -817,26 +1271,49 @@ async def create_demo_contracts():
     await create_demo_data()
 
 # Admin-specific endpoints for vendor management
+VENDOR_LIST_FIELDS = {"id": 1, "email": 1, "company_name": 1, "username": 1, "is_approved": 1, "created_at": 1, "profile_data": 1}
+
+def _vendor_row(vendor: dict) -> dict:
+    return {
+        "id": vendor["id"],
+        "email": vendor["email"],
+        "company_name": vendor.get("company_name", ""),
+        "username": vendor.get("username", ""),
+        "is_approved": vendor.get("is_approved", False),
+        "created_at": vendor.get("created_at"),
+        "cr_number": (vendor.get("profile_data") or {}).get("cr_number", ""),
+        "country": (vendor.get("profile_data") or {}).get("country", "")
+    }
+
 @api_router.get("/admin/vendors")
-async def get_vendors(current_user: dict = Depends(get_current_user)):
-    """Get all vendors for admin management"""
+async def get_vendors(
+    response: Response,
+    current_user: dict = Depends(get_current_user),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    stream: bool = False
+):
+    """Vendors for admin management, one keyset page of limit vendors at a time.
+    
+    The cursor of the next page is returned in the X-Next-Cursor header. With
+    stream=true every vendor after the cursor is written as NDJSON.
+    """
     if current_user["user_type"] != "admin":
         raise HTTPException(status_code=403, detail="Only admin users can access vendor management")
     
-    vendors = await db.users.find({"user_type": "vendor"}).to_list(None)
-    return [
-        {
-            "id": vendor["id"],
-            "email": vendor["email"],
-            "company_name": vendor.get("company_name", ""),
-            "username": vendor.get("username", ""),
-            "is_approved": vendor.get("is_approved", False),
-            "created_at": vendor.get("created_at"),
-            "cr_number": (vendor.get("profile_data") or {}).get("cr_number", ""),
-            "country": (vendor.get("profile_data") or {}).get("country", "")
-        }
-        for vendor in vendors
-    ]
+    query = {"user_type": "vendor"}
+    try:
+        if stream:
+            lines = stream_ndjson(db.users, query, _vendor_row, cursor, VENDOR_LIST_FIELDS)
+            return StreamingResponse(lines, media_type="application/x-ndjson")
+        
+        vendors, next_cursor = await fetch_page(db.users, query, limit, cursor, VENDOR_LIST_FIELDS)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return [_vendor_row(vendor) for vendor in vendors]
 
 @api_router.put("/admin/vendors/{vendor_id}/approve")
 async def approve_vendor(vendor_id: str, current_user: dict = Depends(get_current_user)):
@@ -852,6 +1329,7 @@ async def approve_vendor(vendor_id: str, current_user: dict = Depends(get_curren
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Vendor not found")
     
+    principal_cache.invalidate_user(vendor_id)
     return {"message": "Vendor approved successfully"}
 
 @api_router.put("/admin/vendors/{vendor_id}/reject")
@@ -868,6 +1346,7 @@ async def reject_vendor(vendor_id: str, current_user: dict = Depends(get_current
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Vendor not found")
     
+    principal_cache.invalidate_user(vendor_id)
     return {"message": "Vendor rejected successfully"}
 
 @api_router.put("/rfps/{rfp_id}/status")
@@ -890,35 +1369,132 @@ async def update_rfp_status(rfp_id: str, status: str, current_user: dict = Depen
     
     return {"message": f"RFP status updated to {status}"}
 
+INVOICE_CONTRACT_FIELDS = {
+    "id": 1, "rfp_title": 1, "vendor_company": 1, "paid_amount": 1,
+    "payment_status": 1, "end_date": 1, "created_at": 1
+}
+
+def _invoice_row(contract: dict) -> dict:
+    return {
+        "id": f"INV-{contract['id']}",
+        "contract_id": contract["id"],
+        "contract_title": contract["rfp_title"],
+        "vendor_company": contract["vendor_company"],
+        "amount": contract["paid_amount"],
+        "status": "paid" if contract["payment_status"] == "fully_paid" else "partial",
+        "due_date": contract.get("end_date"),
+        "created_at": contract.get("created_at")
+    }
+
 @api_router.get("/admin/invoices")
-async def get_all_invoices(current_user: dict = Depends(get_current_user)):
-    """Get all invoices for admin tracking"""
+async def get_all_invoices(
+    response: Response,
+    current_user: dict = Depends(get_current_user),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    stream: bool = False
+):
+    """Invoices for admin tracking, one keyset page of limit invoices at a time.
+    
+    The cursor of the next page is returned in the X-Next-Cursor header. With
+    stream=true every invoice after the cursor is written as NDJSON.
+    """
     if current_user["user_type"] != "admin":
         raise HTTPException(status_code=403, detail="Only admin users can view all invoices")
     
-    # For demo purposes, return invoice data from contracts
-    contracts = await db.contracts.find().to_list(None)
-    
-    invoices = []
-    for contract in contracts:
-        if contract.get("payment_status") in ["partial_paid", "fully_paid"]:
-            invoices.append({
-                "id": f"INV-{contract['id']}",
-                "contract_id": contract["id"],
-                "contract_title": contract["rfp_title"],
-                "vendor_company": contract["vendor_company"],
-                "amount": contract["paid_amount"],
-                "status": "paid" if contract["payment_status"] == "fully_paid" else "partial",
-                "due_date": contract.get("end_date"),
-                "created_at": contract.get("created_at")
-            })
-    
-    return invoices
+    # For demo purposes, return invoice data from paid contracts
+    query = {"payment_status": {"$in": ["partial_paid", "fully_paid"]}}
+    try:
+        if stream:
+            lines = stream_ndjson(db.contracts, query, _invoice_row, cursor, INVOICE_CONTRACT_FIELDS)
+            return StreamingResponse(lines, media_type="application/x-ndjson")
+        
+        contracts, next_cursor = await fetch_page(db.contracts, query, limit, cursor, INVOICE_CONTRACT_FIELDS)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return [_invoice_row(contract) for contract in contracts]
+
+@api_router.get("/admin/llm-usage")
+async def get_llm_usage(recent: int = 20, current_user: dict = Depends(get_current_user)):
+    """Tokens, estimated cost, latency, retries and fallbacks per LLM call site"""
+    if current_user["user_type"] != "admin":
+        raise HTTPException(status_code=403, detail="Only admin users can access LLM usage")
+    return llm_usage.summary(min(max(recent, 0), 200))
+
+@api_router.get("/admin/password-hashing")
+async def get_password_hashing(current_user: dict = Depends(get_current_user)):
+    """Password hasher pool size, saturation and hash/queue latency"""
+    if current_user["user_type"] != "admin":
+        raise HTTPException(status_code=403, detail="Only admin users can access password hashing stats")
+    return password_hasher.summary()
+
+@api_router.get("/metrics")
+async def get_metrics():
+    """Prometheus scrape endpoint"""
+    return Response(content=render_prometheus(), media_type=METRICS_CONTENT_TYPE)
+
+async def migrate_inline_proposal_documents():
+    """Move base64 documents stored inside proposals into the document store, one proposal at a time"""
+    query = {"$or": [
+        {"technical_document": {"$type": "string"}},
+        {"commercial_document": {"$type": "string"}}
+    ]}
+    moved = 0
+    try:
+        async for proposal in db.proposals.find(query, {"_id": 0, "id": 1, "rfp_id": 1, "technical_document": 1, "commercial_document": 1}):
+            update = {}
+            for kind in ("technical", "commercial"):
+                inline = proposal.get(f"{kind}_document")
+                if isinstance(inline, str) and inline:
+                    update[f"{kind}_document"] = await document_store.save_bytes(
+                        base64.b64decode(inline), f"{kind}_document",
+                        metadata={"proposal_id": proposal["id"], "rfp_id": proposal["rfp_id"], "kind": kind}
+                    )
+            if update:
+                await db.proposals.update_one({"id": proposal["id"]}, {"$set": update})
+                moved += 1
+    except Exception as e:
+        logger.error(f"Moving inline proposal documents failed after {moved} proposals: {e}")
+        return
+    if moved:
+        logger.info(f"Moved the documents of {moved} proposals into the document store")
+
+async def migrate_inline_contract_documents():
+    """Move document content stored inside contracts into the contract document store"""
+    moved = 0
+    try:
+        async for contract in db.contracts.find({"documents.content": {"$exists": True}}, {"_id": 0, "id": 1, "documents": 1}):
+            documents = []
+            for document in contract["documents"]:
+                content = document.pop("content", None)
+                lookup = {"metadata.contract_id": contract["id"], "metadata.document_id": document["id"]}
+                if content and not await contract_document_store.find(lookup):
+                    await contract_document_store.save_bytes(
+                        content.encode("utf-8"), document.get("name") or "document",
+                        metadata={"contract_id": contract["id"], "document_id": document["id"]}
+                    )
+                documents.append(document)
+            await db.contracts.update_one({"id": contract["id"]}, {"$set": {"documents": documents}})
+            moved += 1
+    except Exception as e:
+        logger.error(f"Moving inline contract documents failed after {moved} contracts: {e}")
+        return
+    if moved:
+        logger.info(f"Moved the documents of {moved} contracts into the contract document store")
 
 @app.on_event("startup")
 async def startup_event():
-    """Initialize demo data on startup"""
+    """Create indexes and initialize demo data on startup"""
+    await ensure_indexes()
+    await evaluation_jobs.ensure_indexes()
+    await evaluation_cache.ensure_indexes()
     await create_demo_data()
+    evaluation_jobs.start(run_evaluation_job)
+    asyncio.create_task(migrate_inline_proposal_documents())
+    asyncio.create_task(migrate_inline_contract_documents())
 
 # Include the router in the main app
 app.include_router(api_router)
@@ -929,8 +1505,10 @@ app.add_middleware(
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Content-Range", "Content-Disposition", "ETag", "Server-Timing"],
 )
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    await evaluation_jobs.stop()
     client.close()
\ No newline at end of file
@@ -7,6 +7,7 @@ proposal submission, and AI-powered evaluation system.
 
 import requests
 import json
+import time
 import base64
 import io
 from datetime import datetime, timedelta
@@ -459,8 +460,15 @@ class ProcurementPortalTester:
         try:
             response = requests.post(f"{API_URL}/proposals/{self.proposal_id}/evaluate", 
                                    headers=admin_headers)
-            if response.status_code == 200:
-                data = response.json()
+            if response.status_code == 202:
+                # Evaluations run as background jobs; poll until this one finishes
+                job_id = response.json()["job_id"]
+                for _ in range(90):
+                    response = requests.get(f"{API_URL}/evaluation-jobs/{job_id}", headers=admin_headers)
+                    if response.json().get("status") in ("completed", "failed"):
+                        break
+                    time.sleep(2)
+                data = response.json().get("result") or {}
                 evaluation = data.get("evaluation", {})
                 
                 # Check if evaluation contains required fields
@@ -692,13 +700,13 @@ class ProcurementPortalTester:
                             doc_response = requests.get(f"{API_URL}/contracts/{test_contract_id}/documents/{doc_id}", 
                                                       headers=headers)
                             if doc_response.status_code == 200:
-                                doc_data = doc_response.json()
-                                if doc_data.get("id") == doc_id:
+                                # Files are streamed with their size and content hash in the headers
+                                if "Content-Length" in doc_response.headers and "ETag" in doc_response.headers:
                                     self.log_result("contracts", "Document Download", True, 
-                                                  f"Document {doc_data.get('name')} downloaded successfully")
+                                                  f"Document {doc_id} downloaded ({doc_response.headers.get('Content-Length')} bytes)")
                                 else:
                                     self.log_result("contracts", "Document Download", False, 
-                                                  "Wrong document returned")
+                                                  "Missing Content-Length or ETag header")
                             else:
                                 self.log_result("contracts", "Document Download", False, 
                                               f"Status: {doc_response.status_code}")
@@ -322,13 +322,13 @@ class ContractsManagementTester:
                             doc_response = requests.get(f"{API_URL}/contracts/{test_contract_id}/documents/{doc_id}", 
                                                       headers=headers)
                             if doc_response.status_code == 200:
-                                doc_data = doc_response.json()
-                                if doc_data.get("id") == doc_id:
+                                # Files are streamed with their size and content hash in the headers
+                                if "Content-Length" in doc_response.headers and "ETag" in doc_response.headers:
                                     self.log_result("Document Download Endpoint", True, 
-                                                  f"Document '{doc_data.get('name')}' downloaded successfully")
+                                                  f"Document {doc_id} downloaded ({doc_response.headers.get('Content-Length')} bytes)")
                                 else:
                                     self.log_result("Document Download Endpoint", False, 
-                                                  "Wrong document returned")
+                                                  "Missing Content-Length or ETag header")
                             else:
                                 self.log_result("Document Download Endpoint", False, 
                                               f"Status: {doc_response.status_code}")
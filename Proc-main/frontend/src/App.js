@@ -2612,6 +2612,8 @@ const ProposalManagement = () => {
               vendor_company: user.company_name,
               technical_document: 'TechProposal_CloudInfra_v1.pdf',
               commercial_document: 'CommercialProposal_CloudInfra_v1.xlsx',
+              has_technical_document: true,
+              has_commercial_document: true,
               submitted_at: new Date(Date.now() - 5 * 24 * 60 * 60 * 1000).toISOString(),
               status: 'awarded',
               ai_score: 87.5,
@@ -2634,6 +2636,8 @@ const ProposalManagement = () => {
               vendor_company: user.company_name,
               technical_document: 'TechProposal_AI_Analytics_v1.pdf',
               commercial_document: 'CommercialProposal_AI_Analytics_v1.xlsx',
+              has_technical_document: true,
+              has_commercial_document: true,
               submitted_at: new Date(Date.now() - 2 * 24 * 60 * 60 * 1000).toISOString(),
               status: 'under_review',
               ai_score: null,
@@ -2650,6 +2654,8 @@ const ProposalManagement = () => {
               vendor_company: user.company_name,
               technical_document: 'TechProposal_Security_v1.pdf',
               commercial_document: 'CommercialProposal_Security_v1.xlsx',
+              has_technical_document: true,
+              has_commercial_document: true,
               submitted_at: new Date(Date.now() - 7 * 24 * 60 * 60 * 1000).toISOString(),
               status: 'rejected',
               ai_score: 65.2,
@@ -2672,6 +2678,8 @@ const ProposalManagement = () => {
               vendor_company: user.company_name,
               technical_document: 'TechProposal_DigitalTransform_v1.pdf',
               commercial_document: 'CommercialProposal_DigitalTransform_v1.xlsx',
+              has_technical_document: true,
+              has_commercial_document: true,
               submitted_at: new Date(Date.now() - 1 * 24 * 60 * 60 * 1000).toISOString(),
               status: 'submitted',
               ai_score: null,
@@ -2691,6 +2699,8 @@ const ProposalManagement = () => {
               vendor_company: 'TechSolutions Saudi Arabia',
               technical_document: 'demo-tech-doc',
               commercial_document: 'demo-commercial-doc',
+              has_technical_document: true,
+              has_commercial_document: true,
               submitted_at: new Date(Date.now() - 2 * 24 * 60 * 60 * 1000).toISOString(),
               status: 'evaluated',
               ai_score: 87.5,
@@ -2801,11 +2811,21 @@ const ProposalManagement = () => {
 
   const evaluateProposal = async (proposalId) => {
     try {
-      await axios.post(`${API}/proposals/${proposalId}/evaluate`, {}, {
-        headers: { Authorization: `Bearer ${localStorage.getItem('token')}` }
-      });
+      const headers = { Authorization: `Bearer ${localStorage.getItem('token')}` };
+      const response = await axios.post(`${API}/proposals/${proposalId}/evaluate`, {}, { headers });
+      
+      // The evaluation runs in the background; poll its job until it finishes
+      let job = response.data;
+      while (job.status === 'queued' || job.status === 'running') {
+        await new Promise((resolve) => setTimeout(resolve, 2000));
+        job = (await axios.get(`${API}/evaluation-jobs/${response.data.job_id}`, { headers })).data;
+      }
       fetchProposals();
-      alert('Proposal evaluated successfully!');
+      if (job.status === 'failed') {
+        alert(`Proposal evaluation failed: ${job.error}`);
+      } else {
+        alert('Proposal evaluated successfully!');
+      }
     } catch (error) {
       console.error('Error evaluating proposal:', error);
       alert('Error evaluating proposal');
@@ -2952,8 +2972,8 @@ const ProposalManagement = () => {
                 {/* Documents */}
                 <div className="grid grid-cols-2 gap-4 mb-4">
                   <div className="flex items-center space-x-2">
-                    <span className={proposal.technical_document ? 'text-green-600' : 'text-red-600'}>
-                      {proposal.technical_document ? '✅' : '❌'}
+                    <span className={proposal.has_technical_document ? 'text-green-600' : 'text-red-600'}>
+                      {proposal.has_technical_document ? '✅' : '❌'}
                     </span>
                     <span className="text-sm">Technical Document</span>
                     {proposal.technical_document && typeof proposal.technical_document === 'string' && proposal.technical_document.includes('.') && (
@@ -2961,8 +2981,8 @@ const ProposalManagement = () => {
                     )}
                   </div>
                   <div className="flex items-center space-x-2">
-                    <span className={proposal.commercial_document ? 'text-green-600' : 'text-red-600'}>
-                      {proposal.commercial_document ? '✅' : '❌'}
+                    <span className={proposal.has_commercial_document ? 'text-green-600' : 'text-red-600'}>
+                      {proposal.has_commercial_document ? '✅' : '❌'}
                     </span>
                     <span className="text-sm">Commercial Document</span>
                     {proposal.commercial_document && typeof proposal.commercial_document === 'string' && proposal.commercial_document.includes('.') && (
@@ -3190,13 +3210,13 @@ const ProposalManagement = () => {
                 <div>
                   <p className="text-sm text-gray-600">Technical Document</p>
                   <p className="font-medium">
-                    {proposal.technical_document ? '✅ Uploaded' : '❌ Not uploaded'}
+                    {proposal.has_technical_document ? '✅ Uploaded' : '❌ Not uploaded'}
                   </p>
                 </div>
                 <div>
                   <p className="text-sm text-gray-600">Commercial Document</p>
                   <p className="font-medium">
-                    {proposal.commercial_document ? '✅ Uploaded' : '❌ Not uploaded'}
+                    {proposal.has_commercial_document ? '✅ Uploaded' : '❌ Not uploaded'}
                   </p>
                 </div>
               </div>
@@ -3444,13 +3464,13 @@ const ContractsManagement = () => {
         const response = await axios.get(`${API}/contracts/${contractId}/documents/${documentId}`, {
           headers: {
             'Authorization': `Bearer ${token}`
-          }
+          },
+          responseType: 'blob'
         });
         
-        if (response.data && response.data.content) {
+        if (response.data) {
           // Handle actual file download
-          const blob = new Blob([response.data.content], { type: 'application/pdf' });
-          const url = window.URL.createObjectURL(blob);
+          const url = window.URL.createObjectURL(response.data);
           const a = document.createElement('a');
           a.href = url;
           a.download = documentName;
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Login load test for the Procurement Portal.
+
+Fires a burst of logins at /api/auth/login and reports throughput, latency
+percentiles, 429 rejections and the bcrypt time from the Server-Timing
+header. With --local it instead measures the password hasher pool in
+process for 1, 2, 4 ... workers, showing login throughput scaling with cores.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import requests
+
+
+# Load backend URL from frontend .env
+def load_backend_url():
+    frontend_env_path = Path("/app/frontend/.env")
+    if frontend_env_path.exists():
+        with open(frontend_env_path, 'r') as f:
+            for line in f:
+                if line.startswith('REACT_APP_BACKEND_URL='):
+                    return line.split('=', 1)[1].strip()
+    return "http://localhost:8001"
+
+
+def percentile(values, share):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * share), len(ordered) - 1)]
+
+
+def server_hash_ms(response):
+    """bcrypt duration reported by the backend in the Server-Timing header"""
+    for metric in response.headers.get("Server-Timing", "").split(","):
+        name, _, duration = metric.strip().partition(";dur=")
+        if name == "hash" and duration:
+            return float(duration)
+    return None
+
+
+def run_http(api_url, email, password, total, concurrency):
+    def login(_):
+        started = time.perf_counter()
+        response = requests.post(f"{api_url}/auth/login", json={"email": email, "password": password}, timeout=60)
+        return response.status_code, time.perf_counter() - started, server_hash_ms(response)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(login, range(total)))
+    elapsed = time.perf_counter() - started
+
+    latencies = [latency for status, latency, _ in results if status == 200]
+    hash_times = [hashed for status, _, hashed in results if hashed is not None]
+    statuses = {}
+    for status, _, _ in results:
+        statuses[status] = statuses.get(status, 0) + 1
+
+    print(f"{total} logins, {concurrency} concurrent, in {elapsed:.2f}s")
+    print(f"  throughput:  {len(latencies) / elapsed:.1f} successful logins/s")
+    print(f"  statuses:    {statuses}")
+    print(f"  latency:     p50 {percentile(latencies, 0.5) * 1000:.0f} ms, p95 {percentile(latencies, 0.95) * 1000:.0f} ms")
+    if hash_times:
+        print(f"  bcrypt time: p50 {percentile(hash_times, 0.5):.0f} ms, p95 {percentile(hash_times, 0.95):.0f} ms")
+    return statuses.get(200, 0) > 0
+
+
+async def measure_pool(workers, total):
+    from password_hasher import PasswordHasher
+
+    hasher = PasswordHasher(workers=workers, queue_size=total)
+    hashed, _ = await hasher.hash("LoadTest123!")
+    started = time.perf_counter()
+    await asyncio.gather(*(hasher.verify("LoadTest123!", hashed) for _ in range(total)))
+    return total / (time.perf_counter() - started)
+
+
+def run_local(total):
+    sys.path.insert(0, str(Path(__file__).parent / "backend"))
+    cores = os.cpu_count() or 1
+    counts = sorted({1, *[2 ** n for n in range(1, cores.bit_length()) if 2 ** n <= cores], cores})
+    baseline = None
+    print(f"Password checks per second on the hasher pool ({cores} cores, {total} checks each)")
+    for workers in counts:
+        rate = asyncio.run(measure_pool(workers, total))
+        baseline = baseline or rate
+        print(f"  {workers:3d} workers: {rate:7.1f}/s  ({rate / baseline:.2f}x)")
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=load_backend_url(), help="Backend base URL")
+    parser.add_argument("--email", default="vendor001@techcorp.sa")
+    parser.add_argument("--password", default="DemoVendor123!")
+    parser.add_argument("--requests", type=int, default=200, help="Logins (or local checks) to run")
+    parser.add_argument("--concurrency", type=int, default=50, help="Concurrent HTTP clients")
+    parser.add_argument("--local", action="store_true", help="Measure the in-process hasher pool instead of HTTP")
+    args = parser.parse_args()
+
+    if args.local:
+        ok = run_local(args.requests)
+    else:
+        print(f"Load testing logins at: {args.url}/api")
+        ok = run_http(f"{args.url}/api", args.email, args.password, args.requests, args.concurrency)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
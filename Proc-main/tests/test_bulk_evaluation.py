@@ -0,0 +1,112 @@
+import asyncio
+import json
+import os
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("motor")
+pytest.importorskip("emergentintegrations")
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "test_procurement")
+
+import server  # noqa: E402
+
+RFP = {
+    "id": "rfp-1", "title": "Office fit-out", "description": "Fit-out of two floors", "budget": 500000,
+    "deadline": "2030-01-01T00:00:00", "categories": ["construction"], "scope_of_work": "Design and build",
+    "created_by": "admin-1", "approval_level": "committee"
+}
+PROPOSAL = {"id": "proposal-1", "rfp_id": "rfp-1", "vendor_id": "vendor-1", "vendor_company": "Vendor Co", "status": "submitted"}
+
+
+class Cursor:
+    def __init__(self, documents):
+        self.documents = documents
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for document in self.documents:
+            yield document
+
+    def sort(self, *args):
+        return self
+
+    async def to_list(self, length):
+        return self.documents
+
+
+class Collection:
+    def __init__(self, documents):
+        self.documents = documents
+        self.bulk_writes = []
+
+    async def find_one(self, query, projection=None):
+        return self.documents[0] if self.documents else None
+
+    async def count_documents(self, query):
+        return len(self.documents)
+
+    def find(self, query, projection=None):
+        return Cursor(self.documents)
+
+    async def bulk_write(self, requests, ordered=True):
+        self.bulk_writes.append(requests)
+
+
+class Database:
+    def __init__(self):
+        self.rfps = Collection([RFP])
+        self.proposals = Collection([PROPOSAL])
+
+
+class Chat:
+    def __init__(self, **kwargs):
+        pass
+
+    def with_model(self, provider, model):
+        return self
+
+
+async def failing_complete(*args, **kwargs):
+    raise ConnectionError("provider unreachable")
+
+
+async def prose_complete(*args, **kwargs):
+    return "The proposal looks reasonable."
+
+
+async def no_cached_evaluation(key, force=False):
+    return None
+
+
+@pytest.fixture
+def database(monkeypatch):
+    database = Database()
+    monkeypatch.setattr(server, "db", database)
+    monkeypatch.setattr(server, "openai_api_key", "test-key")
+    monkeypatch.setattr(server, "LlmChat", Chat)
+    monkeypatch.setattr(server.evaluation_cache, "get", no_cached_evaluation)
+    return database
+
+
+def evaluate_all():
+    async def consume():
+        response = await server.evaluate_all_proposals("rfp-1", current_user={"user_type": "admin"})
+        return [json.loads(line) async for line in response.body_iterator]
+    return asyncio.run(consume())
+
+
+@pytest.mark.parametrize("complete", [failing_complete, prose_complete])
+def test_failed_evaluations_are_reported_and_not_written(database, monkeypatch, complete):
+    monkeypatch.setattr(server.llm_gateway, "complete", complete)
+    events = evaluate_all()
+    progress = [event for event in events if event["event"] == "progress"]
+    assert len(progress) == 1
+    assert progress[0]["proposal_id"] == "proposal-1"
+    assert "error" in progress[0] and "ai_score" not in progress[0]
+    assert events[-1]["event"] == "ranking"
+    assert database.proposals.bulk_writes == []
@@ -0,0 +1,26 @@
+import pytest
+
+pytest.importorskip("motor")
+
+from document_store import RangeNotSatisfiable, parse_range  # noqa: E402
+
+
+@pytest.mark.parametrize("header, span", [
+    ("bytes=0-4", (0, 4)),
+    ("bytes=5-", (5, 9)),
+    ("bytes=-3", (7, 9)),
+    ("bytes=0-99", (0, 9)),
+])
+def test_valid_ranges(header, span):
+    assert parse_range(header, 10) == span
+
+
+@pytest.mark.parametrize("header", [None, "", "bytes=5-3", "bytes=-", "bytes=1-2,4-5", "items=0-1", "bytes=a-b"])
+def test_invalid_headers_are_ignored(header):
+    assert parse_range(header, 10) is None
+
+
+@pytest.mark.parametrize("header", ["bytes=10-", "bytes=20-30", "bytes=-0"])
+def test_ranges_outside_the_document_are_not_satisfiable(header):
+    with pytest.raises(RangeNotSatisfiable, match=r"bytes \*/10"):
+        parse_range(header, 10)
@@ -0,0 +1,317 @@
+import asyncio
+import copy
+from datetime import datetime, timedelta
+
+import pytest
+from pymongo.errors import DuplicateKeyError
+
+import job_queue
+from job_queue import COMPLETED, FAILED, QUEUED, RUNNING, JobQueue, PermanentJobError
+
+
+def _get(document, path):
+    for part in path.split("."):
+        if not isinstance(document, dict):
+            return None
+        document = document.get(part)
+    return document
+
+
+def _matches(document, query):
+    for key, condition in query.items():
+        if key == "$or":
+            if not any(_matches(document, option) for option in condition):
+                return False
+            continue
+        value = _get(document, key)
+        if isinstance(condition, dict):
+            for operator, operand in condition.items():
+                if operator == "$lte" and (value is None or value > operand):
+                    return False
+        elif value != condition:
+            return False
+    return True
+
+
+def _project(document, projection):
+    document = copy.deepcopy(document)
+    if projection and projection.get("_id") == 0:
+        document.pop("_id", None)
+    return document
+
+
+class FakeCursor:
+    def __init__(self, documents):
+        self.documents = documents
+
+    def sort(self, field, direction):
+        self.documents.sort(key=lambda document: document[field], reverse=direction < 0)
+        return self
+
+    async def to_list(self, length):
+        return self.documents[:length]
+
+
+class FakeCollection:
+    """The subset of a Motor collection JobQueue uses, with its unique indexes"""
+
+    def __init__(self):
+        self.documents = []
+        self._next_id = 0
+
+    async def create_index(self, keys, **options):
+        return options.get("name")
+
+    async def insert_one(self, document):
+        if any(existing["id"] == document["id"] for existing in self.documents):
+            raise DuplicateKeyError("jobs_id")
+        if document.get("active") and any(
+            existing.get("active") and existing["key"] == document["key"] for existing in self.documents
+        ):
+            raise DuplicateKeyError("jobs_active_key")
+        self._next_id += 1
+        document["_id"] = self._next_id
+        self.documents.append(copy.deepcopy(document))
+
+    async def find_one(self, query, projection=None):
+        for document in self.documents:
+            if _matches(document, query):
+                return _project(document, projection)
+        return None
+
+    def find(self, query, projection=None):
+        return FakeCursor([_project(document, projection) for document in self.documents if _matches(document, query)])
+
+    def _apply(self, document, update):
+        for field, value in update.get("$set", {}).items():
+            document[field] = value
+        for field, value in update.get("$inc", {}).items():
+            document[field] = document.get(field, 0) + value
+        for field in update.get("$unset", {}):
+            document.pop(field, None)
+
+    async def update_one(self, query, update):
+        for document in self.documents:
+            if _matches(document, query):
+                self._apply(document, update)
+                return
+
+    async def find_one_and_update(self, query, update, projection=None, sort=None, return_document=None):
+        candidates = [document for document in self.documents if _matches(document, query)]
+        for field, direction in reversed(sort or []):
+            candidates.sort(key=lambda document: document[field], reverse=direction < 0)
+        if not candidates:
+            return None
+        self._apply(candidates[0], update)
+        return _project(candidates[0], projection)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    class Clock(datetime):
+        current = datetime(2026, 1, 1)
+
+        @classmethod
+        def utcnow(cls):
+            return cls.current
+
+    monkeypatch.setattr(job_queue, "datetime", Clock)
+    return Clock
+
+
+def make_queue(**options):
+    return JobQueue(FakeCollection(), "test", **options)
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_enqueue_returns_the_active_job_for_a_key(clock):
+    async def scenario():
+        queue = make_queue()
+        first = await queue.enqueue("proposal-1", {"n": 1})
+        second = await queue.enqueue("proposal-1", {"n": 2})
+        other = await queue.enqueue("proposal-2", {"n": 3})
+        return first, second, other
+
+    first, second, other = run(scenario())
+    assert second["id"] == first["id"] and second["payload"] == {"n": 1}
+    assert other["id"] != first["id"]
+    assert "_id" not in first
+
+
+def test_completed_job_frees_its_key(clock):
+    async def scenario():
+        queue = make_queue()
+        first = await queue.enqueue("proposal-1", {})
+        queue._handler = lambda job, report: asyncio.sleep(0, {"ok": True})
+        await queue._run(await queue._claim())
+        second = await queue.enqueue("proposal-1", {})
+        return await queue.get(first["id"]), second
+
+    finished, second = run(scenario())
+    assert finished["status"] == COMPLETED
+    assert finished["result"] == {"ok": True} and finished["progress"] == 100.0
+    assert "active" not in finished and "lease_expires_at" not in finished
+    assert second["id"] != finished["id"] and second["status"] == QUEUED
+
+
+def test_failed_attempt_is_retried_with_backoff(clock, monkeypatch):
+    monkeypatch.setattr(job_queue, "JOB_RETRY_BASE_SECONDS", 10)
+
+    async def scenario():
+        queue = make_queue(max_attempts=3)
+        job = await queue.enqueue("proposal-1", {})
+        attempts = []
+
+        async def handler(claimed, report):
+            attempts.append(claimed["attempts"])
+            if len(attempts) < 3:
+                raise RuntimeError("upstream timeout")
+            return {"ok": True}
+
+        queue._handler = handler
+        await queue._run(await queue._claim())
+        retrying = await queue.get(job["id"])
+        assert await queue._claim() is None  # not due yet
+
+        clock.current += timedelta(seconds=10)
+        await queue._run(await queue._claim())
+        # The second retry waits twice as long
+        clock.current += timedelta(seconds=10)
+        assert await queue._claim() is None
+        clock.current += timedelta(seconds=10)
+        await queue._run(await queue._claim())
+        return queue, retrying, await queue.get(job["id"]), attempts
+
+    queue, retrying, finished, attempts = run(scenario())
+    assert retrying["status"] == QUEUED and retrying["stage"] == "retrying"
+    assert retrying["error"] == "RuntimeError: upstream timeout"
+    assert retrying["available_at"] == datetime(2026, 1, 1, 0, 0, 10)
+    assert attempts == [1, 2, 3]
+    assert finished["status"] == COMPLETED and finished["error"] is None
+    assert queue.stats == {"completed": 1, "failed": 0, "retried": 2}
+
+
+def test_job_fails_after_max_attempts(clock, monkeypatch):
+    monkeypatch.setattr(job_queue, "JOB_RETRY_BASE_SECONDS", 0)
+
+    async def scenario():
+        queue = make_queue(max_attempts=2)
+        job = await queue.enqueue("proposal-1", {})
+
+        async def handler(claimed, report):
+            raise RuntimeError("still down")
+
+        queue._handler = handler
+        await queue._run(await queue._claim())
+        await queue._run(await queue._claim())
+        return queue, await queue.get(job["id"]), await queue._claim()
+
+    queue, failed, next_claim = run(scenario())
+    assert failed["status"] == FAILED and failed["attempts"] == 2
+    assert "active" not in failed
+    assert next_claim is None
+    assert queue.stats["failed"] == 1
+
+
+def test_permanent_error_is_not_retried(clock):
+    async def scenario():
+        queue = make_queue(max_attempts=3)
+        job = await queue.enqueue("proposal-1", {})
+
+        async def handler(claimed, report):
+            raise PermanentJobError("Proposal not found")
+
+        queue._handler = handler
+        await queue._run(await queue._claim())
+        return await queue.get(job["id"])
+
+    failed = run(scenario())
+    assert failed["status"] == FAILED and failed["attempts"] == 1
+    assert failed["error"] == "PermanentJobError: Proposal not found"
+
+
+def test_expired_lease_is_claimed_again_and_the_stale_run_cannot_overwrite_it(clock):
+    async def scenario():
+        queue = make_queue(lease_seconds=300)
+        job = await queue.enqueue("proposal-1", {})
+        stale = await queue._claim()
+        assert stale["status"] == RUNNING
+
+        # Within the lease nobody else takes it
+        clock.current += timedelta(seconds=299)
+        assert await queue._claim() is None
+
+        clock.current += timedelta(seconds=2)
+        reclaimed = await queue._claim()
+
+        # The worker that lost its lease finishes late; its writes are ignored
+        queue._handler = lambda claimed, report: asyncio.sleep(0, {"from": claimed["attempts"]})
+        await queue._run(stale)
+        after_stale = await queue.get(job["id"])
+        await queue._run(reclaimed)
+        return stale, reclaimed, after_stale, await queue.get(job["id"])
+
+    stale, reclaimed, after_stale, finished = run(scenario())
+    assert reclaimed["id"] == stale["id"] and reclaimed["attempts"] == 2
+    assert after_stale["status"] == RUNNING and after_stale["result"] is None
+    assert finished["status"] == COMPLETED and finished["result"] == {"from": 2}
+
+
+def test_job_whose_worker_died_on_the_last_attempt_fails(clock):
+    async def scenario():
+        queue = make_queue(max_attempts=1, lease_seconds=60)
+        job = await queue.enqueue("proposal-1", {})
+        await queue._claim()
+        clock.current += timedelta(seconds=61)
+        queue._handler = lambda claimed, report: pytest.fail("must not run past max_attempts")
+        await queue._run(await queue._claim())
+        return await queue.get(job["id"])
+
+    failed = run(scenario())
+    assert failed["status"] == FAILED
+    assert failed["error"] == "PermanentJobError: Worker stopped during the last attempt"
+
+
+def test_cancelled_run_is_handed_back(clock):
+    async def scenario():
+        queue = make_queue()
+        job = await queue.enqueue("proposal-1", {})
+        started = asyncio.Event()
+
+        async def handler(claimed, report):
+            await report("evaluating", 30.0)
+            started.set()
+            await asyncio.sleep(60)
+
+        queue._handler = handler
+        task = asyncio.create_task(queue._run(await queue._claim()))
+        await started.wait()
+        progress = (await queue.get(job["id"]))["progress"]
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        return progress, await queue.get(job["id"])
+
+    progress, requeued = run(scenario())
+    assert progress == 30.0
+    assert requeued["status"] == QUEUED and requeued["attempts"] == 0
+
+
+def test_workers_run_enqueued_jobs(clock):
+    async def scenario():
+        queue = make_queue(workers=2)
+        queue.start(lambda job, report: asyncio.sleep(0, {"key": job["key"]}))
+        jobs = [await queue.enqueue(f"proposal-{n}", {}) for n in range(3)]
+        for _ in range(100):
+            finished = [await queue.get(job["id"]) for job in jobs]
+            if all(job["status"] == COMPLETED for job in finished):
+                break
+            await asyncio.sleep(0.01)
+        await queue.stop()
+        return finished
+
+    finished = run(scenario())
+    assert [job["result"] for job in finished] == [{"key": f"proposal-{n}"} for n in range(3)]
@@ -0,0 +1,82 @@
+import asyncio
+
+import pytest
+
+import llm_gateway as llm_gateway_module
+from llm_gateway import LLMGateway, is_transient_error
+
+
+class ProviderError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"status {status_code}")
+        self.status_code = status_code
+
+
+class RateLimitError(Exception):
+    pass
+
+
+class FlakySend:
+    """Raises the given errors in turn, then answers"""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return "answer"
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(llm_gateway_module, "LLM_RETRY_BASE_SECONDS", 0)
+
+
+def complete(send):
+    return asyncio.run(LLMGateway().complete("test", "gpt-4o", "prompt", send))
+
+
+def last_call():
+    return llm_gateway_module.llm_usage.recent[-1]
+
+
+@pytest.mark.parametrize("error, transient", [
+    (ProviderError(429), True),
+    (ProviderError(503), True),
+    (ProviderError(400), False),
+    (ProviderError(401), False),
+    (ConnectionResetError(), True),
+    (RateLimitError(), True),
+    (ValueError("bad prompt"), False),
+])
+def test_is_transient_error(error, transient):
+    assert is_transient_error(error) is transient
+
+
+def test_non_transient_error_is_not_retried():
+    send = FlakySend(ProviderError(401))
+    with pytest.raises(ProviderError):
+        complete(send)
+    assert send.calls == 1
+    assert last_call()["retries"] == 0
+    assert last_call()["outcome"] == "error"
+
+
+def test_transient_errors_are_retried_and_recorded():
+    send = FlakySend(ProviderError(429), ProviderError(503))
+    assert complete(send) == "answer"
+    assert send.calls == 3
+    assert last_call()["retries"] == 2
+    assert last_call()["outcome"] == "ok"
+
+
+def test_retries_stop_at_the_limit(monkeypatch):
+    monkeypatch.setattr(llm_gateway_module, "LLM_MAX_RETRIES", 1)
+    send = FlakySend(ProviderError(503), ProviderError(503), ProviderError(503))
+    with pytest.raises(ProviderError):
+        complete(send)
+    assert send.calls == 2
+    assert last_call()["retries"] == 1
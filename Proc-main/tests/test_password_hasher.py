@@ -0,0 +1,51 @@
+import asyncio
+
+import pytest
+
+from password_hasher import HashTiming, PasswordHasher, PasswordHasherBusy
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_hash_and_verify_round_trip():
+    async def scenario():
+        hasher = PasswordHasher(workers=2, queue_size=2)
+        hashed, timing = await hasher.hash("Secret123!")
+        good, _ = await hasher.verify("Secret123!", hashed)
+        bad, _ = await hasher.verify("Wrong123!", hashed)
+        return hasher, hashed, timing, good, bad
+
+    hasher, hashed, timing, good, bad = run(scenario())
+    assert hashed.startswith("$2") and good and not bad
+    assert timing.hash_seconds > 0 and timing.queue_seconds >= 0
+    assert hasher.counters == {"hash": 1, "verify": 2, "rejected": 0}
+
+
+def test_requests_beyond_capacity_are_rejected_at_once():
+    async def scenario():
+        hasher = PasswordHasher(workers=1, queue_size=1)
+        results = await asyncio.gather(*(hasher.hash("Secret123!") for _ in range(3)), return_exceptions=True)
+        return hasher, results
+
+    hasher, results = run(scenario())
+    rejected = [result for result in results if isinstance(result, PasswordHasherBusy)]
+    assert len(rejected) == 1
+    assert hasher.counters["rejected"] == 1 and hasher.counters["hash"] == 2
+    assert hasher.summary()["pending"] == 0
+
+
+def test_failed_work_frees_its_slot():
+    async def scenario():
+        hasher = PasswordHasher(workers=1, queue_size=0)
+        with pytest.raises(ValueError):
+            await hasher.verify("Secret123!", "not a bcrypt hash")
+        return hasher, await hasher.hash("Secret123!")
+
+    hasher, _ = run(scenario())
+    assert hasher.summary()["pending"] == 0
+
+
+def test_server_timing_header():
+    assert HashTiming(0.0015, 0.25).server_timing() == "hash_queue;dur=1.5, hash;dur=250.0"
@@ -0,0 +1,95 @@
+import pytest
+
+import principal_cache as principal_cache_module
+from principal_cache import PrincipalCache, token_key
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(principal_cache_module.time, "time", clock)
+    return clock
+
+
+def principal(user_id, is_approved=True):
+    return {"user_id": user_id, "user_type": "vendor", "email": f"{user_id}@example.sa", "is_approved": is_approved}
+
+
+def test_hit_after_put_and_raw_tokens_are_not_kept(clock):
+    cache = PrincipalCache(ttl_seconds=60)
+    assert cache.get("token-a") is None
+    cache.put("token-a", principal("vendor-1"), clock.now + 3600)
+    assert cache.get("token-a")["user_id"] == "vendor-1"
+    assert cache.stats["hits"] == 1 and cache.stats["misses"] == 1
+    assert list(cache._entries) == [token_key("token-a")]
+
+
+def test_entry_expires_with_its_token(clock):
+    cache = PrincipalCache(ttl_seconds=60)
+    cache.put("token-a", principal("vendor-1"), clock.now + 10)
+    clock.now += 10
+    assert cache.get("token-a") is None
+    assert not cache._entries and not cache._keys_by_user
+
+
+def test_entry_lives_at_most_the_ttl(clock):
+    cache = PrincipalCache(ttl_seconds=60)
+    cache.put("token-a", principal("vendor-1"), clock.now + 3600)
+    clock.now += 59
+    assert cache.get("token-a") is not None
+    clock.now += 1
+    assert cache.get("token-a") is None
+
+
+def test_invalidate_user_drops_every_token_of_that_user_only(clock):
+    cache = PrincipalCache()
+    cache.put("session-1", principal("vendor-1", is_approved=False), clock.now + 3600)
+    cache.put("session-2", principal("vendor-1", is_approved=False), clock.now + 3600)
+    cache.put("other", principal("vendor-2"), clock.now + 3600)
+
+    # Approving or rejecting a vendor calls this; so must any change to how a user authenticates
+    cache.invalidate_user("vendor-1")
+
+    assert cache.get("session-1") is None and cache.get("session-2") is None
+    assert cache.get("other")["user_id"] == "vendor-2"
+    assert cache.stats["invalidations"] == 1
+
+    # The next request re-reads the user and caches the new state
+    cache.put("session-1", principal("vendor-1", is_approved=True), clock.now + 3600)
+    assert cache.get("session-1")["is_approved"] is True
+
+
+def test_invalidating_an_unknown_user_is_harmless(clock):
+    cache = PrincipalCache()
+    cache.put("token-a", principal("vendor-1"), clock.now + 3600)
+    cache.invalidate_user("nobody")
+    assert cache.get("token-a") is not None
+
+
+def test_lru_eviction_keeps_the_user_index_in_step(clock):
+    cache = PrincipalCache(max_entries=2)
+    cache.put("token-a", principal("vendor-1"), clock.now + 3600)
+    cache.put("token-b", principal("vendor-2"), clock.now + 3600)
+    cache.get("token-a")
+    cache.put("token-c", principal("vendor-3"), clock.now + 3600)
+
+    assert cache.get("token-b") is None
+    assert cache.get("token-a") is not None and cache.get("token-c") is not None
+    assert set(cache._keys_by_user) == {"vendor-1", "vendor-3"}
+
+
+def test_replacing_a_token_moves_it_to_its_new_user(clock):
+    cache = PrincipalCache()
+    cache.put("token-a", principal("vendor-1"), clock.now + 3600)
+    cache.put("token-a", principal("vendor-2"), clock.now + 3600)
+    cache.invalidate_user("vendor-1")
+    assert cache.get("token-a")["user_id"] == "vendor-2"
+    assert set(cache._keys_by_user) == {"vendor-2"}
@@ -1,8 +1,54 @@
 import os
 import asyncio
-from typing import Dict, Any
-import openai
-from database import employees_collection, vacation_balances_collection, hr_requests_collection, policies_collection, salary_payments_collection
+from typing import Dict, Any, AsyncIterator, Optional
+from openai import AsyncOpenAI, NotFoundError
+from database import vacation_balances_collection
+from employee_context import employee_contexts
+from policy_cache import policy_cache
+from thread_store import session_threads
+from answer_cache import policy_answer_cache
+from intent_classifier import classify
+from circuit_breaker import CLOSED, CircuitOpenError, get_breaker
+from single_flight import CoalescedCallFailed, policy_question_flights
+from llm_gateway import LLMCall, LLMGateway, fallback_label
+from policy_retrieval import policy_chunk_index, retrieval_stats, estimate_tokens, format_chunk_context
+
+# Upper bound for a whole Assistant run, from thread creation to the last token
+ASSISTANT_TIMEOUT_SECONDS = 30
+
+# Seconds an Assistant run may take to produce its first token before the request falls back
+ASSISTANT_FIRST_TOKEN_SECONDS = float(os.environ.get("ASSISTANT_FIRST_TOKEN_SECONDS", "10"))
+
+# Assistant runs slower than this count as failures for the circuit breaker
+ASSISTANT_LATENCY_BUDGET_SECONDS = float(os.environ.get("ASSISTANT_LATENCY_BUDGET_SECONDS", "20"))
+
+# Upper bound and circuit-breaker latency budget for a chat completion
+COMPLETION_TIMEOUT_SECONDS = float(os.environ.get("COMPLETION_TIMEOUT_SECONDS", "15"))
+COMPLETION_LATENCY_BUDGET_SECONDS = float(os.environ.get("COMPLETION_LATENCY_BUDGET_SECONDS", "8"))
+
+# Maximum number of OpenAI calls in flight per worker; further chat requests wait their turn
+AI_MAX_CONCURRENCY = int(os.environ.get("AI_MAX_CONCURRENCY", "8"))
+
+# Number of top search hits recorded as the policies a cached answer depends on
+ANSWER_POLICY_REFERENCES = 3
+
+# Streaming events that end an Assistant run without a usable answer
+ASSISTANT_RUN_FAILURES = ("thread.run.failed", "thread.run.cancelled", "thread.run.expired")
+
+
+class AssistantRunError(Exception):
+    """An Assistant run finished as failed, cancelled or expired"""
+    
+    def __init__(self, event: str, last_error: Any = None):
+        super().__init__(event)
+        self.event = event
+        self.last_error = last_error
+    
+    def user_message(self) -> str:
+        if self.event == "thread.run.failed":
+            return "I apologize, but I'm having trouble accessing the HR policy information right now. Please contact HR directly for assistance."
+        return "The request was interrupted. Please try again or contact HR for assistance."
+
 
 class AIHRAssistant:
     def __init__(self):
@@ -10,31 +56,39 @@ class AIHRAssistant:
         if not self.api_key:
             raise ValueError("OpenAI API key not found in environment variables")
         
-        # Initialize OpenAI client
-        openai.api_key = self.api_key
+        # Non-blocking OpenAI client; retries, concurrency limit and accounting live in the gateway
+        self.client = AsyncOpenAI(api_key=self.api_key, max_retries=0)
+        self.gateway = LLMGateway(self.client, AI_MAX_CONCURRENCY)
+        
+        # Per-stage circuit breakers: a degraded upstream is skipped instead of waited out
+        self._assistant_breaker = get_breaker("assistant", ASSISTANT_LATENCY_BUDGET_SECONDS)
+        self._completion_breaker = get_breaker("chat_completion", COMPLETION_LATENCY_BUDGET_SECONDS)
         
         # Using OpenAI Assistant API with custom trained HR assistant
         self.assistant_id = "asst_Dwo2hqfJhI6GfD31YGt6bcrJ"  # Your HR Assistant ID
+        
+        # Cached policy answers are dropped when the policies they cite change
+        policy_cache.add_listener(policy_answer_cache.invalidate_policies)
     
     async def generate_response(self, message: str, employee_id: str, session_id: str) -> Dict[str, Any]:
         """Generate AI response using custom GPT and context from database"""
         
-        # Get employee context
-        employee = await employees_collection.find_one({"id": employee_id})
-        if not employee:
+        # Get employee and HR status context in one concurrent fan-out
+        employee_context = await employee_contexts.get(employee_id, session_id)
+        if not employee_context:
             return {
                 "response": "Sorry, I couldn't find your employee information. Please contact HR support.",
                 "type": "error"
             }
         
-        # Build context with employee data
-        context = await self._build_employee_context(employee_id, employee)
+        employee = employee_context["employee"]
+        context = employee_context["summary"]
         
         # Check if this is a policy-related question
         if self._is_policy_question(message):
             try:
                 # Use custom GPT for policy questions
-                response = await self._query_custom_gpt(message, employee, context)
+                response = await self._query_custom_gpt(message, employee, context, session_id)
                 return {
                     "response": response,
                     "type": "policy"
@@ -42,48 +96,102 @@ class AIHRAssistant:
             except Exception as e:
                 print(f"Custom GPT Error: {str(e)}")
                 # Fallback to policy retrieval from database
-                return await self._handle_policy_fallback(message, employee_id, context)
+                return await self._handle_policy_fallback(message, employee_id, context, fallback_label("assistant", e))
         else:
             # Use regular OpenAI for non-policy questions
             return await self._handle_regular_query(message, employee, context, session_id)
     
+    async def stream_response(self, message: str, employee_id: str, session_id: str) -> AsyncIterator[Dict[str, Any]]:
+        """Stream an AI response as ``delta`` events followed by one ``final`` event"""
+        
+        employee_context = await employee_contexts.get(employee_id, session_id)
+        if not employee_context:
+            response = "Sorry, I couldn't find your employee information. Please contact HR support."
+            yield {"event": "delta", "text": response}
+            yield {"event": "final", "response": response, "type": "error"}
+            return
+        
+        employee = employee_context["employee"]
+        context = employee_context["summary"]
+        
+        if not self._is_policy_question(message):
+            # Non-policy questions are answered in one piece
+            result = await self._handle_regular_query(message, employee, context, session_id)
+            yield {"event": "delta", "text": result["response"]}
+            yield {"event": "final", "response": result["response"], "type": result["type"]}
+            return
+        
+        deadline = asyncio.get_running_loop().time() + ASSISTANT_TIMEOUT_SECONDS
+        shared = self._is_shareable_question(message)
+        flight_key = None
+        if shared:
+            cached = policy_answer_cache.lookup(message, employee["grade"], employee["department"])
+            if cached:
+                yield {"event": "delta", "text": cached}
+                yield {"event": "final", "response": cached, "type": "policy"}
+                return
+            
+            # An identical question is already being answered for this grade and department: wait for it
+            flight_key = policy_answer_cache.key(message, employee["grade"], employee["department"])
+            flight = policy_question_flights.join(flight_key)
+            if flight is not None:
+                try:
+                    response_text = await policy_question_flights.wait(flight, ASSISTANT_TIMEOUT_SECONDS)
+                except CoalescedCallFailed as e:
+                    print(f"Coalesced Assistant run failed: {str(e)}")
+                    response_text = await self._degraded_policy_response(message, employee, context, fallback_label("assistant", e), deadline)
+                if not response_text:
+                    response_text = "I couldn't retrieve a response. Please try again or contact HR for assistance."
+                yield {"event": "delta", "text": response_text}
+                yield {"event": "final", "response": response_text, "type": "policy"}
+                return
+        
+        response_text = ""
+        async with policy_question_flights.lead(flight_key) as flight:
+            try:
+                async for delta in self._stream_custom_gpt(message, employee, context, session_id, shared):
+                    response_text += delta
+                    yield {"event": "delta", "text": delta}
+                if shared and response_text:
+                    await self._remember_policy_answer(message, employee, response_text)
+                    flight.set_result(response_text)
+            except Exception as e:
+                if not isinstance(e, CircuitOpenError):
+                    print(f"Custom GPT streaming error: {type(e).__name__} {str(e)}")
+                if not response_text:
+                    # Nothing reached the user yet, so the fallback can replace the answer
+                    if isinstance(e, AssistantRunError):
+                        response_text = e.user_message()
+                    elif isinstance(e, (CircuitOpenError, asyncio.TimeoutError)):
+                        # The Assistant is degraded or the latency budget is spent: answer locally right away
+                        response_text = await self._basic_policy_search(message, fallback_label("assistant", e))
+                    else:
+                        response_text = await self._degraded_policy_response(message, employee, context, fallback_label("assistant", e), deadline)
+                    yield {"event": "delta", "text": response_text}
+        
+        if not response_text:
+            response_text = "I couldn't retrieve a response. Please try again or contact HR for assistance."
+            yield {"event": "delta", "text": response_text}
+        
+        yield {"event": "final", "response": response_text, "type": "policy"}
+    
     def _is_policy_question(self, message: str) -> bool:
         """Check if the message is asking about policies (English and Arabic)"""
-        policy_keywords = [
-            # English keywords
-            'policy', 'policies', 'rule', 'rules', 'procedure', 'procedures',
-            'leave policy', 'vacation policy', 'sick leave policy', 'travel policy',
-            'compensation policy', 'salary policy', 'work rules', 'conduct',
-            'what is the policy', 'policy on', 'company policy', 'hr policy',
-            'annual leave', 'sick leave', 'maternity leave', 'business travel',
-            'end of service', 'performance management', 'recruitment',
-            'vacation days', 'vacation entitlement', 'how many vacation',
-            'travel allowance', 'travel allowances', 'business trip allowance',
-            'dress code', 'working hours', 'work hours', 'overtime',
-            'probation period', 'end of service benefit', 'service benefit',
-            'maternity policy', 'paternity leave', 'bereavement leave',
-            
-            # Arabic keywords
-            'سياسة', 'سياسات', 'قواعد', 'قانون', 'إجراءات', 'لوائح',
-            'إجازة', 'إجازات', 'إجازة سنوية', 'إجازة مرضية', 'إجازة أمومة',
-            'انتداب', 'سفر', 'راتب', 'رواتب', 'مزايا', 'تعويضات',
-            'نهاية الخدمة', 'مكافأة', 'توظيف', 'تطوير', 'أداء',
-            'ما هي السياسة', 'سياسة الشركة', 'قواعد العمل',
-            'كم يوم إجازة', 'أيام الإجازة', 'بدل سفر', 'ساعات العمل'
-        ]
-        message_lower = message.lower()
-        return any(keyword in message_lower for keyword in policy_keywords)
+        return classify(message).is_policy
     
-    async def _query_custom_gpt(self, message: str, employee: Dict, context: str) -> str:
-        """Query OpenAI Assistant API following the exact integration steps"""
-        
-        try:
-            # Step 1: Create a new thread (required for each chat session)
-            thread = openai.beta.threads.create()
-            print(f"Created thread: {thread.id}")
-            
-            # Enhanced message with employee context
-            enhanced_message = f"""Employee Profile:
+    def _is_shareable_question(self, message: str) -> bool:
+        """General policy questions whose answer depends only on grade and department"""
+        return not classify(message).personal
+    
+    async def _remember_policy_answer(self, message: str, employee: Dict, answer: str):
+        """Cache a shareable answer together with the policies it is most likely about"""
+        ranked = await policy_cache.search(message)
+        policy_ids = [policy["id"] for _, policy in ranked[:ANSWER_POLICY_REFERENCES]]
+        policy_answer_cache.store(message, employee["grade"], employee["department"], answer, policy_ids)
+    
+    def _build_assistant_message(self, message: str, employee: Dict, context: str) -> str:
+        """Question for the Assistant, prefixed with the employee profile and HR status"""
+        return f"""Employee Profile:
 - Name: {employee['name']}
 - Employee ID: {employee.get('id', 'N/A')}
 - Grade: {employee['grade']}
@@ -95,120 +203,184 @@ Current HR Status:
 
 Question: {message}
 """
-            
-            # Step 2: Send a user message
-            await asyncio.to_thread(
-                openai.beta.threads.messages.create,
-                thread.id,
-                role="user",
-                content=enhanced_message
-            )
-            print("Message sent to thread")
-            
-            # Step 3: Run the assistant
-            run = await asyncio.to_thread(
-                openai.beta.threads.runs.create,
-                thread.id,
-                assistant_id="asst_Dwo2hqfJhI6GfD31YGt6bcrJ"
-            )
-            print(f"Assistant run started: {run.id}")
-            
-            # Step 4: Poll until run is completed
-            max_attempts = 30  # 30 seconds timeout
-            attempt = 0
-            
-            while attempt < max_attempts:
-                run_status = await asyncio.to_thread(
-                    openai.beta.threads.runs.retrieve,
-                    thread.id,
-                    run.id
-                )
-                
-                print(f"Run status: {run_status.status} (attempt {attempt + 1})")
+    
+    def _build_shared_assistant_message(self, message: str, employee: Dict) -> str:
+        """Question for the Assistant carrying only the attributes a cached answer is keyed on"""
+        return f"""Employee Profile:
+- Grade: {employee['grade']}
+- Department: {employee['department']}
+
+Question: {message}
+"""
+    
+    async def _chat_completion(self, call_site: str, fallback_reason: Optional[str] = None,
+                               timeout: float = COMPLETION_TIMEOUT_SECONDS, **kwargs):
+        """Chat completion through the LLM gateway, guarded by the completion circuit breaker"""
+        return await self.gateway.chat_completion(
+            call_site, timeout, self._completion_breaker, fallback_reason, **kwargs
+        )
+    
+    async def _open_session_thread(self, message: str, employee: Dict, context: str, session_id: str, shared: bool,
+                                   record: LLMCall, deadline: float) -> str:
+        """Append the question to the session's thread, or start one with the full employee context.
+        
+        Shareable questions run on a fresh thread without personal data so the
+        answer can be cached for every employee of the same grade and department.
+        """
+        if shared:
+            thread = await self.gateway.with_retries(record, lambda: self.client.beta.threads.create(
+                messages=[{"role": "user", "content": self._build_shared_assistant_message(message, employee)}]
+            ), deadline)
+            return thread.id
+        
+        entry = await session_threads.get(session_id, employee["id"])
+        if entry:
+            try:
+                # Follow-up turn: the thread already holds the employee profile
+                await self.gateway.with_retries(record, lambda: self.client.beta.threads.messages.create(
+                    entry["thread_id"], role="user", content=message
+                ), deadline)
+                return entry["thread_id"]
+            except NotFoundError:
+                print(f"Assistant thread {entry['thread_id']} no longer exists, starting a new one")
+                await session_threads.forget(session_id)
+        
+        # Create the thread with the user message in a single call
+        thread = await self.gateway.with_retries(record, lambda: self.client.beta.threads.create(
+            messages=[{"role": "user", "content": self._build_assistant_message(message, employee, context)}]
+        ), deadline)
+        await session_threads.save(session_id, employee["id"], thread.id)
+        return thread.id
+    
+    async def _stream_custom_gpt(self, message: str, employee: Dict, context: str, session_id: str, shared: bool = False) -> AsyncIterator[str]:
+        """Stream the Assistant's reply as text deltas.
+        
+        Turns of the same session reuse one Assistant thread. Raises
+        AssistantRunError if the run fails, is cancelled or expires,
+        asyncio.TimeoutError if no token arrives within
+        ASSISTANT_FIRST_TOKEN_SECONDS or the whole run exceeds
+        ASSISTANT_TIMEOUT_SECONDS, and CircuitOpenError while the Assistant
+        circuit is open.
+        """
+        # Shared questions do not touch the session thread, so they need no session lock
+        session_lock = asyncio.Lock() if shared else session_threads.lock(session_id)
+        async with session_lock:
+            async with self.gateway.call("assistant", "assistant", self._assistant_breaker) as record:
+                loop = asyncio.get_running_loop()
+                deadline = loop.time() + ASSISTANT_TIMEOUT_SECONDS
+                first_token_deadline = loop.time() + ASSISTANT_FIRST_TOKEN_SECONDS
+                received_text = False
                 
-                if run_status.status == "completed":
-                    break
-                elif run_status.status == "failed":
-                    error_msg = getattr(run_status, 'last_error', 'Unknown error')
-                    print(f"Assistant run failed: {error_msg}")
-                    return "I apologize, but I'm having trouble accessing the HR policy information right now. Please contact HR directly for assistance."
-                elif run_status.status in ["cancelled", "expired"]:
-                    print(f"Assistant run {run_status.status}")
-                    return "The request was interrupted. Please try again or contact HR for assistance."
+                thread_id = await asyncio.wait_for(
+                    self._open_session_thread(message, employee, context, session_id, shared, record, first_token_deadline),
+                    timeout=ASSISTANT_FIRST_TOKEN_SECONDS
+                )
                 
-                # Wait 1 second before next poll
-                await asyncio.sleep(1)
-                attempt += 1
-            
-            if attempt >= max_attempts:
-                print("Assistant response timeout")
-                return "I'm taking longer than usual to process your request. Please try again or contact HR directly."
-            
-            # Step 5: Get the assistant's reply
-            messages = await asyncio.to_thread(
-                openai.beta.threads.messages.list,
-                thread.id
-            )
+                # Run the assistant and relay message deltas as they arrive
+                async with self.client.beta.threads.runs.stream(
+                    thread_id=thread_id,
+                    assistant_id=self.assistant_id
+                ) as stream:
+                    events = stream.__aiter__()
+                    while True:
+                        wait_until = deadline if received_text else min(deadline, first_token_deadline)
+                        try:
+                            event = await asyncio.wait_for(events.__anext__(), timeout=wait_until - loop.time())
+                        except StopAsyncIteration:
+                            break
+                        
+                        if event.event == "thread.message.delta":
+                            for block in event.data.delta.content or []:
+                                if block.type == "text" and block.text and block.text.value:
+                                    received_text = True
+                                    yield block.text.value
+                        elif event.event == "thread.run.created":
+                            record.model = event.data.model or record.model
+                        elif event.event == "thread.run.completed":
+                            record.add_usage(event.data.usage)
+                        elif event.event in ASSISTANT_RUN_FAILURES:
+                            record.add_usage(getattr(event.data, "usage", None))
+                            raise AssistantRunError(event.event, getattr(event.data, "last_error", None))
+    
+    async def _query_custom_gpt(self, message: str, employee: Dict, context: str, session_id: str) -> str:
+        """Query the OpenAI Assistant and return its complete reply"""
+        deadline = asyncio.get_running_loop().time() + ASSISTANT_TIMEOUT_SECONDS
+        shared = self._is_shareable_question(message)
+        if shared:
+            cached = policy_answer_cache.lookup(message, employee["grade"], employee["department"])
+            if cached:
+                return cached
+        
+        async def run_assistant() -> str:
+            response_text = ""
+            async for delta in self._stream_custom_gpt(message, employee, context, session_id, shared):
+                response_text += delta
+            if response_text and shared:
+                await self._remember_policy_answer(message, employee, response_text)
+            return response_text
+        
+        try:
+            # Identical shared questions in flight for the same grade and department share one run
+            flight_key = policy_answer_cache.key(message, employee["grade"], employee["department"]) if shared else None
+            response_text = await policy_question_flights.do(flight_key, run_assistant, ASSISTANT_TIMEOUT_SECONDS)
             
-            # Find the last assistant message
-            for msg in messages.data:
-                if msg.role == "assistant":
-                    # Extract text content
-                    response_text = ""
-                    for content in msg.content:
-                        if content.type == 'text':
-                            response_text += content.text.value
-                    
-                    if response_text:
-                        print("Assistant response received successfully")
-                        return response_text
+            if response_text:
+                return response_text
             
-            # If no assistant response found
-            print("No assistant response found in messages")
+            print("No assistant response found in stream")
             return "I couldn't retrieve a response. Please try again or contact HR for assistance."
-                
+        
+        except AssistantRunError as e:
+            print(f"Assistant run ended with {e.event}: {e.last_error}")
+            return e.user_message()
+        except CircuitOpenError as e:
+            # The Assistant is degraded: answer from the local policy search right away
+            return await self._basic_policy_search(message, fallback_label("assistant", e))
+        except CoalescedCallFailed as e:
+            print(f"Coalesced Assistant run failed: {str(e)}")
+            return await self._degraded_policy_response(message, employee, context, fallback_label("assistant", e), deadline)
+        except asyncio.TimeoutError as e:
+            # The latency budget is spent: answer from the local policy search right away
+            print("Assistant response exceeded its latency budget, answering from local policies")
+            return await self._basic_policy_search(message, fallback_label("assistant", e))
         except Exception as e:
             print(f"OpenAI Assistant API Error: {str(e)}")
-            # Fallback to basic policy search
-            return await self._basic_policy_search(message)
+            return await self._degraded_policy_response(message, employee, context, fallback_label("assistant", e), deadline)
     
-    async def _basic_policy_search(self, message: str) -> str:
-        """Basic fallback policy search when Assistant API fails"""
-        try:
-            # Simple fallback using regular OpenAI chat completion
-            response = openai.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are a helpful HR assistant. Provide general HR guidance and suggest contacting HR directly for specific policy questions."
-                    },
-                    {
-                        "role": "user", 
-                        "content": message
-                    }
-                ],
-                max_tokens=500,
-                temperature=0.3
-            )
-            return response.choices[0].message.content
-        except Exception as e:
-            print(f"Fallback error: {str(e)}")
-            return "I'm experiencing technical difficulties. Please contact HR directly for assistance with your question."
+    async def _degraded_policy_response(self, message: str, employee: Dict, context: str, fallback_reason: Optional[str],
+                                        deadline: float) -> str:
+        """Policy answer after an Assistant error other than an open circuit or a timeout.
+        
+        Answers from the local policy search, unless the completion circuit is
+        closed and enough of the turn's budget (loop-time deadline) is left for
+        a retrieval-grounded completion.
+        """
+        remaining = deadline - asyncio.get_running_loop().time()
+        if self._completion_breaker.state != CLOSED or remaining < COMPLETION_LATENCY_BUDGET_SECONDS:
+            return await self._basic_policy_search(message, fallback_reason)
+        return await self._enhanced_policy_response(
+            message, employee, context, fallback_reason, min(COMPLETION_TIMEOUT_SECONDS, remaining)
+        )
     
-    async def _enhanced_policy_response(self, message: str, employee: Dict, context: str) -> str:
-        """Enhanced policy response using database policies with AI formatting"""
+    async def _enhanced_policy_response(self, message: str, employee: Dict, context: str, fallback_reason: Optional[str] = None,
+                                        timeout: float = COMPLETION_TIMEOUT_SECONDS) -> str:
+        """Policy answer from a chat completion grounded in the sections most relevant to the question"""
         try:
-            # Get all policies from database
-            policies = await policies_collection.find().to_list(100)
+            # Send only the top-ranked policy sections instead of the whole corpus
+            chunks = await policy_cache.retrieve(message)
+            if not chunks:
+                return await self._basic_policy_search(message, "enhanced_policy_response:no_relevant_sections")
+            policy_context = format_chunk_context(chunks)
             
-            # Create a comprehensive policy context
-            policy_context = ""
-            for policy in policies:
-                policy_context += f"\n**{policy['title']}** ({policy['category']}):\n{policy['content']}\n\n"
+            context_tokens = estimate_tokens(policy_context)
+            retrieval_stats.record(context_tokens, policy_chunk_index.full_context_tokens)
+            print(f"Policy retrieval: {len(chunks)} sections, {context_tokens}/{policy_chunk_index.full_context_tokens} context tokens")
             
             # Use OpenAI to format response based on policies
-            response = openai.chat.completions.create(
+            response = await self._chat_completion(
+                "enhanced_policy_response",
+                fallback_reason,
+                timeout,
                 model="gpt-4",
                 messages=[
                     {
@@ -217,7 +389,7 @@ Question: {message}
                         
 You must answer policy questions using ONLY the information from the company policies provided below. Do not make up information or policies.
 
-Company HR Policies:
+Relevant Company HR Policy Sections:
 {policy_context}
 
 Employee Context:
@@ -249,15 +421,17 @@ Instructions:
             return response.choices[0].message.content
             
         except Exception as e:
-            print(f"Enhanced policy response error: {str(e)}")
+            if not isinstance(e, CircuitOpenError):
+                print(f"Enhanced policy response error: {str(e)}")
             # Final fallback to basic policy search
-            return await self._basic_policy_search(message)
+            return await self._basic_policy_search(message, fallback_label("enhanced_policy_response", e))
     
     async def _handle_regular_query(self, message: str, employee: Dict, context: str, session_id: str) -> Dict[str, Any]:
         """Handle non-policy questions with regular OpenAI"""
         try:
             # Use direct OpenAI API for non-policy questions
-            response = openai.chat.completions.create(
+            response = await self._chat_completion(
+                "regular_query",
                 model="gpt-4",
                 messages=[
                     {
@@ -298,45 +472,42 @@ Instructions:
             }
             
         except Exception as e:
-            print(f"Regular AI Service Error: {str(e)}")
-            return await self._fallback_response(message, employee['id'], context)
+            if not isinstance(e, CircuitOpenError):
+                print(f"Regular AI Service Error: {str(e)}")
+            # Rule-based answers are recorded as a local gateway call so fallbacks show up in the usage report
+            async with self.gateway.call("fallback_response", "local", fallback_reason=fallback_label("regular_query", e), limited=False):
+                return await self._fallback_response(message, employee['id'], context)
     
     
     
-    async def _basic_policy_search(self, message: str) -> str:
+    async def _basic_policy_search(self, message: str, fallback_reason: Optional[str] = None) -> str:
         """Basic policy search fallback"""
-        try:
-            policies = await policies_collection.find().to_list(100)
-            message_lower = message.lower()
-            
-            relevant_policies = []
-            for policy in policies:
-                if any(keyword in message_lower for keyword in ['leave', 'vacation', 'sick']) and policy['category'] == 'Leaves':
-                    relevant_policies.append(policy)
-                elif any(keyword in message_lower for keyword in ['travel', 'business trip']) and policy['category'] == 'Travel':
-                    relevant_policies.append(policy)
-                elif any(keyword in message_lower for keyword in ['salary', 'compensation', 'pay']) and policy['category'] == 'Compensation':
-                    relevant_policies.append(policy)
-                elif any(keyword in message_lower for keyword in ['conduct', 'rules', 'dress', 'hours']) and policy['category'] == 'Conduct':
-                    relevant_policies.append(policy)
-            
-            if relevant_policies:
-                response = "Here's what I found in our company policies:\n\n"
-                for policy in relevant_policies[:2]:
-                    response += f"**{policy['title']}**:\n{policy['content'][:300]}...\n\n"
-                response += "For complete policy details, please check the Policy Center."
-                return response
-            else:
-                return "I couldn't find specific policy information for your question. Please check the Policy Center or contact HR for detailed policy information."
+        async with self.gateway.call("basic_policy_search", "local", fallback_reason=fallback_reason, limited=False) as record:
+            try:
+                categories = classify(message).categories
+                policies = await policy_cache.all()
+                relevant_policies = [policy for policy in policies if policy['category'] in categories]
                 
-        except Exception as e:
-            print(f"Basic policy search error: {str(e)}")
-            return "I'm having trouble accessing policy information right now. Please check the Policy Center or contact HR directly."
+                if relevant_policies:
+                    response = "Here's what I found in our company policies:\n\n"
+                    for policy in relevant_policies[:2]:
+                        response += f"**{policy['title']}**:\n{policy['content'][:300]}...\n\n"
+                    response += "For complete policy details, please check the Policy Center."
+                    return response
+                else:
+                    record.outcome = "no_match"
+                    return "I couldn't find specific policy information for your question. Please check the Policy Center or contact HR for detailed policy information."
+                    
+            except Exception as e:
+                print(f"Basic policy search error: {str(e)}")
+                record.outcome = "error"
+                record.error = type(e).__name__
+                return "I'm having trouble accessing policy information right now. Please check the Policy Center or contact HR directly."
     
-    async def _handle_policy_fallback(self, message: str, employee_id: str, context: str) -> Dict[str, Any]:
+    async def _handle_policy_fallback(self, message: str, employee_id: str, context: str, fallback_reason: Optional[str] = None) -> Dict[str, Any]:
         """Fallback for policy questions when custom GPT fails"""
         try:
-            response_text = await self._basic_policy_search(message)
+            response_text = await self._basic_policy_search(message, fallback_reason)
             return {
                 "response": response_text,
                 "type": "policy"
@@ -345,52 +516,21 @@ Instructions:
             print(f"Policy fallback error: {str(e)}")
             return await self._fallback_response(message, employee_id, context)
     
-    async def _build_employee_context(self, employee_id: str, employee: Dict) -> str:
-        """Build context string with employee's current HR status"""
-        context_parts = []
-        
-        # Vacation balance
-        vacation_balance = await vacation_balances_collection.find_one({"employee_id": employee_id})
-        if vacation_balance:
-            context_parts.append(f"Vacation Days: {vacation_balance['remaining_days']}/{vacation_balance['total_days']} remaining")
-        
-        # Recent requests
-        recent_requests = await hr_requests_collection.find(
-            {"employee_id": employee_id}
-        ).sort("submitted_date", -1).limit(3).to_list(3)
-        
-        if recent_requests:
-            context_parts.append("Recent Requests:")
-            for req in recent_requests:
-                context_parts.append(f"- {req['type']}: {req['status']}")
-        
-        # Last salary payment
-        last_salary = await salary_payments_collection.find_one(
-            {"employee_id": employee_id},
-            sort=[("date", -1)]
-        )
-        if last_salary:
-            context_parts.append(f"Last Salary: {last_salary['amount']} SAR on {last_salary['date'].strftime('%Y-%m-%d')}")
-        
-        return "\n".join(context_parts)
-    
     def _determine_response_type(self, message: str) -> str:
         """Determine the type of response based on message content"""
-        message_lower = message.lower()
-        
-        if any(word in message_lower for word in ['request', 'submit', 'apply']):
-            return 'action'
-        elif any(word in message_lower for word in ['policy', 'rule', 'procedure']):
-            return 'policy'
-        else:
-            return 'query'
+        return classify(message).response_type
     
     async def _fallback_response(self, message: str, employee_id: str, context: str) -> Dict[str, Any]:
         """Fallback rule-based responses when AI fails"""
         message_lower = message.lower()
         
         if 'vacation' in message_lower and 'days' in message_lower:
-            vacation_balance = await vacation_balances_collection.find_one({"employee_id": employee_id})
+            # Reuse the balance fetched for this chat turn when it is still fresh
+            employee_context = employee_contexts.latest(employee_id)
+            if employee_context:
+                vacation_balance = employee_context["vacation_balance"]
+            else:
+                vacation_balance = await vacation_balances_collection.find_one({"employee_id": employee_id})
             if vacation_balance:
                 return {
                     "response": f"You currently have {vacation_balance['remaining_days']} vacation days remaining out of your annual {vacation_balance['total_days']}-day entitlement.",
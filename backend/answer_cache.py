@@ -0,0 +1,121 @@
+import os
+import time
+from collections import OrderedDict
+from typing import Dict, Any, FrozenSet, List, Optional, Set, Tuple
+
+import numpy as np
+
+from embeddings import embed_text
+from policy_search import tokenize
+
+# Maximum cached answers (least recently used entries are evicted first)
+ANSWER_CACHE_SIZE = int(os.environ.get("ANSWER_CACHE_SIZE", "500"))
+
+# Seconds a cached answer stays valid even if no policy changes
+ANSWER_CACHE_TTL_SECONDS = int(os.environ.get("ANSWER_CACHE_TTL_SECONDS", str(24 * 3600)))
+
+# Minimum cosine similarity for a near-duplicate question to reuse an answer. Only
+# questions with the same content terms are compared: the hashed n-gram embedding
+# scores "per diem in Riyadh" and "per diem in Jeddah" above any useful threshold.
+SIMILARITY_THRESHOLD = float(os.environ.get("ANSWER_CACHE_SIMILARITY", "0.9"))
+
+
+def normalize_question(question: str) -> str:
+    """Canonical form of a question: normalized, stemmed terms without stopwords"""
+    # Single digits are kept: "grade 5" and "grade 6" are different questions
+    return " ".join(tokenize(question, min_number_length=1))
+
+
+def content_terms(question: str) -> FrozenSet[str]:
+    """Set of a question's content terms (numbers, cities and grades included)"""
+    return frozenset(tokenize(question, min_number_length=1))
+
+
+class PolicyAnswerCache:
+    """Cache of Assistant answers to policy questions.
+
+    Answers are keyed by the normalized question plus the employee attributes
+    that change the answer (grade, department). Lookups try an exact key match
+    first, then the most similar cached question for the same grade and
+    department with exactly the same content terms (the same question with
+    other stopwords, casing or word order); questions differing in any term
+    never share an answer. Entries remember which policies they are about and
+    are dropped when any of those policies changes.
+    """
+
+    def __init__(self, max_entries: int = ANSWER_CACHE_SIZE, ttl_seconds: int = ANSWER_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Tuple[str, str, str], Dict[str, Any]]" = OrderedDict()
+        self.stats = {"exact_hits": 0, "similar_hits": 0, "misses": 0, "invalidated": 0}
+
+    def _expired(self, entry: Dict[str, Any]) -> bool:
+        return time.monotonic() - entry["created_at"] > self.ttl_seconds
+
+    def key(self, question: str, grade: str, department: str) -> Optional[Tuple[str, str, str]]:
+        """Cache key of a question, or None if nothing meaningful is left after normalization"""
+        normalized = normalize_question(question)
+        return (normalized, grade, department) if normalized else None
+
+    def lookup(self, question: str, grade: str, department: str) -> Optional[str]:
+        key = self.key(question, grade, department)
+        if key is None:
+            return None
+
+        entry = self._entries.get(key)
+        if entry and not self._expired(entry):
+            self._entries.move_to_end(key)
+            self.stats["exact_hits"] += 1
+            return entry["answer"]
+
+        # Near-duplicate lookup among answers for the same grade, department and content terms;
+        # a question differing in any term (city, grade, number, verb) is a different question
+        terms = content_terms(question)
+        candidates = [
+            (candidate_key, candidate) for candidate_key, candidate in self._entries.items()
+            if candidate_key[1:] == key[1:] and candidate["terms"] == terms and not self._expired(candidate)
+        ]
+        if candidates:
+            vectors = np.vstack([candidate["vector"] for _, candidate in candidates])
+            similarities = vectors @ embed_text(question)
+            best = int(np.argmax(similarities))
+            if similarities[best] >= SIMILARITY_THRESHOLD:
+                best_key = candidates[best][0]
+                self._entries.move_to_end(best_key)
+                self.stats["similar_hits"] += 1
+                return candidates[best][1]["answer"]
+
+        self.stats["misses"] += 1
+        return None
+
+    def store(self, question: str, grade: str, department: str, answer: str, policy_ids: List[str]):
+        key = self.key(question, grade, department)
+        if key is None:
+            return
+        self._entries[key] = {
+            "answer": answer,
+            "vector": embed_text(question),
+            "terms": content_terms(question),
+            "policy_ids": set(policy_ids),
+            "created_at": time.monotonic()
+        }
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def invalidate_policies(self, changed_ids: Set[str]):
+        """Drop answers that reference any changed policy (policy cache listener)"""
+        stale = [
+            key for key, entry in self._entries.items()
+            # Answers not tied to a specific policy may depend on any of them
+            if not entry["policy_ids"] or entry["policy_ids"] & changed_ids
+        ]
+        for key in stale:
+            del self._entries[key]
+        self.stats["invalidated"] += len(stale)
+
+    def summary(self) -> Dict[str, Any]:
+        return {"entries": len(self._entries), **self.stats}
+
+
+policy_answer_cache = PolicyAnswerCache()
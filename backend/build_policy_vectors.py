@@ -0,0 +1,35 @@
+"""Embed the policy corpus into the memory-mapped vector file served by policy_vectors.
+
+Usage (from the backend directory):
+    python build_policy_vectors.py [--model NAME] [--dtype float16|int8]
+
+Rerun after policies change; servers ignore a file built from a different corpus.
+"""
+from pathlib import Path
+from dotenv import load_dotenv
+import argparse
+import asyncio
+
+# Load environment variables first, before other imports
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+from database import policies_collection
+from policy_retrieval import chunk_policies
+from policy_vectors import POLICY_EMBEDDING_MODEL, POLICY_VECTORS_PATH, VECTOR_DTYPES, build_vector_file
+
+
+async def main(model_name: str, dtype: str):
+    # Same ordering as the policy cache, so chunk ids line up with the served corpus
+    policies = await policies_collection.find({}, {"_id": 0}).sort("id", 1).to_list(None)
+    chunks = chunk_policies(policies)
+    meta = await asyncio.to_thread(build_vector_file, chunks, POLICY_VECTORS_PATH, model_name, dtype)
+    print(f"✅ Wrote {meta['count']} policy vectors ({meta['model']}, {meta['dtype']}, dim {meta['dim']}) to {POLICY_VECTORS_PATH}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", default=POLICY_EMBEDDING_MODEL)
+    parser.add_argument("--dtype", default="float16", choices=VECTOR_DTYPES)
+    args = parser.parse_args()
+    asyncio.run(main(args.model, args.dtype))
@@ -0,0 +1,188 @@
+import os
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Any, Deque, Iterator, Optional, Tuple
+
+from metrics import register_collector
+
+# Share of failed or over-budget calls in the window that opens the breaker
+BREAKER_ERROR_RATE = float(os.environ.get("AI_BREAKER_ERROR_RATE", "0.5"))
+
+# Length of the rolling window the error rate is computed over
+BREAKER_WINDOW_SECONDS = float(os.environ.get("AI_BREAKER_WINDOW_SECONDS", "60"))
+
+# Calls needed in the window before the error rate can open the breaker
+BREAKER_MIN_CALLS = int(os.environ.get("AI_BREAKER_MIN_CALLS", "5"))
+
+# Seconds an open breaker rejects calls before letting a probe through
+BREAKER_OPEN_SECONDS = float(os.environ.get("AI_BREAKER_OPEN_SECONDS", "30"))
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose breaker is open"""
+
+    def __init__(self, name: str):
+        super().__init__(f"{name} circuit is open")
+        self.name = name
+
+
+class _Call:
+    """Timer for one guarded call"""
+
+    def __init__(self):
+        self.started = time.monotonic()
+
+    def restart(self):
+        """Start timing now, so local queueing is not counted against the upstream's budget"""
+        self.started = time.monotonic()
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+
+class CircuitBreaker:
+    """Rolling error-rate circuit breaker with a latency budget.
+
+    Calls that raise, or that succeed but take longer than latency_budget,
+    count as failures. Once at least min_calls were made in the window and
+    the failure share reaches error_rate, the breaker opens and rejects calls
+    for open_seconds. It then lets a single probe through: a good probe
+    closes it, a bad one opens it again.
+    """
+
+    def __init__(self, name: str, latency_budget: float, error_rate: float = BREAKER_ERROR_RATE,
+                 window_seconds: float = BREAKER_WINDOW_SECONDS, min_calls: int = BREAKER_MIN_CALLS,
+                 open_seconds: float = BREAKER_OPEN_SECONDS):
+        self.name = name
+        self.latency_budget = latency_budget
+        self.error_rate = error_rate
+        self.window_seconds = window_seconds
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self.state = CLOSED
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._calls: Deque[Tuple[float, bool]] = deque()
+        self.counters = {"success": 0, "failure": 0, "slow": 0, "rejected": 0, "opened": 0}
+
+    def _trim(self, now: float):
+        while self._calls and now - self._calls[0][0] > self.window_seconds:
+            self._calls.popleft()
+
+    def window_error_rate(self) -> float:
+        self._trim(time.monotonic())
+        if not self._calls:
+            return 0.0
+        return sum(1 for _, ok in self._calls if not ok) / len(self._calls)
+
+    def allow(self) -> bool:
+        """Whether a call may go upstream now; in half-open state only one probe at a time"""
+        if self.state == OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+            self.state = HALF_OPEN
+        if self.state == CLOSED:
+            return True
+        if self.state == HALF_OPEN and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+        self.counters["rejected"] += 1
+        return False
+
+    def _open(self, now: float):
+        if self.state != OPEN:
+            self.counters["opened"] += 1
+            print(f"⚠️ {self.name} circuit opened (error rate {self.window_error_rate():.0%})")
+        self.state = OPEN
+        self._opened_at = now
+
+    def record(self, ok: bool, latency: float):
+        now = time.monotonic()
+        slow = ok and latency > self.latency_budget
+        if slow:
+            self.counters["slow"] += 1
+        self.counters["success" if ok else "failure"] += 1
+        ok = ok and not slow
+
+        if self.state == HALF_OPEN:
+            self._probe_in_flight = False
+            if ok:
+                print(f"✅ {self.name} circuit closed after a successful probe")
+                self.state = CLOSED
+                self._calls.clear()
+            else:
+                self._open(now)
+            return
+
+        self._calls.append((now, ok))
+        self._trim(now)
+        if len(self._calls) >= self.min_calls and self.window_error_rate() >= self.error_rate:
+            self._open(now)
+
+    def release(self):
+        """Forget a call that ended without an outcome, e.g. a client disconnect"""
+        if self.state == HALF_OPEN:
+            self._probe_in_flight = False
+
+    @contextmanager
+    def guard(self) -> Iterator["_Call"]:
+        """Run a block as one call through the breaker, raising CircuitOpenError when it is open"""
+        if not self.allow():
+            raise CircuitOpenError(self.name)
+        call = _Call()
+        try:
+            yield call
+        except Exception:
+            self.record(False, call.elapsed())
+            raise
+        except BaseException:
+            # Cancellation and generator close say nothing about upstream health
+            self.release()
+            raise
+        self.record(True, call.elapsed())
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "error_rate": round(self.window_error_rate(), 4),
+            "window_calls": len(self._calls),
+            "latency_budget_seconds": self.latency_budget,
+            **self.counters
+        }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def get_breaker(name: str, latency_budget: float) -> CircuitBreaker:
+    """Process-wide breaker for an upstream stage, created on first use"""
+    breaker: Optional[CircuitBreaker] = _breakers.get(name)
+    if breaker is None:
+        breaker = _breakers[name] = CircuitBreaker(name, latency_budget)
+    return breaker
+
+
+def breaker_summaries() -> Dict[str, Dict[str, Any]]:
+    return {name: breaker.summary() for name, breaker in _breakers.items()}
+
+
+def _collect_metrics():
+    yield "ai_circuit_state", "gauge", "Circuit state (0 closed, 1 half-open, 2 open)", [
+        ({"stage": name}, STATE_VALUES[breaker.state]) for name, breaker in _breakers.items()
+    ]
+    yield "ai_circuit_error_rate", "gauge", "Failed or over-budget share of calls in the rolling window", [
+        ({"stage": name}, breaker.window_error_rate()) for name, breaker in _breakers.items()
+    ]
+    yield "ai_circuit_calls_total", "counter", "Calls through the circuit by outcome", [
+        ({"stage": name, "outcome": outcome}, breaker.counters[outcome])
+        for name, breaker in _breakers.items()
+        for outcome in ("success", "failure", "slow", "rejected")
+    ]
+    yield "ai_circuit_opened_total", "counter", "Times the circuit opened", [
+        ({"stage": name}, breaker.counters["opened"]) for name, breaker in _breakers.items()
+    ]
+
+
+register_collector(_collect_metrics)
@@ -0,0 +1,228 @@
+import asyncio
+import time
+from collections import deque
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+from pymongo import ReplaceOne
+
+from database import employees_collection, vacation_balances_collection, hr_requests_collection, salary_payments_collection, dashboard_snapshots_collection
+
+# Statuses that count as "pending" on the dashboard
+PENDING_STATUSES = ["Pending Approval", "Under Review"]
+
+# Statuses that make a business trip show up as the current trip
+ACTIVE_TRIP_STATUSES = ["Approved", "Pending Approval"]
+
+# Number of recent samples kept per stage for percentile reporting
+TIMING_WINDOW = 1000
+
+# How many employees are assembled concurrently during a bulk snapshot rebuild
+REBUILD_BATCH_SIZE = 200
+
+
+class StageTimings:
+    """Rolling per-stage latency samples for the dashboard assembly"""
+
+    def __init__(self, window: int = TIMING_WINDOW):
+        self.window = window
+        self._samples: Dict[str, deque] = {}
+
+    def record(self, stage: str, elapsed_ms: float):
+        if stage not in self._samples:
+            self._samples[stage] = deque(maxlen=self.window)
+        self._samples[stage].append(elapsed_ms)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Return count and p50/p95/p99/max in milliseconds for every stage"""
+        result = {}
+        for stage, samples in self._samples.items():
+            ordered = sorted(samples)
+            if not ordered:
+                continue
+            result[stage] = {
+                "count": len(ordered),
+                "p50": _percentile(ordered, 50),
+                "p95": _percentile(ordered, 95),
+                "p99": _percentile(ordered, 99),
+                "max": ordered[-1]
+            }
+        return result
+
+
+def _percentile(ordered: List[float], pct: float) -> float:
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return round(ordered[index], 3)
+
+
+dashboard_timings = StageTimings()
+
+
+async def _timed(stage: str, coro, timings: Dict[str, float]):
+    """Await a lookup and record how long it took under the given stage name"""
+    started = time.perf_counter()
+    try:
+        return await coro
+    finally:
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        timings[stage] = round(elapsed_ms, 3)
+        dashboard_timings.record(stage, elapsed_ms)
+
+
+def _format_pending_requests(pending_requests: List[Dict]) -> List[Dict[str, Any]]:
+    formatted_requests = []
+    for req in pending_requests:
+        formatted_requests.append({
+            "id": req["id"],
+            "type": req["type"],
+            "status": req["status"],
+            "submittedDate": req["submitted_date"].isoformat(),
+            "startDate": req.get("start_date") or req.get("departure_date"),
+            "destination": req.get("destination"),
+            "amount": req.get("amount")
+        })
+    return formatted_requests
+
+
+def _format_salary_payment(last_salary: Optional[Dict]) -> Dict[str, Any]:
+    return {
+        "amount": last_salary["amount"],
+        "date": last_salary["date"].isoformat(),
+        "status": last_salary["status"]
+    } if last_salary else {"amount": 0, "date": "", "status": ""}
+
+
+def _format_trip_status(business_trip: Optional[Dict]) -> Dict[str, Any]:
+    return {
+        "current": business_trip.get("destination", "No active trip"),
+        "status": business_trip.get("status", "None"),
+        "startDate": business_trip.get("departure_date", ""),
+        "endDate": business_trip.get("return_date", "")
+    } if business_trip else {
+        "current": "No active trip",
+        "status": "None",
+        "startDate": "",
+        "endDate": ""
+    }
+
+
+async def assemble_dashboard(employee_id: str) -> Optional[Dict[str, Any]]:
+    """Run all dashboard lookups concurrently and build the dashboard payload.
+
+    Returns None when the employee does not exist. The payload carries a
+    ``timings`` dict with the per-stage latency in milliseconds.
+    """
+    timings: Dict[str, float] = {}
+    started = time.perf_counter()
+
+    employee, vacation_balance, pending_requests, last_salary, business_trip = await asyncio.gather(
+        _timed("employee", employees_collection.find_one({"id": employee_id}, {"_id": 0, "id": 1}), timings),
+        _timed("vacation_balance", vacation_balances_collection.find_one({"employee_id": employee_id}), timings),
+        _timed("pending_requests", hr_requests_collection.find({
+            "employee_id": employee_id,
+            "status": {"$in": PENDING_STATUSES}
+        }).sort("submitted_date", -1).to_list(10), timings),
+        _timed("last_salary", salary_payments_collection.find_one(
+            {"employee_id": employee_id},
+            sort=[("date", -1)]
+        ), timings),
+        _timed("business_trip", hr_requests_collection.find_one({
+            "employee_id": employee_id,
+            "type": "Business Trip",
+            "status": {"$in": ACTIVE_TRIP_STATUSES}
+        }, sort=[("submitted_date", -1)]), timings)
+    )
+
+    total_ms = (time.perf_counter() - started) * 1000
+    timings["total"] = round(total_ms, 3)
+    dashboard_timings.record("total", total_ms)
+
+    if not employee:
+        return None
+
+    # Mock upcoming events (could be enhanced with actual event system)
+    upcoming_events = [
+        {"type": "Performance Review", "date": "2025-01-30"},
+        {"type": "Team Meeting", "date": "2025-01-15"}
+    ]
+
+    return {
+        "vacationDaysLeft": vacation_balance["remaining_days"] if vacation_balance else 0,
+        "pendingRequests": _format_pending_requests(pending_requests),
+        "lastSalaryPayment": _format_salary_payment(last_salary),
+        "businessTripStatus": _format_trip_status(business_trip),
+        "upcomingEvents": upcoming_events,
+        "timings": timings
+    }
+
+
+# Materialized dashboard snapshots
+def _snapshot_document(employee_id: str, dashboard: Dict[str, Any]) -> Dict[str, Any]:
+    data = dict(dashboard)
+    data.pop("timings", None)
+    return {
+        "employee_id": employee_id,
+        "data": data,
+        "updated_at": datetime.utcnow()
+    }
+
+
+async def refresh_dashboard_snapshot(employee_id: str) -> Optional[Dict[str, Any]]:
+    """Rebuild and store the dashboard snapshot for one employee (write-through)"""
+    dashboard = await assemble_dashboard(employee_id)
+    if not dashboard:
+        await dashboard_snapshots_collection.delete_one({"employee_id": employee_id})
+        return None
+    
+    snapshot = _snapshot_document(employee_id, dashboard)
+    await dashboard_snapshots_collection.replace_one(
+        {"employee_id": employee_id},
+        snapshot,
+        upsert=True
+    )
+    return snapshot["data"]
+
+
+async def get_dashboard_snapshot(employee_id: str) -> Optional[Dict[str, Any]]:
+    """Serve the dashboard from its snapshot, building it on first access"""
+    started = time.perf_counter()
+    snapshot = await dashboard_snapshots_collection.find_one(
+        {"employee_id": employee_id},
+        {"_id": 0, "data": 1}
+    )
+    dashboard_timings.record("snapshot", (time.perf_counter() - started) * 1000)
+    
+    if snapshot:
+        return snapshot["data"]
+    return await refresh_dashboard_snapshot(employee_id)
+
+
+async def rebuild_all_snapshots(batch_size: int = REBUILD_BATCH_SIZE) -> int:
+    """Regenerate every employee's snapshot in bulk, e.g. after a migration"""
+    rebuilt = 0
+    batch: List[str] = []
+    
+    async def flush(employee_ids: List[str]) -> int:
+        dashboards = await asyncio.gather(*(assemble_dashboard(emp_id) for emp_id in employee_ids))
+        operations = [
+            ReplaceOne({"employee_id": emp_id}, _snapshot_document(emp_id, dashboard), upsert=True)
+            for emp_id, dashboard in zip(employee_ids, dashboards)
+            if dashboard
+        ]
+        if operations:
+            await dashboard_snapshots_collection.bulk_write(operations, ordered=False)
+        return len(operations)
+    
+    async for employee in employees_collection.find({}, {"_id": 0, "id": 1}):
+        batch.append(employee["id"])
+        if len(batch) >= batch_size:
+            rebuilt += await flush(batch)
+            batch = []
+    if batch:
+        rebuilt += await flush(batch)
+    
+    # Drop snapshots of employees that no longer exist
+    employee_ids = await employees_collection.distinct("id")
+    await dashboard_snapshots_collection.delete_many({"employee_id": {"$nin": employee_ids}})
+    
+    return rebuilt
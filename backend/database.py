@@ -15,6 +15,8 @@ chat_messages_collection = db.chat_messages
 vacation_balances_collection = db.vacation_balances
 salary_payments_collection = db.salary_payments
 sessions_collection = db.sessions
+dashboard_snapshots_collection = db.dashboard_snapshots
+assistant_threads_collection = db.assistant_threads
 
 async def init_database():
     """Initialize database with sample data"""
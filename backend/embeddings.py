@@ -0,0 +1,47 @@
+import zlib
+from typing import List
+
+import numpy as np
+
+from policy_search import normalize_text, tokenize
+
+# Dimensionality of the hashed n-gram embedding space
+EMBEDDING_DIM = 512
+
+# Character n-gram sizes; short grams make the vectors robust to Arabic/English inflection
+NGRAM_SIZES = (3, 4)
+
+EMBEDDING_MODEL_NAME = f"hashed-char-ngrams-{EMBEDDING_DIM}"
+
+
+def _features(text: str) -> List[str]:
+    features = []
+    for token in tokenize(text):
+        features.append(f"w:{token}")
+        padded = f"<{token}>"
+        for size in NGRAM_SIZES:
+            features.extend(padded[i:i + size] for i in range(max(1, len(padded) - size + 1)))
+    return features
+
+
+def embed_text(text: str) -> np.ndarray:
+    """Deterministic, dependency-free text embedding (unit-length float32 vector).
+
+    Uses signed feature hashing of words and character n-grams, so identical
+    text always maps to the same vector across processes and machines.
+    """
+    vector = np.zeros(EMBEDDING_DIM, dtype=np.float32)
+    for feature in _features(normalize_text(text)):
+        digest = zlib.crc32(feature.encode("utf-8"))
+        sign = 1.0 if digest & 1 else -1.0
+        vector[(digest >> 1) % EMBEDDING_DIM] += sign
+    norm = np.linalg.norm(vector)
+    if norm:
+        vector /= norm
+    return vector
+
+
+def embed_texts(texts: List[str]) -> np.ndarray:
+    if not texts:
+        return np.zeros((0, EMBEDDING_DIM), dtype=np.float32)
+    return np.vstack([embed_text(text) for text in texts])
@@ -0,0 +1,105 @@
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+
+from database import employees_collection, vacation_balances_collection, hr_requests_collection, salary_payments_collection
+
+# Seconds a fetched context is reused for further chat turns of the same session
+CONTEXT_TTL_SECONDS = float(os.environ.get("EMPLOYEE_CONTEXT_TTL_SECONDS", "30"))
+
+# Memoized contexts kept per worker
+CONTEXT_CACHE_SIZE = 1000
+
+
+def format_context(vacation_balance: Optional[Dict], recent_requests: List[Dict], last_salary: Optional[Dict]) -> str:
+    """Context string with the employee's current HR status for AI prompts"""
+    context_parts = []
+
+    if vacation_balance:
+        context_parts.append(f"Vacation Days: {vacation_balance['remaining_days']}/{vacation_balance['total_days']} remaining")
+
+    if recent_requests:
+        context_parts.append("Recent Requests:")
+        for req in recent_requests:
+            context_parts.append(f"- {req['type']}: {req['status']}")
+
+    if last_salary:
+        context_parts.append(f"Last Salary: {last_salary['amount']} SAR on {last_salary['date'].strftime('%Y-%m-%d')}")
+
+    return "\n".join(context_parts)
+
+
+class EmployeeContextService:
+    """Fetches everything the AI assistant needs about an employee in one concurrent fan-out.
+
+    Results are memoized per (employee, session) for CONTEXT_TTL_SECONDS so a
+    burst of chat turns reuses them. Writes that change an employee's HR data
+    should call invalidate().
+    """
+
+    def __init__(self, ttl_seconds: float = CONTEXT_TTL_SECONDS, max_entries: int = CONTEXT_CACHE_SIZE):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, Optional[str]], Dict[str, Any]]" = OrderedDict()
+
+    async def _fetch(self, employee_id: str) -> Optional[Dict[str, Any]]:
+        employee, vacation_balance, recent_requests, last_salary = await asyncio.gather(
+            employees_collection.find_one({"id": employee_id}),
+            vacation_balances_collection.find_one({"employee_id": employee_id}),
+            hr_requests_collection.find(
+                {"employee_id": employee_id}
+            ).sort("submitted_date", -1).limit(3).to_list(3),
+            salary_payments_collection.find_one(
+                {"employee_id": employee_id},
+                sort=[("date", -1)]
+            )
+        )
+        if not employee:
+            return None
+
+        return {
+            "employee": employee,
+            "vacation_balance": vacation_balance,
+            "recent_requests": recent_requests,
+            "last_salary": last_salary,
+            "summary": format_context(vacation_balance, recent_requests, last_salary),
+            "fetched_at": time.monotonic()
+        }
+
+    def _fresh(self, key: Tuple[str, Optional[str]]) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry and time.monotonic() - entry["fetched_at"] <= self.ttl_seconds:
+            self._entries.move_to_end(key)
+            return entry
+        self._entries.pop(key, None)
+        return None
+
+    async def get(self, employee_id: str, session_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Employee document, vacation balance, last three requests, last salary and prompt summary"""
+        key = (employee_id, session_id)
+        entry = self._fresh(key)
+        if entry:
+            return entry
+
+        entry = await self._fetch(employee_id)
+        if entry:
+            self._entries[key] = entry
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def latest(self, employee_id: str) -> Optional[Dict[str, Any]]:
+        """Most recent fresh context for the employee from any session, without a database read"""
+        for key in reversed(self._entries):
+            if key[0] == employee_id:
+                return self._fresh(key)
+        return None
+
+    def invalidate(self, employee_id: str):
+        for key in [key for key in self._entries if key[0] == employee_id]:
+            del self._entries[key]
+
+
+employee_contexts = EmployeeContextService()
@@ -0,0 +1,169 @@
+import os
+from datetime import datetime
+from typing import Dict, Any, List
+
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING
+
+from database import db
+
+# Declarative index registry. Compound keys follow the equality-sort-range
+# order of the filter+sort shapes used in server.py, dashboard.py and ai_service.py.
+INDEX_REGISTRY: List[Dict[str, Any]] = [
+    {"collection": "employees", "name": "employees_id", "keys": [("id", ASCENDING)], "unique": True},
+    {"collection": "hr_requests", "name": "hr_requests_id", "keys": [("id", ASCENDING)], "unique": True},
+    {
+        "collection": "hr_requests",
+        "name": "hr_requests_employee_submitted_status",
+        "keys": [("employee_id", ASCENDING), ("submitted_date", DESCENDING), ("status", ASCENDING)]
+    },
+    {
+        "collection": "hr_requests",
+        "name": "hr_requests_employee_type_submitted_status",
+        "keys": [("employee_id", ASCENDING), ("type", ASCENDING), ("submitted_date", DESCENDING), ("status", ASCENDING)]
+    },
+    {"collection": "hr_requests", "name": "hr_requests_status", "keys": [("status", ASCENDING)]},
+    {"collection": "vacation_balances", "name": "vacation_balances_employee", "keys": [("employee_id", ASCENDING)]},
+    {
+        "collection": "salary_payments",
+        "name": "salary_payments_employee_date",
+        "keys": [("employee_id", ASCENDING), ("date", DESCENDING)]
+    },
+    {"collection": "policies", "name": "policies_id", "keys": [("id", ASCENDING)], "unique": True},
+    {"collection": "policies", "name": "policies_category", "keys": [("category", ASCENDING)]},
+    {
+        "collection": "chat_messages",
+        "name": "chat_messages_employee_timestamp",
+        "keys": [("employee_id", ASCENDING), ("timestamp", DESCENDING)]
+    },
+    {
+        "collection": "chat_messages",
+        "name": "chat_messages_employee_session_timestamp",
+        "keys": [("employee_id", ASCENDING), ("session_id", ASCENDING), ("timestamp", DESCENDING)]
+    },
+    {"collection": "dashboard_snapshots", "name": "dashboard_snapshots_employee", "keys": [("employee_id", ASCENDING)], "unique": True},
+    {"collection": "assistant_threads", "name": "assistant_threads_session", "keys": [("session_id", ASCENDING)], "unique": True},
+    {"collection": "assistant_threads", "name": "assistant_threads_expiry", "keys": [("expires_at", ASCENDING)], "expireAfterSeconds": 0},
+    {"collection": "sessions", "name": "sessions_id", "keys": [("id", ASCENDING)]},
+    {"collection": "sessions", "name": "sessions_token", "keys": [("session_token", ASCENDING)]},
+]
+
+# Endpoint queries whose plans must be index-backed. Filter values are
+# representative only; the planner chooses the plan from the query shape.
+AUDITED_QUERIES: List[Dict[str, Any]] = [
+    {"name": "get_employee", "collection": "employees", "filter": {"id": "EMP001"}},
+    {
+        "name": "list_employees_page",
+        "collection": "employees",
+        "filter": {"_id": {"$gt": ObjectId("000000000000000000000000")}},
+        "sort": [("_id", ASCENDING)]
+    },
+    {
+        "name": "get_hr_requests",
+        "collection": "hr_requests",
+        "filter": {"employee_id": "EMP001"},
+        "sort": [("submitted_date", DESCENDING)]
+    },
+    {
+        "name": "dashboard_pending_requests",
+        "collection": "hr_requests",
+        "filter": {"employee_id": "EMP001", "status": {"$in": ["Pending Approval", "Under Review"]}},
+        "sort": [("submitted_date", DESCENDING)]
+    },
+    {
+        "name": "dashboard_business_trip",
+        "collection": "hr_requests",
+        "filter": {"employee_id": "EMP001", "type": "Business Trip", "status": {"$in": ["Approved", "Pending Approval"]}},
+        "sort": [("submitted_date", DESCENDING)]
+    },
+    {"name": "update_request_status", "collection": "hr_requests", "filter": {"id": "REQ001"}},
+    {"name": "admin_pending_count", "collection": "hr_requests", "filter": {"status": "Pending Approval"}},
+    {"name": "vacation_balance", "collection": "vacation_balances", "filter": {"employee_id": "EMP001"}},
+    {
+        "name": "salary_payments",
+        "collection": "salary_payments",
+        "filter": {"employee_id": "EMP001"},
+        "sort": [("date", DESCENDING)]
+    },
+    {"name": "get_policy", "collection": "policies", "filter": {"id": "POL001"}},
+    {"name": "get_policies_by_category", "collection": "policies", "filter": {"category": "Leaves"}},
+    {
+        "name": "chat_history",
+        "collection": "chat_messages",
+        "filter": {"employee_id": "EMP001"},
+        "sort": [("timestamp", DESCENDING)]
+    },
+    {
+        "name": "chat_history_session",
+        "collection": "chat_messages",
+        "filter": {"employee_id": "EMP001", "session_id": "session"},
+        "sort": [("timestamp", DESCENDING)]
+    },
+    {"name": "dashboard_snapshot", "collection": "dashboard_snapshots", "filter": {"employee_id": "EMP001"}},
+    {"name": "assistant_thread", "collection": "assistant_threads", "filter": {"session_id": "session", "expires_at": {"$gt": datetime(2025, 1, 1)}}},
+    {
+        "name": "session_expiry",
+        "collection": "sessions",
+        "filter": {"$or": [{"id": "session"}, {"session_token": "session"}], "is_active": True}
+    },
+]
+
+
+class QueryPlanAuditError(RuntimeError):
+    """Raised when an audited query is planned as a collection scan"""
+
+
+async def ensure_indexes() -> List[str]:
+    """Create every registered index. Safe to run on every startup."""
+    created = []
+    for spec in INDEX_REGISTRY:
+        options = {key: value for key, value in spec.items() if key not in ("collection", "keys")}
+        name = await db[spec["collection"]].create_index(spec["keys"], **options)
+        created.append(f"{spec['collection']}.{name}")
+    return created
+
+
+def _plan_stages(plan: Any) -> List[str]:
+    """Collect every stage name in an explain() plan tree"""
+    stages = []
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            stages.append(plan["stage"])
+        for value in plan.values():
+            stages.extend(_plan_stages(value))
+    elif isinstance(plan, list):
+        for item in plan:
+            stages.extend(_plan_stages(item))
+    return stages
+
+
+async def audit_query_plans() -> List[Dict[str, Any]]:
+    """Explain every audited query and report the stages of its winning plan"""
+    report = []
+    for query in AUDITED_QUERIES:
+        cursor = db[query["collection"]].find(query["filter"])
+        if query.get("sort"):
+            cursor = cursor.sort(query["sort"])
+        explanation = await cursor.explain()
+        stages = _plan_stages(explanation.get("queryPlanner", {}).get("winningPlan", {}))
+        report.append({
+            "name": query["name"],
+            "collection": query["collection"],
+            "stages": stages,
+            "collscan": "COLLSCAN" in stages
+        })
+    return report
+
+
+async def enforce_query_plans():
+    """Fail if any audited query plan uses COLLSCAN"""
+    report = await audit_query_plans()
+    offenders = [entry for entry in report if entry["collscan"]]
+    if offenders:
+        details = ", ".join(f"{entry['name']} ({entry['collection']})" for entry in offenders)
+        raise QueryPlanAuditError(f"Collection scans in audited query plans: {details}")
+    print(f"✅ Query plan audit passed for {len(report)} queries")
+
+
+def audit_enabled() -> bool:
+    return os.environ.get("INDEX_AUDIT", "").lower() in ("1", "true", "yes")
@@ -0,0 +1,88 @@
+from functools import lru_cache
+from typing import List, NamedTuple, Tuple
+
+# Phrases that make a message a policy question (English and Arabic)
+POLICY_KEYWORDS = [
+    # English keywords
+    'policy', 'policies', 'rule', 'rules', 'procedure', 'procedures',
+    'leave policy', 'vacation policy', 'sick leave policy', 'travel policy',
+    'compensation policy', 'salary policy', 'work rules', 'conduct',
+    'what is the policy', 'policy on', 'company policy', 'hr policy',
+    'annual leave', 'sick leave', 'maternity leave', 'business travel',
+    'end of service', 'performance management', 'recruitment',
+    'vacation days', 'vacation entitlement', 'how many vacation',
+    'travel allowance', 'travel allowances', 'business trip allowance',
+    'dress code', 'working hours', 'work hours', 'overtime',
+    'probation period', 'end of service benefit', 'service benefit',
+    'maternity policy', 'paternity leave', 'bereavement leave',
+
+    # Arabic keywords
+    'سياسة', 'سياسات', 'قواعد', 'قانون', 'إجراءات', 'لوائح',
+    'إجازة', 'إجازات', 'إجازة سنوية', 'إجازة مرضية', 'إجازة أمومة',
+    'انتداب', 'سفر', 'راتب', 'رواتب', 'مزايا', 'تعويضات',
+    'نهاية الخدمة', 'مكافأة', 'توظيف', 'تطوير', 'أداء',
+    'ما هي السياسة', 'سياسة الشركة', 'قواعد العمل',
+    'كم يوم إجازة', 'أيام الإجازة', 'بدل سفر', 'ساعات العمل'
+]
+
+# Words that make a response an action or a policy answer (checked in that order)
+ACTION_KEYWORDS = ['request', 'submit', 'apply']
+POLICY_TERM_KEYWORDS = ['policy', 'rule', 'procedure']
+
+# Phrases that tie a question to the asker's own data, so its answer must not be shared.
+# Messages are padded with spaces, so a leading/trailing space acts as a word boundary.
+PERSONAL_KEYWORDS = [
+    ' my ', ' me ', ' mine', ' i have', ' left', ' remaining', ' balance',
+    'لدي', 'عندي', 'رصيدي', 'متبقي', 'باقي', 'راتبي', 'طلبي', 'طلباتي'
+]
+
+# Policy categories and the words that point to them
+CATEGORY_KEYWORDS = {
+    'Leaves': ['leave', 'vacation', 'sick'],
+    'Travel': ['travel', 'business trip'],
+    'Compensation': ['salary', 'compensation', 'pay'],
+    'Conduct': ['conduct', 'rules', 'dress', 'hours'],
+}
+
+
+class Intent(NamedTuple):
+    is_policy: bool
+    response_type: str  # action, policy or query
+    categories: Tuple[str, ...]
+    personal: bool
+
+
+def _contains_any(text: str, keywords: List[str]) -> bool:
+    return any(keyword in text for keyword in keywords)
+
+
+# One chat turn classifies its message several times (policy check, shareability,
+# response type, category match) around awaits where other turns interleave, so the
+# memo only has to hold the messages of the turns in flight. 256 is many times the
+# turns the Assistant limiter (AI_MAX_CONCURRENCY) lets through at once; the bound
+# keeps arbitrary user text from growing the memo, and an evicted message only
+# costs one more keyword scan.
+CLASSIFY_CACHE_SIZE = 256
+
+
+@lru_cache(maxsize=CLASSIFY_CACHE_SIZE)
+def classify(message: str) -> Intent:
+    """Policy/action/query intent and matched policy categories of a chat message.
+
+    Memoized, so the several checks made for one chat turn share a single scan.
+    """
+    text = message.lower()
+
+    if _contains_any(text, ACTION_KEYWORDS):
+        response_type = "action"
+    elif _contains_any(text, POLICY_TERM_KEYWORDS):
+        response_type = "policy"
+    else:
+        response_type = "query"
+
+    return Intent(
+        is_policy=_contains_any(text, POLICY_KEYWORDS),
+        response_type=response_type,
+        categories=tuple(category for category, keywords in CATEGORY_KEYWORDS.items() if _contains_any(text, keywords)),
+        personal=_contains_any(f" {text} ", PERSONAL_KEYWORDS)
+    )
@@ -0,0 +1,246 @@
+import asyncio
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager, nullcontext
+from typing import Dict, Any, AsyncIterator, Awaitable, Callable, Deque, Optional, Tuple, TypeVar
+
+from openai import APIConnectionError, APITimeoutError, InternalServerError, RateLimitError
+
+from circuit_breaker import CircuitBreaker, CircuitOpenError
+from metrics import register_collector
+from single_flight import CoalescedCallFailed
+
+# Attempts after the first for transient upstream errors (the SDK's own retries are disabled)
+LLM_MAX_RETRIES = int(os.environ.get("LLM_MAX_RETRIES", "2"))
+
+# First retry delay; doubles on each further attempt
+LLM_RETRY_BASE_SECONDS = 0.5
+
+# Per-call records kept for the admin endpoint
+RECENT_CALLS = 200
+
+# USD per 1K (prompt, completion) tokens, for cost estimates
+MODEL_PRICES_PER_1K = {
+    "gpt-4": (0.03, 0.06),
+    "gpt-4-turbo": (0.01, 0.03),
+    "gpt-4o": (0.0025, 0.01),
+    "gpt-4o-mini": (0.00015, 0.0006),
+    "gpt-4.1": (0.002, 0.008),
+    "gpt-4.1-mini": (0.0004, 0.0016),
+}
+
+RETRYABLE_ERRORS = (RateLimitError, APIConnectionError, APITimeoutError, InternalServerError)
+
+T = TypeVar("T")
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    """Estimated USD cost, using the longest price-table entry the model name starts with"""
+    matches = [name for name in MODEL_PRICES_PER_1K if model.startswith(name)]
+    if not matches:
+        return 0.0
+    prompt_price, completion_price = MODEL_PRICES_PER_1K[max(matches, key=len)]
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1000
+
+
+def fallback_label(stage: str, error: BaseException) -> str:
+    """Short label for why a request left a stage of the fallback chain"""
+    if isinstance(error, CircuitOpenError):
+        return f"{stage}:circuit_open"
+    if isinstance(error, CoalescedCallFailed):
+        return f"{stage}:coalesced_run_failed"
+    if isinstance(error, asyncio.TimeoutError):
+        return f"{stage}:timeout"
+    return f"{stage}:{type(error).__name__}"
+
+
+class LLMCall:
+    """Accounting record of one call made through the gateway"""
+
+    def __init__(self, call_site: str, model: str, fallback_reason: Optional[str] = None):
+        self.call_site = call_site
+        self.model = model
+        self.fallback_reason = fallback_reason
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.retries = 0
+        self.queue_seconds = 0.0
+        self.wall_seconds = 0.0
+        self.outcome = "ok"
+        self.error: Optional[str] = None
+        self.started_at = time.time()
+        self._started = time.monotonic()
+
+    def add_usage(self, usage: Any):
+        """Add token counts from an OpenAI usage object (chat completion or Assistant run)"""
+        if usage is not None:
+            self.prompt_tokens += getattr(usage, "prompt_tokens", 0) or 0
+            self.completion_tokens += getattr(usage, "completion_tokens", 0) or 0
+
+    @property
+    def cost(self) -> float:
+        return estimate_cost(self.model, self.prompt_tokens, self.completion_tokens)
+
+    def finish(self):
+        self.wall_seconds = time.monotonic() - self._started
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "call_site": self.call_site,
+            "model": self.model,
+            "outcome": self.outcome,
+            "error": self.error,
+            "fallback_reason": self.fallback_reason,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "estimated_cost_usd": round(self.cost, 6),
+            "retries": self.retries,
+            "queue_ms": round(self.queue_seconds * 1000, 1),
+            "wall_ms": round(self.wall_seconds * 1000, 1),
+            "started_at": self.started_at
+        }
+
+
+class LLMUsage:
+    """Per call site and model totals of every gateway call, plus the most recent calls"""
+
+    def __init__(self, recent: int = RECENT_CALLS):
+        self._totals: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._fallbacks: Dict[Tuple[str, str], int] = {}
+        self.recent: Deque[Dict[str, Any]] = deque(maxlen=recent)
+
+    def record(self, call: LLMCall):
+        totals = self._totals.setdefault((call.call_site, call.model), {
+            "calls": 0, "outcomes": {}, "prompt_tokens": 0, "completion_tokens": 0,
+            "estimated_cost_usd": 0.0, "retries": 0, "wall_seconds": 0.0, "queue_seconds": 0.0
+        })
+        totals["calls"] += 1
+        totals["outcomes"][call.outcome] = totals["outcomes"].get(call.outcome, 0) + 1
+        totals["prompt_tokens"] += call.prompt_tokens
+        totals["completion_tokens"] += call.completion_tokens
+        totals["estimated_cost_usd"] += call.cost
+        totals["retries"] += call.retries
+        totals["wall_seconds"] += call.wall_seconds
+        totals["queue_seconds"] += call.queue_seconds
+        if call.fallback_reason:
+            key = (call.call_site, call.fallback_reason)
+            self._fallbacks[key] = self._fallbacks.get(key, 0) + 1
+        self.recent.append(call.as_dict())
+
+    def summary(self, recent: int = 20) -> Dict[str, Any]:
+        call_sites = []
+        for (call_site, model), totals in sorted(self._totals.items()):
+            call_sites.append({
+                "call_site": call_site,
+                "model": model,
+                **totals,
+                "estimated_cost_usd": round(totals["estimated_cost_usd"], 6),
+                "avg_wall_ms": round(totals["wall_seconds"] * 1000 / totals["calls"], 1),
+                "avg_queue_ms": round(totals["queue_seconds"] * 1000 / totals["calls"], 1)
+            })
+        return {
+            "call_sites": call_sites,
+            "fallbacks": [
+                {"call_site": call_site, "reason": reason, "count": count}
+                for (call_site, reason), count in sorted(self._fallbacks.items())
+            ],
+            "recent": list(self.recent)[-recent:]
+        }
+
+    def collect_metrics(self):
+        totals = sorted(self._totals.items())
+        yield "llm_calls_total", "counter", "LLM gateway calls by outcome", [
+            ({"call_site": site, "model": model, "outcome": outcome}, count)
+            for (site, model), total in totals for outcome, count in total["outcomes"].items()
+        ]
+        yield "llm_tokens_total", "counter", "Tokens used by LLM calls", [
+            ({"call_site": site, "model": model, "kind": kind}, total[f"{kind}_tokens"])
+            for (site, model), total in totals for kind in ("prompt", "completion")
+        ]
+        yield "llm_estimated_cost_usd_total", "counter", "Estimated LLM spend in USD", [
+            ({"call_site": site, "model": model}, total["estimated_cost_usd"]) for (site, model), total in totals
+        ]
+        yield "llm_retries_total", "counter", "Retried LLM requests", [
+            ({"call_site": site, "model": model}, total["retries"]) for (site, model), total in totals
+        ]
+        yield "llm_wall_seconds_total", "counter", "Wall time of LLM calls, queueing included", [
+            ({"call_site": site, "model": model}, total["wall_seconds"]) for (site, model), total in totals
+        ]
+        yield "llm_queue_seconds_total", "counter", "Time LLM calls waited for a concurrency slot", [
+            ({"call_site": site, "model": model}, total["queue_seconds"]) for (site, model), total in totals
+        ]
+        yield "llm_fallbacks_total", "counter", "Calls made as a fallback, by reason", [
+            ({"call_site": site, "reason": reason}, count) for (site, reason), count in sorted(self._fallbacks.items())
+        ]
+
+
+llm_usage = LLMUsage()
+register_collector(llm_usage.collect_metrics)
+
+
+class LLMGateway:
+    """Single path for every LLM call: concurrency limit, circuit breaker, retries and accounting"""
+
+    def __init__(self, client: Any, max_concurrency: int):
+        self.client = client
+        self.limiter = asyncio.Semaphore(max_concurrency)
+
+    @asynccontextmanager
+    async def call(self, call_site: str, model: str, breaker: Optional[CircuitBreaker] = None,
+                   fallback_reason: Optional[str] = None, limited: bool = True) -> AsyncIterator[LLMCall]:
+        """Account for one call; the block runs holding a concurrency slot and fills in usage.
+
+        Calls rejected by an open circuit are recorded with outcome "rejected".
+        Unlimited calls (local fallbacks) are recorded without taking a slot.
+        """
+        record = LLMCall(call_site, model, fallback_reason)
+        try:
+            with (breaker.guard() if breaker else nullcontext()) as timer:
+                queued = time.monotonic()
+                async with (self.limiter if limited else nullcontext()):
+                    record.queue_seconds = time.monotonic() - queued
+                    if timer:
+                        # Queueing is local, so it does not count against the upstream's latency budget
+                        timer.restart()
+                    yield record
+        except CircuitOpenError:
+            record.outcome = "rejected"
+            raise
+        except Exception as e:
+            record.outcome = "error"
+            record.error = type(e).__name__
+            raise
+        except BaseException:
+            record.outcome = "cancelled"
+            raise
+        finally:
+            record.finish()
+            llm_usage.record(record)
+
+    async def with_retries(self, record: LLMCall, request: Callable[[], Awaitable[T]], deadline: float) -> T:
+        """Run request(), retrying transient upstream errors with backoff until the loop-time deadline"""
+        loop = asyncio.get_running_loop()
+        attempt = 0
+        while True:
+            try:
+                return await asyncio.wait_for(request(), timeout=deadline - loop.time())
+            except RETRYABLE_ERRORS:
+                delay = LLM_RETRY_BASE_SECONDS * (2 ** attempt)
+                if attempt >= LLM_MAX_RETRIES or loop.time() + delay >= deadline:
+                    raise
+                attempt += 1
+                record.retries += 1
+                await asyncio.sleep(delay)
+
+    async def chat_completion(self, call_site: str, timeout: float, breaker: Optional[CircuitBreaker] = None,
+                              fallback_reason: Optional[str] = None, **kwargs):
+        """Chat completion through the gateway, bounded by timeout including retries"""
+        async with self.call(call_site, kwargs["model"], breaker, fallback_reason) as record:
+            deadline = asyncio.get_running_loop().time() + timeout
+            response = await self.with_retries(
+                record, lambda: self.client.chat.completions.create(**kwargs), deadline
+            )
+            record.model = getattr(response, "model", None) or record.model
+            record.add_usage(getattr(response, "usage", None))
+            return response
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Type
 from datetime import datetime
 import uuid
 
@@ -55,6 +55,26 @@ class HRRequest(BaseModel):
     approved_date: Optional[datetime] = None
     approved_by: Optional[str] = None
 
+class HRRequestSummary(BaseModel):
+    """List view of an HR request, without the free-text fields"""
+    id: str
+    employee_id: str
+    type: str
+    status: str
+    start_date: Optional[str] = None
+    end_date: Optional[str] = None
+    date: Optional[str] = None
+    days: Optional[int] = None
+    amount: Optional[float] = None
+    category: Optional[str] = None
+    destination: Optional[str] = None
+    duration: Optional[int] = None
+    departure_date: Optional[str] = None
+    return_date: Optional[str] = None
+    submitted_date: datetime
+    approved_date: Optional[datetime] = None
+    approved_by: Optional[str] = None
+
 class HRRequestCreate(BaseModel):
     employee_id: str
     type: str
@@ -84,6 +104,15 @@ class Policy(BaseModel):
     last_updated: datetime = Field(default_factory=datetime.utcnow)
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
+class PolicySummary(BaseModel):
+    """List view of a policy: an excerpt instead of the full Markdown body"""
+    id: str
+    title: str
+    category: str
+    excerpt: str
+    tags: List[str]
+    last_updated: datetime
+
 class PolicyCreate(BaseModel):
     title: str
     category: str
@@ -144,4 +173,18 @@ class DashboardData(BaseModel):
     pending_requests: List[Dict[str, Any]]
     last_salary_payment: Dict[str, Any]
     business_trip_status: Dict[str, Any]
-    upcoming_events: List[Dict[str, Any]]
\ No newline at end of file
+    upcoming_events: List[Dict[str, Any]]
+
+# Characters of policy content returned as the list-view excerpt
+POLICY_EXCERPT_CHARS = 200
+
+def projection(model: Type[BaseModel], keep_id: bool = False) -> Dict[str, int]:
+    """Mongo projection that fetches only the fields of a response model"""
+    fields = {name: 1 for name in model.model_fields}
+    fields["_id"] = 1 if keep_id else 0
+    return fields
+
+def policy_summary(policy: Dict[str, Any]) -> PolicySummary:
+    return PolicySummary(excerpt=policy["content"][:POLICY_EXCERPT_CHARS], **{
+        name: policy[name] for name in ("id", "title", "category", "tags", "last_updated")
+    })
@@ -0,0 +1,71 @@
+import base64
+import json
+from datetime import datetime
+from typing import Dict, Any, AsyncIterator, Callable, List, Optional, Tuple
+
+from bson import ObjectId
+from bson.errors import InvalidId
+
+# Documents fetched per round trip while streaming
+STREAM_BATCH_SIZE = 200
+
+# Key pages are ordered by: always indexed, unique, and in insertion order like the unpaginated lists
+PAGE_KEY = "_id"
+
+
+class InvalidCursor(ValueError):
+    """A next_cursor token that was not issued by this API"""
+
+
+def encode_cursor(last_id: ObjectId) -> str:
+    """Opaque token for the page that starts after last_id"""
+    payload = json.dumps({"after": str(last_id)}).encode("utf-8")
+    return base64.urlsafe_b64encode(payload).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str) -> ObjectId:
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        return ObjectId(json.loads(base64.urlsafe_b64decode(padded))["after"])
+    except (ValueError, KeyError, TypeError, InvalidId) as e:
+        raise InvalidCursor("Invalid pagination cursor") from e
+
+
+def _after(query: Dict[str, Any], cursor: Optional[str]) -> Dict[str, Any]:
+    if not cursor:
+        return query
+    condition = {PAGE_KEY: {"$gt": decode_cursor(cursor)}}
+    return {"$and": [query, condition]} if query else condition
+
+
+async def fetch_page(collection, query: Dict[str, Any], limit: int, cursor: Optional[str] = None,
+                     projection: Optional[Dict[str, Any]] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """One page of documents in key order and the cursor of the next page (None on the last page)"""
+    documents = await collection.find(_after(query, cursor), projection).sort(PAGE_KEY, 1).limit(limit + 1).to_list(limit + 1)
+    next_cursor = encode_cursor(documents[limit - 1][PAGE_KEY]) if len(documents) > limit else None
+    return documents[:limit], next_cursor
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def stream_ndjson(collection, query: Dict[str, Any], serialize: Callable[[Dict[str, Any]], Any],
+                  cursor: Optional[str] = None, projection: Optional[Dict[str, Any]] = None,
+                  limit: Optional[int] = None) -> AsyncIterator[str]:
+    """NDJSON lines serialized as the Motor cursor yields documents.
+
+    Only one batch is held in memory at a time, however large the collection.
+    Raises InvalidCursor right away, before any response is started.
+    """
+    documents = collection.find(_after(query, cursor), projection).sort(PAGE_KEY, 1).batch_size(STREAM_BATCH_SIZE)
+    if limit:
+        documents = documents.limit(limit)
+
+    async def lines() -> AsyncIterator[str]:
+        async for document in documents:
+            yield json.dumps(serialize(document), ensure_ascii=False, default=_json_default) + "\n"
+
+    return lines()
@@ -0,0 +1,163 @@
+import asyncio
+import hashlib
+import json
+import os
+from typing import Dict, Any, List, Optional, Callable, Awaitable, Set, Tuple
+
+from pymongo.errors import OperationFailure, PyMongoError
+
+from database import policies_collection
+from policy_search import policy_search_index
+from policy_retrieval import policy_chunk_index, fuse_rankings, RETRIEVAL_TOP_K
+from policy_vectors import policy_vectors
+
+# Poll interval used when change streams are unavailable (standalone mongod)
+POLICY_CACHE_TTL_SECONDS = int(os.environ.get("POLICY_CACHE_TTL_SECONDS", "60"))
+
+# Delay before re-opening a change stream after a transient error
+WATCH_RETRY_SECONDS = 5
+
+
+def _fingerprint(policy: Dict[str, Any]) -> str:
+    """Stable hash of a policy document, used to detect which policies changed"""
+    encoded = json.dumps(policy, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha1(encoded.encode("utf-8")).hexdigest()
+
+
+class PolicyCache:
+    """In-memory copy of the policy corpus shared by the API and the AI assistant.
+
+    Loaded once at startup and refreshed from a MongoDB change stream, or by
+    polling every POLICY_CACHE_TTL_SECONDS when the server is not a replica set.
+    """
+
+    def __init__(self):
+        self._policies: List[Dict[str, Any]] = []
+        self._by_id: Dict[str, Dict[str, Any]] = {}
+        self._categories: List[str] = []
+        self._fingerprints: Dict[str, str] = {}
+        self._listeners: List[Callable[[Set[str]], Awaitable[None]]] = []
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.loaded = False
+        self.version = 0
+        self.mode = "idle"
+
+    def add_listener(self, callback: Callable[[Set[str]], Awaitable[None]]):
+        """Register a coroutine called with the ids of changed policies after each refresh"""
+        self._listeners.append(callback)
+
+    async def refresh(self) -> Set[str]:
+        """Reload the corpus and return the ids of policies that changed"""
+        async with self._lock:
+            policies = await policies_collection.find({}, {"_id": 0}).sort("id", 1).to_list(None)
+            fingerprints = {policy["id"]: _fingerprint(policy) for policy in policies}
+            changed = {
+                policy_id for policy_id in set(fingerprints) | set(self._fingerprints)
+                if fingerprints.get(policy_id) != self._fingerprints.get(policy_id)
+            }
+
+            if changed or not self.loaded:
+                self._policies = policies
+                self._by_id = {policy["id"]: policy for policy in policies}
+                self._categories = sorted({policy["category"] for policy in policies})
+                self._fingerprints = fingerprints
+                policy_search_index.build(policies)
+                policy_chunk_index.build(policies)
+                self.version += 1
+            self.loaded = True
+
+        if changed:
+            print(f"🔄 Policy cache refreshed (version {self.version}, {len(changed)} changed)")
+            for listener in self._listeners:
+                try:
+                    await listener(changed)
+                except Exception as e:
+                    print(f"Policy cache listener error: {str(e)}")
+        return changed
+
+    async def ensure_loaded(self):
+        if not self.loaded:
+            await self.refresh()
+
+    async def start(self):
+        """Load the corpus and start watching for changes in the background"""
+        await self.refresh()
+        if not self._task:
+            self._task = asyncio.create_task(self._watch())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.mode = "idle"
+
+    async def _watch(self):
+        while True:
+            try:
+                async with policies_collection.watch() as stream:
+                    self.mode = "change_stream"
+                    async for _ in stream:
+                        await self.refresh()
+            except OperationFailure as e:
+                # Change streams need a replica set; fall back to polling for good
+                print(f"Policy change stream unavailable ({e.code}), polling every {POLICY_CACHE_TTL_SECONDS}s")
+                await self._poll()
+                return
+            except PyMongoError as e:
+                print(f"Policy change stream error: {str(e)}")
+                await asyncio.sleep(WATCH_RETRY_SECONDS)
+                # Catch up on anything missed while the stream was down
+                await self.refresh()
+
+    async def _poll(self):
+        self.mode = "poll"
+        while True:
+            await asyncio.sleep(POLICY_CACHE_TTL_SECONDS)
+            try:
+                await self.refresh()
+            except PyMongoError as e:
+                print(f"Policy cache poll error: {str(e)}")
+
+    # Read accessors
+    async def all(self, category: Optional[str] = None) -> List[Dict[str, Any]]:
+        await self.ensure_loaded()
+        if category:
+            return [policy for policy in self._policies if policy["category"] == category]
+        return list(self._policies)
+
+    async def get(self, policy_id: str) -> Optional[Dict[str, Any]]:
+        await self.ensure_loaded()
+        return self._by_id.get(policy_id)
+
+    async def categories(self) -> List[str]:
+        await self.ensure_loaded()
+        return list(self._categories)
+
+    async def search(self, query: str, category: Optional[str] = None) -> List[Tuple[float, Dict[str, Any]]]:
+        """Ranked full-text search over the cached corpus"""
+        await self.ensure_loaded()
+        return policy_search_index.search(query, category)
+
+    async def retrieve(self, query: str, top_k: int = RETRIEVAL_TOP_K) -> List[Dict[str, Any]]:
+        """Policy sections most relevant to a question, for retrieval-augmented prompts"""
+        await self.ensure_loaded()
+        chunks = policy_chunk_index.retrieve(query, top_k)
+        if not policy_vectors.matches(policy_chunk_index.fingerprint):
+            return chunks
+
+        # Blend keyword and semantic rankings when the prebuilt vectors match the served corpus
+        try:
+            similar = await asyncio.to_thread(policy_vectors.search, query, top_k)
+        except Exception as e:
+            print(f"Policy vector search error: {str(e)}")
+            return chunks
+        semantic = [policy_chunk_index.chunk(chunk_id) for _, chunk_id in similar]
+        return fuse_rankings([chunks, [chunk for chunk in semantic if chunk]], top_k)
+
+
+policy_cache = PolicyCache()
@@ -0,0 +1,181 @@
+import hashlib
+import os
+import re
+from typing import Dict, Any, List, Optional
+
+from policy_search import PolicySearchIndex
+
+# Number of chunks sent to the model per question
+RETRIEVAL_TOP_K = int(os.environ.get("POLICY_RETRIEVAL_TOP_K", "6"))
+
+# Sections shorter than this are merged into the following section
+MIN_CHUNK_CHARS = 120
+
+# Sections longer than this are split further at blank lines
+MAX_CHUNK_CHARS = 1500
+
+# Reciprocal rank fusion constant; larger values flatten the weight of top ranks
+RRF_K = 60
+
+# A line that is entirely bold, e.g. "**Key Rules / القواعد الأساسية:**"
+SECTION_HEADING = re.compile(r"^\s*(\*\*[^*]+\*\*|#+ .+)\s*$")
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("cl100k_base")
+except Exception:  # tiktoken is optional; fall back to a character heuristic
+    _encoding = None
+
+
+def estimate_tokens(text: str) -> int:
+    """Model token count, exact with tiktoken installed and ~4 chars/token otherwise"""
+    if _encoding is not None:
+        return len(_encoding.encode(text))
+    return max(1, len(text) // 4) if text else 0
+
+
+def _split_sections(text: str) -> List[str]:
+    sections: List[List[str]] = [[]]
+    for line in text.splitlines():
+        if SECTION_HEADING.match(line) and any(existing.strip() for existing in sections[-1]):
+            sections.append([])
+        sections[-1].append(line)
+
+    # Merge heading-only and very short sections into the section that follows
+    merged: List[str] = []
+    carry = ""
+    for lines in sections:
+        section = (carry + "\n" + "\n".join(lines)).strip() if carry else "\n".join(lines).strip()
+        if len(section) < MIN_CHUNK_CHARS:
+            carry = section
+            continue
+        merged.append(section)
+        carry = ""
+    if carry:
+        if merged:
+            merged[-1] = merged[-1] + "\n" + carry
+        else:
+            merged.append(carry)
+
+    # Split oversized sections at paragraph boundaries
+    chunks: List[str] = []
+    for section in merged:
+        if len(section) <= MAX_CHUNK_CHARS:
+            chunks.append(section)
+            continue
+        current = ""
+        for paragraph in re.split(r"\n\s*\n", section):
+            if current and len(current) + len(paragraph) > MAX_CHUNK_CHARS:
+                chunks.append(current.strip())
+                current = ""
+            current += paragraph + "\n\n"
+        if current.strip():
+            chunks.append(current.strip())
+    return chunks
+
+
+def chunk_policy(policy: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Split a policy's English and Arabic bodies into section-level chunks"""
+    chunks = []
+    for field in ("content", "content_ar"):
+        for text in _split_sections(policy.get(field) or ""):
+            chunks.append({
+                "id": f"{policy['id']}#{len(chunks)}",
+                "policy_id": policy["id"],
+                "title": policy["title"],
+                "category": policy["category"],
+                "tags": policy.get("tags", []),
+                "content": text
+            })
+    return chunks
+
+
+def chunk_policies(policies: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [chunk for policy in policies for chunk in chunk_policy(policy)]
+
+
+def chunk_fingerprint(chunks: List[Dict[str, Any]]) -> str:
+    """Digest of chunk ids and text, used to tell whether a prebuilt vector file is stale"""
+    digest = hashlib.sha256()
+    for chunk in chunks:
+        digest.update(chunk["id"].encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(chunk["content"].encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def fuse_rankings(rankings: List[List[Dict[str, Any]]], top_k: int = RETRIEVAL_TOP_K) -> List[Dict[str, Any]]:
+    """Merge several ranked chunk lists with reciprocal rank fusion"""
+    scores: Dict[str, float] = {}
+    chunks: Dict[str, Dict[str, Any]] = {}
+    for ranking in rankings:
+        for rank, chunk in enumerate(ranking):
+            scores[chunk["id"]] = scores.get(chunk["id"], 0.0) + 1.0 / (RRF_K + rank + 1)
+            chunks[chunk["id"]] = chunk
+    ranked = sorted(scores, key=lambda chunk_id: (-scores[chunk_id], chunk_id))
+    return [chunks[chunk_id] for chunk_id in ranked[:top_k]]
+
+
+def full_corpus_context(policies: List[Dict[str, Any]]) -> str:
+    """The whole-corpus prompt context used before retrieval, for comparison"""
+    return "".join(f"\n**{policy['title']}** ({policy['category']}):\n{policy['content']}\n\n" for policy in policies)
+
+
+def format_chunk_context(chunks: List[Dict[str, Any]]) -> str:
+    return "".join(f"\n**{chunk['title']}** ({chunk['category']}):\n{chunk['content']}\n\n" for chunk in chunks)
+
+
+class PolicyChunkIndex:
+    """BM25 index over section-level policy chunks, rebuilt by the policy cache"""
+
+    def __init__(self):
+        self._index = PolicySearchIndex()
+        self._by_id: Dict[str, Dict[str, Any]] = {}
+        self.fingerprint = ""
+        self.full_context_tokens = 0
+
+    def build(self, policies: List[Dict[str, Any]]):
+        chunks = chunk_policies(policies)
+        self._index.build(chunks)
+        self._by_id = {chunk["id"]: chunk for chunk in chunks}
+        self.fingerprint = chunk_fingerprint(chunks)
+        self.full_context_tokens = estimate_tokens(full_corpus_context(policies))
+
+    def chunk(self, chunk_id: str) -> Optional[Dict[str, Any]]:
+        return self._by_id.get(chunk_id)
+
+    @property
+    def chunk_count(self) -> int:
+        return len(self._index.policies)
+
+    def retrieve(self, query: str, top_k: int = RETRIEVAL_TOP_K) -> List[Dict[str, Any]]:
+        return [chunk for _, chunk in self._index.search(query)[:top_k]]
+
+
+class RetrievalStats:
+    """Running totals of prompt tokens sent versus the whole-corpus baseline"""
+
+    def __init__(self):
+        self.requests = 0
+        self.context_tokens = 0
+        self.full_context_tokens = 0
+
+    def record(self, context_tokens: int, full_context_tokens: int):
+        self.requests += 1
+        self.context_tokens += context_tokens
+        self.full_context_tokens += full_context_tokens
+
+    def summary(self) -> Dict[str, Any]:
+        saved = self.full_context_tokens - self.context_tokens
+        return {
+            "requests": self.requests,
+            "context_tokens": self.context_tokens,
+            "full_context_tokens": self.full_context_tokens,
+            "tokens_saved": saved,
+            "reduction": round(saved / self.full_context_tokens, 4) if self.full_context_tokens else 0.0
+        }
+
+
+policy_chunk_index = PolicyChunkIndex()
+retrieval_stats = RetrievalStats()
@@ -0,0 +1,138 @@
+import math
+import re
+import time
+from bisect import bisect_left
+from typing import Dict, Any, List, Optional, Tuple
+
+# BM25 parameters
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# Field weights: a hit in the title or tags counts more than one in the body
+FIELD_WEIGHTS = {
+    "title": 3.0,
+    "tags": 2.0,
+    "content": 1.0,
+    "content_ar": 1.0,
+}
+
+# Query terms with no exact match are expanded to indexed terms with the same prefix
+PREFIX_MIN_LENGTH = 3
+PREFIX_WEIGHT = 0.8
+
+ENGLISH_STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "do", "for", "from", "how", "i",
+    "in", "is", "it", "many", "much", "my", "of", "on", "or", "the", "to", "what", "when",
+    "which", "who", "will", "with", "you", "your"
+}
+
+ARABIC_DIACRITICS = re.compile(r"[\u064B-\u0652\u0670\u0640]")
+ARABIC_PREFIXES = ("وال", "بال", "كال", "فال", "لل", "ال")
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase and fold Arabic letter variants and diacritics"""
+    text = ARABIC_DIACRITICS.sub("", text.lower())
+    text = re.sub("[أإآ]", "ا", text)
+    return text.replace("ى", "ي").replace("ة", "ه")
+
+
+ARABIC_STOPWORDS = {normalize_text(word) for word in ["في", "من", "على", "إلى", "عن", "ما", "هي", "هل", "كم", "أو", "مع", "هذا", "هذه"]}
+
+
+def _stem(token: str) -> str:
+    if token.isascii():
+        if token.endswith("ies") and len(token) > 4:
+            return token[:-3] + "y"
+        if token.endswith("s") and not token.endswith("ss") and len(token) > 3:
+            return token[:-1]
+        return token
+    for prefix in ARABIC_PREFIXES:
+        if token.startswith(prefix) and len(token) - len(prefix) >= 2:
+            return token[len(prefix):]
+    return token
+
+
+def tokenize(text: str, min_number_length: int = 2) -> List[str]:
+    """Split English/Arabic text into normalized, lightly stemmed terms"""
+    tokens = []
+    for token in TOKEN_PATTERN.findall(normalize_text(text)):
+        if token in ENGLISH_STOPWORDS or token in ARABIC_STOPWORDS or (token.isdigit() and len(token) < min_number_length):
+            continue
+        tokens.append(_stem(token))
+    return tokens
+
+
+class PolicySearchIndex:
+    """In-process inverted index over the policy corpus with BM25 ranking"""
+
+    def __init__(self):
+        self.policies: List[Dict[str, Any]] = []
+        self.postings: Dict[str, Dict[int, float]] = {}
+        self.doc_lengths: List[float] = []
+        self.avg_doc_length = 0.0
+        self.vocabulary: List[str] = []
+        self.built_at = 0.0
+
+    def build(self, policies: List[Dict[str, Any]]):
+        postings: Dict[str, Dict[int, float]] = {}
+        doc_lengths = []
+
+        for doc_id, policy in enumerate(policies):
+            length = 0.0
+            for field, weight in FIELD_WEIGHTS.items():
+                value = policy.get(field) or ""
+                if isinstance(value, list):
+                    value = " ".join(value)
+                for term in tokenize(value):
+                    term_postings = postings.setdefault(term, {})
+                    term_postings[doc_id] = term_postings.get(doc_id, 0.0) + weight
+                    length += weight
+            doc_lengths.append(length)
+
+        self.policies = list(policies)
+        self.postings = postings
+        self.doc_lengths = doc_lengths
+        self.avg_doc_length = (sum(doc_lengths) / len(doc_lengths)) if doc_lengths else 0.0
+        self.vocabulary = sorted(postings)
+        self.built_at = time.monotonic()
+
+    def _expand(self, term: str) -> List[Tuple[str, float]]:
+        """Exact term if indexed, otherwise every indexed term sharing its prefix"""
+        if term in self.postings:
+            return [(term, 1.0)]
+        if len(term) < PREFIX_MIN_LENGTH:
+            return []
+        expanded = []
+        index = bisect_left(self.vocabulary, term)
+        while index < len(self.vocabulary) and self.vocabulary[index].startswith(term):
+            expanded.append((self.vocabulary[index], PREFIX_WEIGHT))
+            index += 1
+        return expanded
+
+    def search(self, query: str, category: Optional[str] = None) -> List[Tuple[float, Dict[str, Any]]]:
+        """Return (score, policy) pairs ranked by BM25 relevance"""
+        total_docs = len(self.policies)
+        scores: Dict[int, float] = {}
+
+        for query_term in set(tokenize(query)):
+            for term, boost in self._expand(query_term):
+                term_postings = self.postings[term]
+                idf = math.log(1 + (total_docs - len(term_postings) + 0.5) / (len(term_postings) + 0.5))
+                for doc_id, tf in term_postings.items():
+                    norm = BM25_K1 * (1 - BM25_B + BM25_B * self.doc_lengths[doc_id] / self.avg_doc_length)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + boost * idf * tf * (BM25_K1 + 1) / (tf + norm)
+
+        ranked = []
+        for doc_id, score in scores.items():
+            policy = self.policies[doc_id]
+            if category and policy.get("category") != category:
+                continue
+            ranked.append((score, policy))
+        ranked.sort(key=lambda item: (-item[0], item[1].get("id", "")))
+        return ranked
+
+
+policy_search_index = PolicySearchIndex()
+
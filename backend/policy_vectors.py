@@ -0,0 +1,178 @@
+import json
+import os
+import time
+from pathlib import Path
+from typing import Dict, Any, Callable, List, Optional, Tuple
+
+import numpy as np
+
+from embeddings import EMBEDDING_MODEL_NAME, embed_texts
+from policy_retrieval import chunk_fingerprint
+
+ROOT_DIR = Path(__file__).parent
+
+# Base path of the prebuilt vector files (<base>.npy, <base>.scales.npy, <base>.json)
+POLICY_VECTORS_PATH = Path(os.environ.get("POLICY_VECTORS_PATH", str(ROOT_DIR / "data" / "policy_vectors")))
+
+# Local CPU model used by the build step; the hashed n-gram embedding is used when it is unavailable
+POLICY_EMBEDDING_MODEL = os.environ.get("POLICY_EMBEDDING_MODEL", "paraphrase-multilingual-MiniLM-L12-v2")
+
+# Rows scored per matrix product, bounding the float32 working set during a query
+SCORE_BLOCK_ROWS = 4096
+
+VECTOR_DTYPES = ("float16", "int8")
+
+Encoder = Callable[[List[str]], np.ndarray]
+
+
+def load_encoder(model_name: str) -> Tuple[str, Encoder]:
+    """(model name, encoder) for a sentence-transformers model, or the built-in hashed embedding.
+
+    Encoders return unit-length float32 rows, so dot products are cosine similarities.
+    """
+    if model_name and model_name != EMBEDDING_MODEL_NAME:
+        try:
+            from sentence_transformers import SentenceTransformer
+            model = SentenceTransformer(model_name, device="cpu")
+            return model_name, lambda texts: model.encode(
+                texts, normalize_embeddings=True, convert_to_numpy=True
+            ).astype(np.float32)
+        except ImportError:
+            print(f"sentence-transformers is not installed, using {EMBEDDING_MODEL_NAME} instead of {model_name}")
+    return EMBEDDING_MODEL_NAME, embed_texts
+
+
+def _paths(base: Path) -> Dict[str, Path]:
+    return {
+        "vectors": base.with_suffix(".npy"),
+        "scales": base.with_suffix(".scales.npy"),
+        "meta": base.with_suffix(".json")
+    }
+
+
+def build_vector_file(chunks: List[Dict[str, Any]], base: Path = POLICY_VECTORS_PATH,
+                      model_name: str = POLICY_EMBEDDING_MODEL, dtype: str = "float16") -> Dict[str, Any]:
+    """Embed policy chunks and write the vector matrix, its id table and metadata.
+
+    int8 files store one float32 scale per row next to the quantized matrix.
+    Files are written under temporary names and renamed, so running servers
+    never map a half-written matrix.
+    """
+    if dtype not in VECTOR_DTYPES:
+        raise ValueError(f"Unsupported vector dtype {dtype}, expected one of {VECTOR_DTYPES}")
+
+    model_name, encode = load_encoder(model_name)
+    vectors = encode([f"{chunk['title']}\n{chunk['content']}" for chunk in chunks])
+
+    paths = _paths(base)
+    base.parent.mkdir(parents=True, exist_ok=True)
+    written = []
+
+    if dtype == "int8":
+        scales = np.abs(vectors).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        matrix = np.round(vectors / scales[:, None]).astype(np.int8)
+        np.save(paths["scales"].with_suffix(".tmp.npy"), scales.astype(np.float32))
+        written.append("scales")
+    else:
+        matrix = vectors.astype(np.float16)
+    np.save(paths["vectors"].with_suffix(".tmp.npy"), matrix)
+    written.append("vectors")
+
+    meta = {
+        "model": model_name,
+        "dim": int(matrix.shape[1]) if matrix.ndim == 2 else 0,
+        "dtype": dtype,
+        "count": len(chunks),
+        "fingerprint": chunk_fingerprint(chunks),
+        "built_at": time.time(),
+        "ids": [chunk["id"] for chunk in chunks],
+        "policy_ids": [chunk["policy_id"] for chunk in chunks]
+    }
+    paths["meta"].with_suffix(".tmp.json").write_text(json.dumps(meta, ensure_ascii=False))
+    written.append("meta")
+
+    # Publish the matrix files before the metadata that describes them
+    for name in written:
+        tmp = paths[name].with_suffix(".tmp.json" if name == "meta" else ".tmp.npy")
+        os.replace(tmp, paths[name])
+    return {key: value for key, value in meta.items() if key not in ("ids", "policy_ids")}
+
+
+class PolicyVectorIndex:
+    """Read-only view of the prebuilt policy vectors.
+
+    The matrix is memory-mapped, so loading is immediate and every worker on
+    the host shares one page-cached copy. The query encoder is created on the
+    first search.
+    """
+
+    def __init__(self, base: Path = POLICY_VECTORS_PATH):
+        self.base = base
+        self.meta: Optional[Dict[str, Any]] = None
+        self._matrix: Optional[np.ndarray] = None
+        self._scales: Optional[np.ndarray] = None
+        self._encode: Optional[Encoder] = None
+
+    def load(self) -> bool:
+        paths = _paths(self.base)
+        if not paths["meta"].exists():
+            print(f"No policy vector file at {self.base}, semantic retrieval disabled")
+            return False
+        try:
+            meta = json.loads(paths["meta"].read_text())
+            matrix = np.load(paths["vectors"], mmap_mode="r")
+            scales = np.load(paths["scales"], mmap_mode="r") if meta["dtype"] == "int8" else None
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Policy vector file could not be loaded: {str(e)}")
+            return False
+
+        if matrix.shape[0] != len(meta["ids"]):
+            print("Policy vector file does not match its id table, semantic retrieval disabled")
+            return False
+
+        self.meta, self._matrix, self._scales, self._encode = meta, matrix, scales, None
+        print(f"✅ Mapped {meta['count']} policy vectors ({meta['model']}, {meta['dtype']})")
+        return True
+
+    @property
+    def loaded(self) -> bool:
+        return self.meta is not None
+
+    def matches(self, fingerprint: str) -> bool:
+        """Whether the file was built from the chunks currently served"""
+        return self.loaded and self.meta["fingerprint"] == fingerprint
+
+    def _query_vector(self, query: str) -> np.ndarray:
+        if self._encode is None:
+            model_name, self._encode = load_encoder(self.meta["model"])
+            if model_name != self.meta["model"]:
+                raise RuntimeError(f"Policy vectors were built with {self.meta['model']}, which is not available")
+        return self._encode([query])[0].astype(np.float32)
+
+    def search(self, query: str, top_k: int) -> List[Tuple[float, str]]:
+        """(cosine similarity, chunk id) pairs of the top_k most similar chunks"""
+        if not self.loaded or not self.meta["count"]:
+            return []
+        query_vector = self._query_vector(query)
+
+        total = self._matrix.shape[0]
+        scores = np.empty(total, dtype=np.float32)
+        for start in range(0, total, SCORE_BLOCK_ROWS):
+            block = np.asarray(self._matrix[start:start + SCORE_BLOCK_ROWS], dtype=np.float32)
+            scores[start:start + len(block)] = block @ query_vector
+        if self._scales is not None:
+            scores *= self._scales
+
+        top_k = min(top_k, total)
+        best = np.argpartition(-scores, top_k - 1)[:top_k]
+        best = best[np.argsort(-scores[best], kind="stable")]
+        return [(float(scores[i]), self.meta["ids"][i]) for i in best]
+
+    def summary(self) -> Dict[str, Any]:
+        if not self.loaded:
+            return {"loaded": False}
+        return {"loaded": True, **{key: value for key, value in self.meta.items() if key not in ("ids", "policy_ids")}}
+
+
+policy_vectors = PolicyVectorIndex()
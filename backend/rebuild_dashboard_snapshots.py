@@ -0,0 +1,25 @@
+"""Regenerate all dashboard snapshots in bulk.
+
+Usage (from the backend directory):
+    python rebuild_dashboard_snapshots.py
+"""
+from pathlib import Path
+from dotenv import load_dotenv
+import asyncio
+
+# Load environment variables first, before other imports
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+from dashboard import rebuild_all_snapshots
+from indexes import ensure_indexes
+
+
+async def main():
+    await ensure_indexes()
+    rebuilt = await rebuild_all_snapshots()
+    print(f"✅ Rebuilt {rebuilt} dashboard snapshots")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -6,13 +6,16 @@ import os
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-from fastapi import FastAPI, APIRouter, HTTPException, Depends
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, Response, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from motor.motor_asyncio import AsyncIOMotorClient
 import logging
 from typing import List, Optional, Dict, Any
 from datetime import datetime, timedelta
 import asyncio
+import json
+import time
 import uuid
 
 # Import models and services
@@ -22,6 +25,18 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from models import *
 from database import *
 from ai_service import AIHRAssistant
+from answer_cache import policy_answer_cache
+from employee_context import employee_contexts
+from policy_cache import policy_cache
+from policy_retrieval import policy_chunk_index, retrieval_stats
+from policy_vectors import policy_vectors
+from circuit_breaker import breaker_summaries
+from single_flight import policy_question_flights
+from llm_gateway import llm_usage
+from pagination import InvalidCursor, fetch_page, stream_ndjson
+from metrics import render_prometheus, CONTENT_TYPE as METRICS_CONTENT_TYPE
+from indexes import ensure_indexes, audit_enabled, enforce_query_plans, audit_query_plans
+from dashboard import assemble_dashboard, dashboard_timings, get_dashboard_snapshot, refresh_dashboard_snapshot, rebuild_all_snapshots
 
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
@@ -44,12 +59,23 @@ app.add_middleware(
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Total-Count", "X-Next-Cursor", "Server-Timing"],
 )
 
 # Initialize database on startup
 @app.on_event("startup")
 async def startup_db():
     await init_database()
+    await ensure_indexes()
+    await policy_cache.start()
+    
+    # Map the prebuilt policy vectors (see build_policy_vectors.py)
+    if policy_vectors.load() and not policy_vectors.matches(policy_chunk_index.fingerprint):
+        print("⚠️ Policy vectors were built from a different corpus, rerun build_policy_vectors.py; using keyword retrieval only")
+    
+    # Refuse to start if an audited query would scan a whole collection
+    if audit_enabled():
+        await enforce_query_plans()
 
 # Basic health check
 @api_router.get("/")
@@ -64,87 +90,62 @@ async def get_employee(employee_id: str):
         raise HTTPException(status_code=404, detail="Employee not found")
     return Employee(**employee)
 
-@api_router.get("/employees", response_model=List[Employee])
-async def get_employees():
-    employees = await employees_collection.find().to_list(100)
-    return [Employee(**emp) for emp in employees]
+@api_router.get("/employees", response_model=List[EmployeeResponse])
+async def get_employees(
+    response: Response,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None,
+    stream: bool = False
+):
+    """Employees in insertion order, one keyset page at a time.
+    
+    Only list-view fields are fetched; salary and bank details come from
+    /employees/{employee_id}. The cursor of the next page is returned in the
+    X-Next-Cursor header. With stream=true every employee after the cursor is
+    written as NDJSON while the database cursor is read, without loading the
+    collection.
+    """
+    fields = projection(EmployeeResponse, keep_id=True)
+    try:
+        if stream:
+            lines = stream_ndjson(
+                employees_collection, {}, lambda emp: EmployeeResponse(**emp).model_dump(), cursor, fields
+            )
+            return StreamingResponse(lines, media_type="application/x-ndjson")
+        
+        employees, next_cursor = await fetch_page(employees_collection, {}, limit, cursor, fields)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return [EmployeeResponse(**emp) for emp in employees]
 
 # Dashboard endpoints
 @api_router.get("/dashboard/{employee_id}")
-async def get_dashboard_data(employee_id: str):
-    # Get employee
-    employee = await employees_collection.find_one({"id": employee_id})
-    if not employee:
+async def get_dashboard_data(employee_id: str, response: Response):
+    started = time.perf_counter()
+    dashboard = await get_dashboard_snapshot(employee_id)
+    if not dashboard:
         raise HTTPException(status_code=404, detail="Employee not found")
     
-    # Get vacation balance
-    vacation_balance = await vacation_balances_collection.find_one({"employee_id": employee_id})
-    vacation_days_left = vacation_balance["remaining_days"] if vacation_balance else 0
-    
-    # Get pending requests
-    pending_requests = await hr_requests_collection.find({
-        "employee_id": employee_id,
-        "status": {"$in": ["Pending Approval", "Under Review"]}
-    }).sort("submitted_date", -1).to_list(10)
-    
-    # Format pending requests
-    formatted_requests = []
-    for req in pending_requests:
-        formatted_req = {
-            "id": req["id"],
-            "type": req["type"],
-            "status": req["status"],
-            "submittedDate": req["submitted_date"].isoformat(),
-            "startDate": req.get("start_date") or req.get("departure_date"),
-            "destination": req.get("destination"),
-            "amount": req.get("amount")
-        }
-        formatted_requests.append(formatted_req)
+    response.headers["Server-Timing"] = f"snapshot;dur={(time.perf_counter() - started) * 1000:.3f}"
+    return dashboard
+
+@api_router.get("/dashboard/{employee_id}/live")
+async def get_live_dashboard_data(employee_id: str, response: Response):
+    """Assemble the dashboard directly from the source collections, bypassing the snapshot"""
+    dashboard = await assemble_dashboard(employee_id)
+    if not dashboard:
+        raise HTTPException(status_code=404, detail="Employee not found")
     
-    # Get last salary payment
-    last_salary = await salary_payments_collection.find_one(
-        {"employee_id": employee_id},
-        sort=[("date", -1)]
+    # Expose per-stage lookup timings to the client and browser dev tools
+    timings = dashboard.pop("timings")
+    response.headers["Server-Timing"] = ", ".join(
+        f"{stage};dur={elapsed}" for stage, elapsed in timings.items()
     )
     
-    salary_payment = {
-        "amount": last_salary["amount"],
-        "date": last_salary["date"].isoformat(),
-        "status": last_salary["status"]
-    } if last_salary else {"amount": 0, "date": "", "status": ""}
-    
-    # Get business trip status
-    business_trip = await hr_requests_collection.find_one({
-        "employee_id": employee_id,
-        "type": "Business Trip",
-        "status": {"$in": ["Approved", "Pending Approval"]}
-    }, sort=[("submitted_date", -1)])
-    
-    trip_status = {
-        "current": business_trip.get("destination", "No active trip"),
-        "status": business_trip.get("status", "None"),
-        "startDate": business_trip.get("departure_date", ""),
-        "endDate": business_trip.get("return_date", "")
-    } if business_trip else {
-        "current": "No active trip",
-        "status": "None",
-        "startDate": "",
-        "endDate": ""
-    }
-    
-    # Mock upcoming events (could be enhanced with actual event system)
-    upcoming_events = [
-        {"type": "Performance Review", "date": "2025-01-30"},
-        {"type": "Team Meeting", "date": "2025-01-15"}
-    ]
-    
-    return {
-        "vacationDaysLeft": vacation_days_left,
-        "pendingRequests": formatted_requests,
-        "lastSalaryPayment": salary_payment,
-        "businessTripStatus": trip_status,
-        "upcomingEvents": upcoming_events
-    }
+    return dashboard
 
 # HR Request endpoints
 @api_router.post("/hr-requests", response_model=HRRequest)
@@ -175,14 +176,24 @@ async def create_hr_request(request: HRRequestCreate):
             {"$inc": {"used_days": request_dict["days"], "remaining_days": -request_dict["days"]}}
         )
     
+    await refresh_dashboard_snapshot(request.employee_id)
+    employee_contexts.invalidate(request.employee_id)
+    
     return HRRequest(**request_dict)
 
-@api_router.get("/hr-requests/{employee_id}", response_model=List[HRRequest])
+@api_router.get("/hr-requests/{employee_id}", response_model=List[HRRequestSummary])
 async def get_hr_requests(employee_id: str):
     requests = await hr_requests_collection.find(
-        {"employee_id": employee_id}
+        {"employee_id": employee_id}, projection(HRRequestSummary)
     ).sort("submitted_date", -1).to_list(50)
-    return [HRRequest(**req) for req in requests]
+    return [HRRequestSummary(**req) for req in requests]
+
+@api_router.get("/hr-requests/{employee_id}/{request_id}", response_model=HRRequest)
+async def get_hr_request(employee_id: str, request_id: str):
+    request = await hr_requests_collection.find_one({"id": request_id, "employee_id": employee_id})
+    if not request:
+        raise HTTPException(status_code=404, detail="Request not found")
+    return HRRequest(**request)
 
 @api_router.put("/hr-requests/{request_id}/status")
 async def update_request_status(request_id: str, status: str, approved_by: Optional[str] = None):
@@ -192,49 +203,104 @@ async def update_request_status(request_id: str, status: str, approved_by: Optio
         if approved_by:
             update_data["approved_by"] = approved_by
     
-    result = await hr_requests_collection.update_one(
+    updated_request = await hr_requests_collection.find_one_and_update(
         {"id": request_id},
-        {"$set": update_data}
+        {"$set": update_data},
+        projection={"_id": 0, "employee_id": 1}
     )
     
-    if result.matched_count == 0:
+    if not updated_request:
         raise HTTPException(status_code=404, detail="Request not found")
     
+    await refresh_dashboard_snapshot(updated_request["employee_id"])
+    employee_contexts.invalidate(updated_request["employee_id"])
+    
     return {"message": "Request status updated successfully"}
 
 # Policy endpoints
-@api_router.get("/policies", response_model=List[Policy])
-async def get_policies(category: Optional[str] = None, search: Optional[str] = None):
-    query = {}
-    
-    if category and category != "all":
-        query["category"] = category
+@api_router.get("/policies", response_model=List[PolicySummary])
+async def get_policies(
+    response: Response,
+    category: Optional[str] = None,
+    search: Optional[str] = None,
+    page: int = Query(1, ge=1),
+    page_size: int = Query(100, ge=1, le=100)
+):
+    if category == "all":
+        category = None
+    skip = (page - 1) * page_size
     
     if search:
-        query["$or"] = [
-            {"title": {"$regex": search, "$options": "i"}},
-            {"content": {"$regex": search, "$options": "i"}},
-            {"tags": {"$regex": search, "$options": "i"}}
-        ]
+        # Ranked full-text search over the in-process policy index
+        ranked = await policy_cache.search(search, category)
+        total = len(ranked)
+        policies = [policy for _, policy in ranked[skip:skip + page_size]]
+    else:
+        matching = await policy_cache.all(category)
+        total = len(matching)
+        policies = matching[skip:skip + page_size]
     
-    policies = await policies_collection.find(query).to_list(100)
-    return [Policy(**policy) for policy in policies]
+    response.headers["X-Total-Count"] = str(total)
+    # Full Markdown bodies are only returned by /policies/{policy_id}
+    return [policy_summary(policy) for policy in policies]
 
 @api_router.get("/policies/categories")
 async def get_policy_categories():
-    categories = await policies_collection.distinct("category")
+    categories = await policy_cache.categories()
     return {"categories": categories}
 
 @api_router.get("/policies/{policy_id}", response_model=Policy)
 async def get_policy(policy_id: str):
-    policy = await policies_collection.find_one({"id": policy_id})
+    policy = await policy_cache.get(policy_id)
     if not policy:
         raise HTTPException(status_code=404, detail="Policy not found")
     return Policy(**policy)
 
 # Chat endpoints
+async def save_chat_message(message_data: ChatMessageCreate, response: str, response_type: str) -> Dict[str, Any]:
+    """Persist one chat exchange and return it in API format"""
+    chat_message = {
+        "id": str(uuid.uuid4()),
+        "employee_id": message_data.employee_id,
+        "session_id": message_data.session_id,
+        "message": message_data.message,
+        "response": response,
+        "type": response_type,
+        "timestamp": datetime.utcnow()
+    }
+    
+    await chat_messages_collection.insert_one(chat_message)
+    
+    return {
+        "id": chat_message["id"],
+        "message": message_data.message,
+        "response": response,
+        "type": response_type,
+        "timestamp": chat_message["timestamp"].isoformat()
+    }
+
+async def stream_chat_message(message_data: ChatMessageCreate):
+    """NDJSON stream of response deltas, ending with the saved chat message"""
+    try:
+        async for event in ai_assistant.stream_response(
+            message_data.message,
+            message_data.employee_id,
+            message_data.session_id
+        ):
+            if event["event"] == "delta":
+                yield json.dumps({"event": "delta", "text": event["text"]}, ensure_ascii=False) + "\n"
+            else:
+                saved = await save_chat_message(message_data, event["response"], event["type"])
+                yield json.dumps({"event": "done", **saved}, ensure_ascii=False) + "\n"
+    except Exception as e:
+        print(f"Chat stream error: {str(e)}")
+        yield json.dumps({"event": "error", "detail": "Failed to process chat message"}) + "\n"
+
 @api_router.post("/chat/message")
-async def send_chat_message(message_data: ChatMessageCreate):
+async def send_chat_message(message_data: ChatMessageCreate, stream: bool = False):
+    if stream:
+        return StreamingResponse(stream_chat_message(message_data), media_type="application/x-ndjson")
+    
     try:
         # Generate AI response
         ai_response = await ai_assistant.generate_response(
@@ -244,25 +310,7 @@ async def send_chat_message(message_data: ChatMessageCreate):
         )
         
         # Save message to database
-        chat_message = {
-            "id": str(uuid.uuid4()),
-            "employee_id": message_data.employee_id,
-            "session_id": message_data.session_id,
-            "message": message_data.message,
-            "response": ai_response["response"],
-            "type": ai_response["type"],
-            "timestamp": datetime.utcnow()
-        }
-        
-        await chat_messages_collection.insert_one(chat_message)
-        
-        return {
-            "id": chat_message["id"],
-            "message": message_data.message,
-            "response": ai_response["response"],
-            "type": ai_response["type"],
-            "timestamp": chat_message["timestamp"].isoformat()
-        }
+        return await save_chat_message(message_data, ai_response["response"], ai_response["type"])
         
     except Exception as e:
         print(f"Chat error: {str(e)}")
@@ -314,6 +362,18 @@ async def get_salary_payments(employee_id: str):
     
     return {"payments": formatted_payments}
 
+@api_router.post("/salary-payments", response_model=SalaryPayment)
+async def create_salary_payment(payment: SalaryPayment):
+    employee = await employees_collection.find_one({"id": payment.employee_id})
+    if not employee:
+        raise HTTPException(status_code=404, detail="Employee not found")
+    
+    await salary_payments_collection.insert_one(payment.dict())
+    await refresh_dashboard_snapshot(payment.employee_id)
+    employee_contexts.invalidate(payment.employee_id)
+    
+    return payment
+
 # Statistics endpoint for admin
 @api_router.get("/admin/statistics")
 async def get_admin_statistics():
@@ -329,6 +389,55 @@ async def get_admin_statistics():
         "totalPolicies": total_policies
     }
 
+@api_router.post("/admin/dashboard-snapshots/rebuild")
+async def rebuild_dashboard_snapshots():
+    """Regenerate every employee's dashboard snapshot"""
+    rebuilt = await rebuild_all_snapshots()
+    return {"message": "Dashboard snapshots rebuilt", "rebuilt": rebuilt}
+
+@api_router.get("/admin/query-plans")
+async def get_query_plan_audit():
+    """Winning-plan stages for every registered endpoint query"""
+    report = await audit_query_plans()
+    return {
+        "queries": report,
+        "collscans": [entry["name"] for entry in report if entry["collscan"]]
+    }
+
+@api_router.get("/admin/ai/answer-cache")
+async def get_answer_cache_stats():
+    """Size and hit/miss counters of the policy answer cache, plus coalesced in-flight questions"""
+    return {**policy_answer_cache.summary(), "coalescing": policy_question_flights.summary()}
+
+@api_router.get("/admin/ai/retrieval")
+async def get_retrieval_stats():
+    """Prompt tokens sent by retrieval-grounded policy answers versus the whole corpus"""
+    return {
+        "chunks": policy_chunk_index.chunk_count,
+        **retrieval_stats.summary(),
+        "vectors": {**policy_vectors.summary(), "current": policy_vectors.matches(policy_chunk_index.fingerprint)}
+    }
+
+@api_router.get("/admin/ai/circuits")
+async def get_circuit_states():
+    """State, rolling error rate and call counters of the AI circuit breakers"""
+    return {"circuits": breaker_summaries()}
+
+@api_router.get("/admin/ai/llm-usage")
+async def get_llm_usage(recent: int = Query(20, ge=0, le=200)):
+    """Tokens, estimated cost, latency, retries and fallbacks per LLM call site"""
+    return llm_usage.summary(recent)
+
+@api_router.get("/metrics")
+async def get_metrics():
+    """Prometheus scrape endpoint"""
+    return Response(content=render_prometheus(), media_type=METRICS_CONTENT_TYPE)
+
+@api_router.get("/admin/dashboard-timings")
+async def get_dashboard_timings():
+    """Per-stage latency percentiles (ms) for dashboard assembly"""
+    return {"stages": dashboard_timings.summary()}
+
 # Include the router in the main app
 app.include_router(api_router)
 
@@ -341,6 +450,7 @@ logger = logging.getLogger(__name__)
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    await policy_cache.stop()
     client.close()
 
 if __name__ == "__main__":
@@ -0,0 +1,88 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Hashable, Optional
+
+from metrics import register_collector
+
+
+class CoalescedCallFailed(Exception):
+    """The call a request was coalesced onto ended without a result"""
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into one upstream call.
+
+    The first caller for a key leads and runs the call; callers arriving
+    while it is in flight wait for its result instead of starting their own.
+    A key of None is never coalesced.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+        self.stats = {"leaders": 0, "coalesced": 0, "failed": 0}
+
+    def join(self, key: Optional[Hashable]) -> Optional[asyncio.Future]:
+        """The in-flight call for the key, if any"""
+        if key is None:
+            return None
+        return self._calls.get(key)
+
+    async def wait(self, future: asyncio.Future, timeout: float) -> Any:
+        """Result of a joined call; raises CoalescedCallFailed if the leader failed or took too long"""
+        self.stats["coalesced"] += 1
+        try:
+            # Shielded so a waiter giving up does not cancel the call for everyone else
+            return await asyncio.wait_for(asyncio.shield(future), timeout=timeout)
+        except asyncio.TimeoutError as e:
+            raise CoalescedCallFailed(f"{self.name} call did not finish within {timeout}s") from e
+
+    @asynccontextmanager
+    async def lead(self, key: Optional[Hashable]) -> AsyncIterator[asyncio.Future]:
+        """Register a call for the key; the caller sets the yielded future's result"""
+        future = asyncio.get_running_loop().create_future()
+        if key is not None:
+            self._calls[key] = future
+            self.stats["leaders"] += 1
+        try:
+            yield future
+        finally:
+            if key is not None and self._calls.get(key) is future:
+                del self._calls[key]
+            if not future.done():
+                if key is not None:
+                    self.stats["failed"] += 1
+                future.set_exception(CoalescedCallFailed(f"{self.name} call ended without a result"))
+                # Mark the exception as retrieved when nobody was waiting for it
+                future.exception()
+
+    async def do(self, key: Optional[Hashable], call: Callable[[], Awaitable[Any]], timeout: float) -> Any:
+        """Run call() once for all concurrent callers with the same key"""
+        existing = self.join(key)
+        if existing is not None:
+            # A failed leader fails its waiters too, so they take their fallback instead of retrying upstream
+            return await self.wait(existing, timeout)
+
+        async with self.lead(key) as future:
+            result = await call()
+            future.set_result(result)
+            return result
+
+    def summary(self) -> Dict[str, Any]:
+        return {"in_flight": len(self._calls), **self.stats}
+
+
+policy_question_flights = SingleFlight("policy_question")
+
+
+def _collect_metrics():
+    yield "ai_single_flight_total", "counter", "Coalesced calls by role", [
+        ({"flight": policy_question_flights.name, "role": role}, count)
+        for role, count in policy_question_flights.stats.items()
+    ]
+    yield "ai_single_flight_in_flight", "gauge", "Calls currently in flight", [
+        ({"flight": policy_question_flights.name}, len(policy_question_flights._calls))
+    ]
+
+
+register_collector(_collect_metrics)
@@ -0,0 +1,91 @@
+import asyncio
+import os
+import weakref
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Any, Optional
+
+from database import assistant_threads_collection, sessions_collection
+
+# Lifetime of a session's Assistant thread when the session has no stored expiry
+DEFAULT_THREAD_TTL_HOURS = int(os.environ.get("ASSISTANT_THREAD_TTL_HOURS", "24"))
+
+# Session -> thread mappings kept in memory per worker
+THREAD_CACHE_SIZE = int(os.environ.get("ASSISTANT_THREAD_CACHE_SIZE", "1000"))
+
+
+class SessionThreadStore:
+    """Maps chat session ids to OpenAI Assistant thread ids.
+
+    Mappings live in the assistant_threads collection (with a TTL index on
+    expires_at) behind an in-memory LRU. Expiry follows the matching Session's
+    expires_at, or DEFAULT_THREAD_TTL_HOURS when there is no such session.
+    """
+
+    def __init__(self, max_entries: int = THREAD_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+    def lock(self, session_id: str) -> asyncio.Lock:
+        """Per-session lock so turns of one session never run on a thread concurrently"""
+        lock = self._locks.get(session_id)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._locks[session_id] = lock
+        return lock
+
+    def _remember(self, entry: Dict[str, Any]):
+        self._entries[entry["session_id"]] = entry
+        self._entries.move_to_end(entry["session_id"])
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get(self, session_id: str, employee_id: str) -> Optional[Dict[str, Any]]:
+        """Live thread mapping for the session, or None"""
+        now = datetime.utcnow()
+        entry = self._entries.get(session_id)
+        if entry and entry["expires_at"] > now:
+            self._entries.move_to_end(session_id)
+        else:
+            self._entries.pop(session_id, None)
+            entry = await assistant_threads_collection.find_one(
+                {"session_id": session_id, "expires_at": {"$gt": now}},
+                {"_id": 0}
+            )
+            if not entry:
+                return None
+            self._remember(entry)
+
+        # A session id reused by another employee never gets their thread
+        if entry["employee_id"] != employee_id:
+            return None
+        return entry
+
+    async def save(self, session_id: str, employee_id: str, thread_id: str) -> Dict[str, Any]:
+        entry = {
+            "session_id": session_id,
+            "employee_id": employee_id,
+            "thread_id": thread_id,
+            "created_at": datetime.utcnow(),
+            "expires_at": await self._session_expiry(session_id)
+        }
+        await assistant_threads_collection.replace_one({"session_id": session_id}, entry, upsert=True)
+        self._remember(entry)
+        return entry
+
+    async def forget(self, session_id: str):
+        self._entries.pop(session_id, None)
+        await assistant_threads_collection.delete_one({"session_id": session_id})
+
+    async def _session_expiry(self, session_id: str) -> datetime:
+        session = await sessions_collection.find_one(
+            {"$or": [{"id": session_id}, {"session_token": session_id}], "is_active": True},
+            {"_id": 0, "expires_at": 1}
+        )
+        if session and session.get("expires_at"):
+            return session["expires_at"]
+        return datetime.utcnow() + timedelta(hours=DEFAULT_THREAD_TTL_HOURS)
+
+
+session_threads = SessionThreadStore()
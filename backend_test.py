@@ -261,7 +261,7 @@ class HRHubBackendTests(unittest.TestCase):
             self.assertIn("id", policy)
             self.assertIn("title", policy)
             self.assertIn("category", policy)
-            self.assertIn("content", policy)
+            self.assertIn("excerpt", policy)
             self.assertIn("tags", policy)
             self.assertIn("last_updated", policy)
             
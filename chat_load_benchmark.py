@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Chat Load Benchmark
+Checks that non-chat endpoints stay responsive while N chat requests are in flight
+
+Usage:
+    python chat_load_benchmark.py [--url http://localhost:8001/api] [--chats 20] [--probes 30]
+"""
+
+import argparse
+import statistics
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+# Configuration
+BACKEND_URL = "http://localhost:8001/api"
+EMPLOYEE_ID = "EMP001"
+
+CHAT_QUESTIONS = [
+    "What is the annual leave policy?",
+    "How many vacation days do I get as Grade D?",
+    "What are the business travel allowances?",
+    "Can you help me write a message to my manager?",
+    "كم يوم إجازة سنوية أستحق؟"
+]
+
+PROBE_PATHS = ["/employees", f"/employees/{EMPLOYEE_ID}", f"/dashboard/{EMPLOYEE_ID}"]
+
+
+def probe_latencies(base_url, probes):
+    """Sequentially hit the non-chat endpoints and return latencies in ms"""
+    latencies = []
+    for i in range(probes):
+        path = PROBE_PATHS[i % len(PROBE_PATHS)]
+        start = time.perf_counter()
+        response = requests.get(f"{base_url}{path}", timeout=30)
+        latencies.append((time.perf_counter() - start) * 1000)
+        response.raise_for_status()
+    return latencies
+
+
+def send_chat(base_url, question):
+    start = time.perf_counter()
+    response = requests.post(f"{base_url}/chat/message", json={
+        "employee_id": EMPLOYEE_ID,
+        "session_id": str(uuid.uuid4()),
+        "message": question
+    }, timeout=120)
+    return response.status_code, (time.perf_counter() - start) * 1000
+
+
+def summarize(label, latencies):
+    ordered = sorted(latencies)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    print(f"{label:<28} p50={statistics.median(ordered):8.1f} ms   p95={p95:8.1f} ms   max={ordered[-1]:8.1f} ms")
+    return statistics.median(ordered), p95
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=BACKEND_URL)
+    parser.add_argument("--chats", type=int, default=20, help="concurrent chat requests")
+    parser.add_argument("--probes", type=int, default=30, help="non-chat requests per phase")
+    args = parser.parse_args()
+
+    print("⏱️  Chat load benchmark")
+    print("=" * 70)
+
+    # Phase 1: baseline with no chat traffic
+    baseline = probe_latencies(args.url, args.probes)
+
+    # Phase 2: same probes while N chat requests are in flight
+    chat_results = []
+
+    with ThreadPoolExecutor(max_workers=args.chats) as pool:
+        futures = [
+            pool.submit(send_chat, args.url, CHAT_QUESTIONS[i % len(CHAT_QUESTIONS)])
+            for i in range(args.chats)
+        ]
+        # Give the server a moment to start the upstream calls
+        time.sleep(0.5)
+        under_load = probe_latencies(args.url, args.probes)
+        chats_still_running = sum(1 for future in futures if not future.done())
+        for future in futures:
+            chat_results.append(future.result())
+
+    print(f"Chats in flight when probes finished: {chats_still_running}/{args.chats}")
+    print(f"Chat requests succeeded: {sum(1 for status, _ in chat_results if status == 200)}/{args.chats}")
+    print("-" * 70)
+    base_p50, base_p95 = summarize("Non-chat baseline", baseline)
+    load_p50, load_p95 = summarize(f"Non-chat with {args.chats} chats", under_load)
+    summarize("Chat requests", [elapsed for _, elapsed in chat_results])
+    print("-" * 70)
+    print(f"p50 ratio under load: {load_p50 / base_p50:.2f}x   p95 ratio: {load_p95 / base_p95:.2f}x")
+
+    if chats_still_running == 0:
+        print("⚠️  All chats finished before probing ended; raise --chats for a meaningful result")
+
+
+if __name__ == "__main__":
+    main()
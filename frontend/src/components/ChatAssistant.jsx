@@ -95,8 +95,28 @@ const ChatAssistant = () => {
     setInputMessage('');
     setIsTyping(true);
 
+    const pendingId = `pending_${Date.now()}`;
+    let streamedText = '';
+
     try {
-      const response = await chatApi.sendMessage(inputMessage);
+      const response = await chatApi.streamMessage(inputMessage, (delta) => {
+        // Show the reply as it streams in, replacing the typing indicator
+        streamedText += delta;
+        setIsTyping(false);
+        setMessages(prev => {
+          const pendingMessage = {
+            id: pendingId,
+            message: inputMessage,
+            response: streamedText,
+            timestamp: new Date().toISOString(),
+            type: 'policy'
+          };
+          const exists = prev.some(msg => msg.id === pendingId);
+          return exists
+            ? prev.map(msg => (msg.id === pendingId ? pendingMessage : msg))
+            : [...prev, pendingMessage];
+        });
+      });
       
       const assistantMessage = {
         id: response.id,
@@ -106,7 +126,7 @@ const ChatAssistant = () => {
         type: response.type
       };
       
-      setMessages(prev => [...prev, assistantMessage]);
+      setMessages(prev => [...prev.filter(msg => msg.id !== pendingId), assistantMessage]);
     } catch (err) {
       console.error('Chat error:', err);
       const errorMessage = {
@@ -116,7 +136,7 @@ const ChatAssistant = () => {
         timestamp: new Date().toISOString(),
         type: 'error'
       };
-      setMessages(prev => [...prev, errorMessage]);
+      setMessages(prev => [...prev.filter(msg => msg.id !== pendingId), errorMessage]);
     } finally {
       setIsTyping(false);
     }
@@ -334,7 +334,7 @@ const PolicyCenter = () => {
                     </CardHeader>
                     <CardContent>
                       <p className="text-gray-600 text-sm mb-4 line-clamp-3">
-                        {policy.content.substring(0, 150)}...
+                        {policy.excerpt.substring(0, 150)}...
                       </p>
                       <div className="flex flex-wrap gap-1">
                         {policy.tags.slice(0, 3).map((tag) => (
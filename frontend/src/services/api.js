@@ -113,6 +113,52 @@ export const chatApi = {
     return response.data;
   },
   
+  // Streams the reply as NDJSON; onDelta receives each text chunk as it arrives
+  streamMessage: async (message, onDelta) => {
+    const response = await fetch(`${API}/chat/message?stream=true`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({
+        employee_id: CURRENT_EMPLOYEE_ID,
+        session_id: CURRENT_SESSION_ID,
+        message
+      })
+    });
+    if (!response.ok || !response.body) {
+      throw new Error(`Chat stream failed with status ${response.status}`);
+    }
+    
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let result = null;
+    
+    while (true) {
+      const { done, value } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+      
+      const lines = buffer.split('\n');
+      buffer = lines.pop();
+      for (const line of lines) {
+        if (!line.trim()) continue;
+        const event = JSON.parse(line);
+        if (event.event === 'delta') {
+          onDelta(event.text);
+        } else if (event.event === 'done') {
+          result = event;
+        } else if (event.event === 'error') {
+          throw new Error(event.detail);
+        }
+      }
+    }
+    
+    if (!result) {
+      throw new Error('Chat stream ended without a response');
+    }
+    return result;
+  },
+  
   getChatHistory: async (sessionId = null) => {
     const params = {};
     if (sessionId) params.session_id = sessionId;
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Intent Classification Microbenchmark
+Compares classify() against the original per-keyword scans: one scan costs the same,
+the per-turn gain comes from memoizing classify() across the checks of a chat turn
+
+Usage:
+    python intent_benchmark.py [--rounds 2000]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+from intent_classifier import classify, POLICY_KEYWORDS, CATEGORY_KEYWORDS  # noqa: E402
+
+# Chat messages taken from the assistant tests, quick actions and support transcripts
+CHAT_CORPUS = [
+    "What is the annual leave policy?",
+    "How many vacation days do I get as Grade D?",
+    "How many vacation days am I entitled to?",
+    "How many vacation days do I have?",
+    "What is the sick leave policy?",
+    "What are the business travel allowances?",
+    "What are my travel allowances for business trips?",
+    "What is the maternity leave policy?",
+    "What is the end of service benefit calculation?",
+    "What is my end of service benefit calculation?",
+    "What overtime policies apply to my grade?",
+    "Can I work remotely and what are the rules?",
+    "What are the working hours?",
+    "What is the vacation policy?",
+    "Request a sick leave",
+    "What's my last salary payment?",
+    "Show me the business travel policy",
+    "I want to submit an expense reimbursement for the client dinner",
+    "Can you help me apply for a work from home day tomorrow?",
+    "Hello, who is my manager?",
+    "Thanks, that was helpful!",
+    "What is the dress code for client meetings?",
+    "كم يوم إجازة سنوية أستحق؟",
+    "ما هي سياسة الإجازة المرضية؟",
+    "ما هو بدل سفر الانتداب إلى دبي؟",
+    "كم رصيدي من الإجازات المتبقية؟",
+    "ما هي ساعات العمل في رمضان؟",
+    "أريد تقديم طلب إجازة",
+]
+
+
+# Categories of the seeded policy corpus, in database order
+SEED_POLICY_CATEGORIES = [
+    "Introduction", "Recruitment", "Leaves", "Leaves", "Leaves", "Leaves", "Compensation",
+    "Travel", "Conduct", "End of Service", "Performance", "Administrative", "Benefits"
+]
+
+
+def legacy_classify(message):
+    """The original keyword scans from AIHRAssistant, kept for comparison"""
+    message_lower = message.lower()
+    is_policy = any(keyword in message_lower for keyword in POLICY_KEYWORDS)
+
+    if any(word in message_lower for word in ['request', 'submit', 'apply']):
+        response_type = 'action'
+    elif any(word in message_lower for word in ['policy', 'rule', 'procedure']):
+        response_type = 'policy'
+    else:
+        response_type = 'query'
+
+    categories = tuple(
+        category for category, keywords in CATEGORY_KEYWORDS.items()
+        if any(keyword in message_lower for keyword in keywords)
+    )
+    return is_policy, response_type, categories
+
+
+def legacy_chat_turn(message):
+    """Keyword work one policy chat turn used to do: the policy check with its list
+    rebuilt per call, the response type, and the per-policy category scan of the
+    local policy search"""
+    message_lower = message.lower()
+    policy_keywords = list(POLICY_KEYWORDS)
+    is_policy = any(keyword in message_lower for keyword in policy_keywords)
+    response_type = legacy_classify(message)[1]
+    relevant = []
+    for category in SEED_POLICY_CATEGORIES:
+        if any(keyword in message_lower for keyword in ['leave', 'vacation', 'sick']) and category == 'Leaves':
+            relevant.append(category)
+        elif any(keyword in message_lower for keyword in ['travel', 'business trip']) and category == 'Travel':
+            relevant.append(category)
+        elif any(keyword in message_lower for keyword in ['salary', 'compensation', 'pay']) and category == 'Compensation':
+            relevant.append(category)
+        elif any(keyword in message_lower for keyword in ['conduct', 'rules', 'dress', 'hours']) and category == 'Conduct':
+            relevant.append(category)
+    return is_policy, response_type, relevant
+
+
+def memoized_chat_turn(message):
+    """Same work with classify(): one scan, later checks hit the memo"""
+    classify.cache_clear()
+    intent = classify(message)
+    is_policy = classify(message).is_policy
+    response_type = classify(message).response_type
+    relevant = [category for category in SEED_POLICY_CATEGORIES if category in intent.categories]
+    return is_policy, response_type, relevant
+
+
+def unmemoized_classify(message):
+    intent = classify.__wrapped__(message)  # bypass memoization to time the scan itself
+    return intent.is_policy, intent.response_type, intent.categories
+
+
+def time_per_message(func, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for message in CHAT_CORPUS:
+            func(message)
+    return (time.perf_counter() - start) / (rounds * len(CHAT_CORPUS)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=2000)
+    args = parser.parse_args()
+
+    print("🔍 Intent classification microbenchmark")
+    print("=" * 70)
+
+    mismatches = [m for m in CHAT_CORPUS if legacy_classify(m) != unmemoized_classify(m)]
+    for message in mismatches:
+        print(f"❌ Mismatch: {message!r}: {legacy_classify(message)} vs {unmemoized_classify(message)}")
+    print(f"Agreement: {len(CHAT_CORPUS) - len(mismatches)}/{len(CHAT_CORPUS)} messages")
+
+    legacy_us = time_per_message(legacy_classify, args.rounds)
+    scan_us = time_per_message(unmemoized_classify, args.rounds)
+    print("-" * 70)
+    print("Single classification")
+    print(f"  Legacy keyword scans:   {legacy_us:8.2f} µs/message")
+    print(f"  classify() scan:        {scan_us:8.2f} µs/message")
+    print(f"  Speedup:                {legacy_us / scan_us:8.2f}x")
+
+    legacy_turn_us = time_per_message(legacy_chat_turn, args.rounds)
+    memoized_turn_us = time_per_message(memoized_chat_turn, args.rounds)
+    print("Full policy chat turn")
+    print(f"  Legacy keyword scans:   {legacy_turn_us:8.2f} µs/message")
+    print(f"  classify() memoized:    {memoized_turn_us:8.2f} µs/message")
+    print(f"  Speedup:                {legacy_turn_us / memoized_turn_us:8.2f}x")
+
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
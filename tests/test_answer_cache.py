@@ -0,0 +1,61 @@
+import asyncio
+
+import pytest
+
+import answer_cache
+from answer_cache import PolicyAnswerCache, content_terms, normalize_question
+
+DIFFERENT_QUESTIONS = [
+    ("What is the per diem for a business trip to Riyadh?", "What is the per diem for a business trip to Jeddah?"),
+    ("What is the hotel allowance for grade D?", "What is the hotel allowance for grade C?"),
+    ("Can I carry over unused annual leave?", "Can I cash out unused annual leave?"),
+    ("How many days of leave after 5 years of service?", "How many days of leave after 6 years of service?"),
+]
+
+
+def cache_with(question):
+    cache = PolicyAnswerCache()
+    cache.store(question, "C", "Engineering", f"answer to {question}", ["policy-1"])
+    return cache
+
+
+def test_exact_normalized_question_hits():
+    cache = cache_with("What is the per diem for a business trip to Riyadh?")
+    assert cache.lookup("what is the PER DIEM for a business trip to riyadh", "C", "Engineering") is not None
+    assert cache.stats["exact_hits"] == 1
+
+
+def test_same_terms_in_another_order_hit_by_similarity():
+    cache = cache_with("What is the per diem for a business trip to Riyadh?")
+    answer = cache.lookup("Riyadh business trip: what per diem?", "C", "Engineering")
+    assert answer == "answer to What is the per diem for a business trip to Riyadh?"
+    assert cache.stats["similar_hits"] == 1
+
+
+@pytest.mark.parametrize("stored, asked", DIFFERENT_QUESTIONS)
+def test_questions_differing_in_a_term_miss(stored, asked):
+    cache = cache_with(stored)
+    assert cache.lookup(asked, "C", "Engineering") is None
+    assert cache.stats["misses"] == 1
+
+
+@pytest.mark.parametrize("stored, asked", DIFFERENT_QUESTIONS)
+def test_questions_differing_in_a_term_miss_at_any_similarity(monkeypatch, stored, asked):
+    monkeypatch.setattr(answer_cache, "SIMILARITY_THRESHOLD", -1.0)
+    assert cache_with(stored).lookup(asked, "C", "Engineering") is None
+
+
+def test_answers_are_not_shared_across_grades():
+    cache = cache_with("What is the hotel allowance?")
+    assert cache.lookup("What is the hotel allowance?", "D", "Engineering") is None
+
+
+def test_single_digits_are_content_terms():
+    assert normalize_question("grade 5 allowance") != normalize_question("grade 6 allowance")
+    assert content_terms("allowance for grade 5") == content_terms("grade 5 allowance")
+
+
+def test_changed_policy_drops_its_answers():
+    cache = cache_with("What is the hotel allowance?")
+    asyncio.run(cache.invalidate_policies({"policy-1"}))
+    assert cache.lookup("What is the hotel allowance?", "C", "Engineering") is None
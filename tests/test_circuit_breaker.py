@@ -0,0 +1,128 @@
+import pytest
+
+import circuit_breaker
+from circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", clock)
+    return clock
+
+
+def breaker():
+    return CircuitBreaker("test", latency_budget=2.0, error_rate=0.5, window_seconds=60, min_calls=4, open_seconds=30)
+
+
+def fail(breaker):
+    with pytest.raises(ValueError):
+        with breaker.guard():
+            raise ValueError("upstream error")
+
+
+def succeed(breaker, clock, seconds=0.1):
+    with breaker.guard():
+        clock.now += seconds
+
+
+def test_stays_closed_below_min_calls(clock):
+    b = breaker()
+    for _ in range(3):
+        fail(b)
+    assert b.state == CLOSED
+
+
+def test_opens_at_error_rate_and_rejects(clock):
+    b = breaker()
+    succeed(b, clock)
+    succeed(b, clock)
+    fail(b)
+    assert b.state == CLOSED
+    fail(b)
+    assert b.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        with b.guard():
+            pytest.fail("an open circuit must not run the call")
+    assert b.counters["rejected"] == 1 and b.counters["opened"] == 1
+
+
+def test_slow_successes_count_as_failures(clock):
+    b = breaker()
+    for _ in range(4):
+        succeed(b, clock, seconds=5.0)
+    assert b.state == OPEN
+    assert b.counters["slow"] == 4 and b.counters["success"] == 4
+
+
+def test_failures_leave_the_window(clock):
+    b = breaker()
+    fail(b)
+    fail(b)
+    clock.now += 61
+    succeed(b, clock)
+    succeed(b, clock)
+    fail(b)
+    assert b.state == CLOSED
+    assert b.window_error_rate() == pytest.approx(1 / 3)
+
+
+def open_breaker(clock):
+    b = breaker()
+    for _ in range(4):
+        fail(b)
+    assert b.state == OPEN
+    clock.now += 30
+    return b
+
+
+def test_half_open_lets_one_probe_through_and_closes_on_success(clock):
+    b = open_breaker(clock)
+    assert b.allow()
+    assert b.state == HALF_OPEN
+    assert not b.allow()
+    b.record(True, 0.1)
+    assert b.state == CLOSED
+    assert b.window_error_rate() == 0.0
+
+
+def test_failed_probe_reopens(clock):
+    b = open_breaker(clock)
+    fail(b)
+    assert b.state == OPEN
+    assert not b.allow()
+    assert b.counters["opened"] == 2
+
+
+def test_slow_probe_reopens(clock):
+    b = open_breaker(clock)
+    succeed(b, clock, seconds=5.0)
+    assert b.state == OPEN
+
+
+def test_cancelled_probe_frees_the_slot(clock):
+    b = open_breaker(clock)
+    with pytest.raises(KeyboardInterrupt):
+        with b.guard():
+            raise KeyboardInterrupt
+    assert b.state == HALF_OPEN
+    assert b.allow()
+
+
+def test_restart_excludes_local_queueing_from_latency(clock):
+    b = breaker()
+    for _ in range(4):
+        with b.guard() as call:
+            clock.now += 10.0
+            call.restart()
+            clock.now += 0.1
+    assert b.state == CLOSED
+    assert b.counters["slow"] == 0
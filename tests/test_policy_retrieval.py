@@ -0,0 +1,111 @@
+import numpy as np
+import pytest
+
+from embeddings import EMBEDDING_MODEL_NAME
+from policy_retrieval import PolicyChunkIndex, chunk_policies, fuse_rankings
+from policy_search import PolicySearchIndex
+from policy_vectors import PolicyVectorIndex, build_vector_file
+
+POLICIES = [
+    {"id": "leave", "title": "Annual Leave", "category": "Leaves", "tags": ["vacation"],
+     "content": "Employees earn annual leave every month. Unused leave can be carried over once."},
+    {"id": "travel", "title": "Business Travel", "category": "Travel", "tags": ["per diem"],
+     "content": "The per diem covers meals during business trips. Hotels are booked by HR."},
+    {"id": "conduct", "title": "Code of Conduct", "category": "Conduct", "tags": [],
+     "content": "Employees follow the dress code and the working hours. Leave requests go to managers."},
+]
+
+
+def ids(ranked):
+    return [policy["id"] for _, policy in ranked]
+
+
+def test_bm25_ranks_the_policy_about_the_term_first():
+    index = PolicySearchIndex()
+    index.build(POLICIES)
+    assert ids(index.search("annual leave"))[0] == "leave"
+    assert ids(index.search("per diem"))[0] == "travel"
+
+
+def test_bm25_weights_title_hits_above_body_hits():
+    index = PolicySearchIndex()
+    index.build([
+        {"id": "body", "title": "General", "category": "A", "content": "conduct"},
+        {"id": "title", "title": "Conduct", "category": "A", "content": "general"},
+    ])
+    assert ids(index.search("conduct")) == ["title", "body"]
+
+
+def test_bm25_rarer_terms_count_more():
+    index = PolicySearchIndex()
+    index.build(POLICIES)
+    scores = {policy["id"]: score for score, policy in index.search("employees hotels")}
+    # "employees" is in two policies, "hotels" only in travel
+    assert scores["travel"] > scores["leave"]
+
+
+def test_bm25_expands_unknown_terms_by_prefix_and_filters_by_category():
+    index = PolicySearchIndex()
+    index.build(POLICIES)
+    assert ids(index.search("vacat")) == ["leave"]
+    assert ids(index.search("leave", category="Conduct")) == ["conduct"]
+    assert index.search("zzz") == []
+
+
+def chunk(chunk_id):
+    return {"id": chunk_id}
+
+
+def test_rrf_scores_agreement_above_a_single_top_rank():
+    fused = fuse_rankings([[chunk("a"), chunk("b")], [chunk("c"), chunk("b")]], top_k=3)
+    # b scores 2 / (RRF_K + 2), more than the 1 / (RRF_K + 1) of a and c
+    assert [c["id"] for c in fused] == ["b", "a", "c"]
+
+
+def test_rrf_breaks_ties_by_id_and_truncates():
+    fused = fuse_rankings([[chunk("y")], [chunk("x")], []], top_k=1)
+    assert [c["id"] for c in fused] == ["x"]
+    assert fuse_rankings([], top_k=3) == []
+
+
+def test_chunk_index_retrieves_policy_sections():
+    index = PolicyChunkIndex()
+    index.build(POLICIES)
+    retrieved = index.retrieve("per diem meals", top_k=1)
+    assert [c["policy_id"] for c in retrieved] == ["travel"]
+    assert index.chunk(retrieved[0]["id"]) is retrieved[0]
+
+
+@pytest.mark.parametrize("dtype", ["float16", "int8"])
+def test_vector_file_round_trip(tmp_path, dtype):
+    chunks = chunk_policies(POLICIES)
+    meta = build_vector_file(chunks, tmp_path / "vectors", EMBEDDING_MODEL_NAME, dtype)
+    assert meta["count"] == len(chunks) and meta["dtype"] == dtype
+
+    vectors = PolicyVectorIndex(tmp_path / "vectors")
+    assert vectors.load()
+    assert isinstance(vectors._matrix, np.memmap)
+    index = PolicyChunkIndex()
+    index.build(POLICIES)
+    assert vectors.matches(index.fingerprint)
+
+    results = vectors.search(chunks[0]["title"] + "\n" + chunks[0]["content"], top_k=2)
+    assert results[0][1] == chunks[0]["id"]
+    assert results[0][0] == pytest.approx(1.0, abs=0.02)
+    assert results[0][0] >= results[1][0]
+
+
+def test_stale_vector_file_is_detected(tmp_path):
+    build_vector_file(chunk_policies(POLICIES), tmp_path / "vectors", EMBEDDING_MODEL_NAME)
+    vectors = PolicyVectorIndex(tmp_path / "vectors")
+    vectors.load()
+
+    index = PolicyChunkIndex()
+    index.build(POLICIES[:2])
+    assert not vectors.matches(index.fingerprint)
+
+
+def test_missing_vector_file_disables_semantic_search(tmp_path):
+    vectors = PolicyVectorIndex(tmp_path / "missing")
+    assert not vectors.load()
+    assert vectors.search("leave", top_k=3) == []
@@ -0,0 +1,120 @@
+import asyncio
+
+import pytest
+
+from single_flight import CoalescedCallFailed, SingleFlight
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_concurrent_calls_with_the_same_key_share_one_call():
+    async def scenario():
+        flights = SingleFlight("test")
+        calls = 0
+        release = asyncio.Event()
+
+        async def call():
+            nonlocal calls
+            calls += 1
+            await release.wait()
+            return "answer"
+
+        tasks = [asyncio.create_task(flights.do("key", call, timeout=5)) for _ in range(5)]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*tasks)
+        return flights, calls, results
+
+    flights, calls, results = run(scenario())
+    assert calls == 1
+    assert results == ["answer"] * 5
+    assert flights.stats == {"leaders": 1, "coalesced": 4, "failed": 0}
+    assert flights.summary()["in_flight"] == 0
+
+
+def test_none_key_and_different_keys_are_not_coalesced():
+    async def scenario():
+        flights = SingleFlight("test")
+        calls = []
+
+        async def call(name):
+            calls.append(name)
+            await asyncio.sleep(0.01)
+            return name
+
+        results = await asyncio.gather(
+            flights.do(None, lambda: call("a"), timeout=5),
+            flights.do(None, lambda: call("b"), timeout=5),
+            flights.do("x", lambda: call("c"), timeout=5),
+            flights.do("y", lambda: call("d"), timeout=5),
+        )
+        return flights, calls, results
+
+    flights, calls, results = run(scenario())
+    assert sorted(calls) == ["a", "b", "c", "d"]
+    assert results == ["a", "b", "c", "d"]
+    assert flights.stats["coalesced"] == 0
+
+
+def test_leader_error_reaches_the_leader_and_fails_its_waiters():
+    async def scenario():
+        flights = SingleFlight("test")
+        release = asyncio.Event()
+
+        async def call():
+            await release.wait()
+            raise ValueError("upstream error")
+
+        leader = asyncio.create_task(flights.do("key", call, timeout=5))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(flights.do("key", call, timeout=5))
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(leader, waiter, return_exceptions=True)
+
+        # The failed call is forgotten, so the next caller leads a fresh one
+        async def retry():
+            return "recovered"
+
+        return flights, results, await flights.do("key", retry, timeout=5)
+
+    flights, (leader_result, waiter_result), retried = run(scenario())
+    assert isinstance(leader_result, ValueError)
+    assert isinstance(waiter_result, CoalescedCallFailed)
+    assert flights.stats["failed"] == 1
+    assert retried == "recovered"
+
+
+def test_waiter_timeout_does_not_cancel_the_leader():
+    async def scenario():
+        flights = SingleFlight("test")
+
+        async def call():
+            await asyncio.sleep(0.05)
+            return "slow answer"
+
+        leader = asyncio.create_task(flights.do("key", call, timeout=5))
+        await asyncio.sleep(0)
+        with pytest.raises(CoalescedCallFailed):
+            await flights.do("key", call, timeout=0.01)
+        return await leader
+
+    assert run(scenario()) == "slow answer"
+
+
+def test_lead_without_a_result_fails_waiters():
+    async def scenario():
+        flights = SingleFlight("test")
+        async with flights.lead("key"):
+            flight = flights.join("key")
+            waiter = asyncio.create_task(flights.wait(flight, timeout=5))
+            await asyncio.sleep(0)
+        with pytest.raises(CoalescedCallFailed):
+            await waiter
+        return flights
+
+    flights = run(scenario())
+    assert flights.join("key") is None
+    assert flights.stats["failed"] == 1